@@ -0,0 +1,94 @@
+"""A script to benchmark properties functions on a synthetic market"""
+
+# =================
+# Python IMPORTS
+# =================
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+# =================
+# Internal IMPORTS
+# =================
+from pytradingbot.properties_functions import functions
+
+# =================
+# Variables
+# =================
+FUNCTIONS = {
+    "EMA": functions.exponential_moving_average,
+    "RSI": functions.rsi,
+    "variation": functions.variation,
+}
+
+
+def synthetic_market(nrows: int, seed: int = 0) -> pd.Series:
+    """
+    Generate a random walk sampled every minute
+
+    Parameters
+    ----------
+    nrows: int
+        number of rows
+    seed: int
+        seed of the random generator
+
+    Returns
+    -------
+    pd.Series
+    """
+    rng = np.random.default_rng(seed)
+    values = 20000 + np.cumsum(rng.normal(0, 5, nrows))
+    index = pd.date_range("2023-01-01", periods=nrows, freq="min")
+    return pd.Series(index=index, data=values, name="ask")
+
+
+def timeit(func, data: pd.Series, k: int, vectorized: bool) -> float:
+    """
+    Time one call of a properties function
+
+    Parameters
+    ----------
+    func: function of properties_functions.functions
+    data: pd.Series
+    k: int
+        window size
+    vectorized: bool
+        use the vectorized kernel or the rolling window apply
+
+    Returns
+    -------
+    float: elapsed time in seconds
+    """
+    functions.VECTORIZED = vectorized
+    tstart = time.perf_counter()
+    func(data, k)
+    elapsed = time.perf_counter() - tstart
+    functions.VECTORIZED = True
+    return elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="benchmark_functions.py",
+        description="Compare vectorized kernels with rolling window functions",
+    )
+    parser.add_argument("--nrows", "-n", type=int, default=1_000_000)
+    parser.add_argument("--k", "-k", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument(
+        "--functions", "-f", nargs="+", default=list(FUNCTIONS), choices=FUNCTIONS
+    )
+    args = parser.parse_args()
+
+    market = synthetic_market(args.nrows)
+    print(f"nrows={args.nrows}, numpy_ext={functions.NP_ROLL}")
+    for name in args.functions:
+        for k in args.k:
+            t_roll = timeit(FUNCTIONS[name], market, k, vectorized=False)
+            t_vec = timeit(FUNCTIONS[name], market, k, vectorized=True)
+            print(
+                f"{name} k={k}: rolling={t_roll:.3f}s vectorized={t_vec:.3f}s "
+                f"speedup={t_roll / t_vec:.0f}x"
+            )
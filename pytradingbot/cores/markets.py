@@ -6,6 +6,7 @@ Module containing all market objects
 # Python IMPORTS
 # =================
 import os
+import heapq
 import logging
 import numpy as np
 import pandas as pd
@@ -15,6 +16,8 @@ from alive_progress import alive_bar
 # Internal IMPORTS
 # =================
 from pytradingbot.cores import properties, orders
+from pytradingbot.utils.column_store import ColumnStore
+from pytradingbot.utils.journal import TickJournal
 from pytradingbot.utils.read_file import (
     read_input_analysis_config,
     read_input_order_config,
@@ -23,6 +26,8 @@ from pytradingbot.utils.read_file import (
 # =================
 # Variables
 # =================
+OFORMATS = ["pandas", "numpy"]  # output formats of Market.save
+DAY_NS = 86400 * 10**9  # one day in nanoseconds
 
 
 class Market:
@@ -30,7 +35,13 @@ class Market:
     Class containing value of market
     """
 
-    def __init__(self, parent=None, odir: str = None, oformat: str = "pandas"):
+    def __init__(
+        self,
+        parent=None,
+        odir: str = None,
+        oformat: str = "pandas",
+        journal: TickJournal = None,
+    ):
         """
         Initialisation
 
@@ -40,23 +51,33 @@ class Market:
         odir: str
             output directory
         oformat: str
-            output format
+            output format, in OFORMATS
+        journal: TickJournal
+            journal where each tick of update is written (see compact and recover)
         """
         self.parents = {}
         self.child = []
+        self._graph = None  # cache of the properties graph, see _get_graph
+        self.frame = None  # columnar storage of properties, see store
+        self._stored = {}  # name: (property, view) of properties in frame
         self.add_parent("api", parent)
-        self.ask = properties.Ask(market=self)
-        self.bid = properties.Bid(market=self)
-        self.volume = properties.Volume(market=self)
+        self.nclean: int = 300  # maximum number of row in dataframe
+        # one more row than nclean is stored, so that clean is triggered
+        self.ask = properties.Ask(market=self, capacity=self.nclean + 1)
+        self.bid = properties.Bid(market=self, capacity=self.nclean + 1)
+        self.volume = properties.Volume(market=self, capacity=self.nclean + 1)
         self.order = orders.Order(market=self)
         self.action = self.order.action
         for prop in [self.ask, self.bid, self.volume]:
             self.add_child(prop)
         self.odir = odir
         self.oformat = oformat
+        self._saved_time = None  # last time saved with the numpy format
+        self.save_chunk = 1000  # rows by file of the numpy format, see flush
+        self._unsaved = []  # records not written yet with the numpy format
+        self.journal = journal
         if self.odir is not None and not os.path.isdir(self.odir):
             os.makedirs(self.odir)
-        self.nclean: int = 300  # maximum number of row in dataframe
 
     def __call__(self, *args, **kwargs):
         """
@@ -64,15 +85,31 @@ class Market:
         """
         return self.dataframe()
 
-    def update(self):
+    @property
+    def size(self) -> int:
+        """number of rows of the market, without building the DataFrame"""
+        return self.ask.size
+
+    def update(self, values: dict = None):
         """
         method to update market values from the api
+
+        Parameters
+        ----------
+        values: dict
+            market values (keys time, ask, bid and volume) already queried,
+            queried from the api if None
         """
-        if "api" in self.parents:
+        if values is None and "api" in self.parents:
             values = self.parents["api"].get_market()
+        if values is not None:
             self.ask.add_value(index=[values["time"]], value=[values["ask"]])
             self.bid.add_value(index=[values["time"]], value=[values["bid"]])
             self.volume.add_value(index=[values["time"]], value=[values["volume"]])
+            if self.journal is not None:
+                self.journal.append(
+                    values["time"], values["ask"], values["bid"], values["volume"]
+                )
         else:
             logging.warning(
                 f"api is not defined in parents: available parents: {self.parents.keys()}"
@@ -82,9 +119,10 @@ class Market:
         """
         Method to analyse market value
         """
+        # properties are sorted by dependencies: parents are already updated
         update_func = [prop.update for prop in self._get_all_child()]
         for update in update_func:
-            update()
+            update(parents=False)
         self.order.update()
 
     def add_parent(self, name: str, obj: object):
@@ -109,6 +147,7 @@ class Market:
         """
         if obj not in self.child:
             self.child.append(obj)
+            self.reset_graph()
 
     def dataframe(self) -> pd.DataFrame:
         """
@@ -118,17 +157,83 @@ class Market:
         -------
             pd.DataFrame
         """
-        df = pd.concat([prop.data for prop in self._get_all_child()], axis=1)
+        child = self._get_all_child()
+        if self._is_stored(child):
+            df = self.frame.dataframe()  # no copy
+        else:
+            df = pd.concat([prop.data for prop in child], axis=1)
         if not isinstance(df.index, pd.DatetimeIndex):
             df.index = pd.to_datetime(df.index)
             df.index = df.index.rename("time")
         return df
 
-    def save(self):
+    def store(self, prop: properties.PropertiesABC):
         """
-        Method to save market in a file
+        Method to copy the data of a property in the columnar storage (if any),
+        data of the property is then replaced by a view on the storage.
+        Data not aligned with the market index is not stored.
+
+        Parameters
+        ----------
+        prop: properties object
         """
-        data = self.dataframe()
+        if self.frame is None:
+            return
+        data = prop.data
+        if data.dtype.kind not in "fiu" or not self.frame.is_aligned(data):
+            return
+        if prop.name in self._stored and self._stored[prop.name][0] is not prop:
+            return  # name already used by another property
+        if self.frame.set_column(prop.name, data.values):
+            self._move_views()  # storage reallocated
+        view = self.frame.series(prop.name)
+        prop.data = view
+        self._stored[prop.name] = (prop, view)
+
+    def _move_views(self):
+        """Method to replace data of stored properties by views on the current storage"""
+        for name, (stored, _) in self._stored.items():
+            view = self.frame.series(name)
+            stored.data = view
+            self._stored[name] = (stored, view)
+
+    def _is_stored(self, child: list) -> bool:
+        """
+        Method to check if the columnar storage contains exactly the data of properties
+
+        Parameters
+        ----------
+        child: list
+            list of properties, in the order of columns
+
+        Returns
+        -------
+        Bool
+        """
+        if self.frame is None or len(child) != len(self.frame.columns):
+            return False
+        for prop, name in zip(child, self.frame.columns):
+            if name not in self._stored:
+                return False
+            stored, view = self._stored[name]
+            if stored is not prop or prop.data is not view:
+                return False
+        return True
+
+    def save(self, data: pd.DataFrame = None):
+        """
+        Method to save market in a file
+
+        Parameters
+        ----------
+        data: pd.DataFrame
+            rows to save, all rows of the market (dataframe) if None
+        """
+        if data is None:
+            data = self.dataframe()
+        if self.oformat == "numpy":
+            self._save_numpy(data)
+            return
         days = data.index.normalize()
         # TODO: stop writing the first day when nothing is done
         for day in days.unique():
@@ -147,6 +252,128 @@ class Market:
             odata.sort_index(inplace=True)
             odata.to_csv(path_or_buf=ofile, sep=" ", index_label="time")
 
+    def _save_numpy(self, data: pd.DataFrame):
+        """
+        Method to save new rows of market in binary chunks (.npy files of records).
+        New rows are kept in memory and written by chunks of save_chunk rows,
+        at the end of a day or when columns change (see flush). Rows not written
+        are lost if the process is killed: use a journal (see compact) or save_chunk 1.
+        Chunks of a day are in the directory odir/day, and named by their first
+        and last times. Use read_npy_market to read them.
+
+        Parameters
+        ----------
+        data: pd.DataFrame
+            rows of the market
+        """
+        if len(data) == 0:
+            return
+        times = data.index.asi8
+        days = data.index.normalize()
+        new = np.ones(len(times), dtype=bool)
+        if self._saved_time is not None:
+            new = times > self._saved_time
+        for day in days[new].unique():
+            mask = new & (days == day)
+            if self._saved_time is None:
+                # after a (re)start, rows already saved in chunks are skipped
+                mask &= times > self._last_saved_time(day)
+            if not mask.any():
+                continue
+            odata = data[mask]
+            records = np.empty(
+                len(odata),
+                dtype=[("time", np.int64)]
+                + [(str(col), float) for col in data.columns],
+            )
+            records["time"] = times[mask]
+            for col in data.columns:
+                records[str(col)] = odata[col].to_numpy(dtype=float, na_value=np.nan)
+            if len(self._unsaved) > 0 and (
+                records.dtype != self._unsaved[0].dtype
+                or records["time"][0] // DAY_NS != self._unsaved[0]["time"][0] // DAY_NS
+            ):
+                self.flush()
+            self._unsaved.append(records)
+            if sum(len(chunk) for chunk in self._unsaved) >= self.save_chunk:
+                self.flush()
+        self._saved_time = times[-1]
+
+    def _last_saved_time(self, day: pd.Timestamp) -> int:
+        """
+        Method to get the last time saved in the chunks of a day,
+        from the name of the last chunk
+
+        Returns
+        -------
+        int: time in ns, minimum int64 if nothing is saved
+        """
+        odir = f"{self.odir}/{str(day.date())}"
+        if not os.path.isdir(odir):
+            return np.iinfo(np.int64).min
+        chunks = sorted(f for f in os.listdir(odir) if f.endswith(".npy"))
+        if len(chunks) == 0:
+            return np.iinfo(np.int64).min
+        return int(chunks[-1][: -len(".npy")].split("_")[-1])
+
+    def flush(self):
+        """
+        Method to write rows kept in memory by save (numpy format) in one chunk
+        """
+        if len(self._unsaved) == 0:
+            return
+        records = np.concatenate(self._unsaved)
+        self._unsaved = []
+        day = pd.Timestamp(records["time"][0]).normalize()
+        odir = f"{self.odir}/{str(day.date())}"
+        os.makedirs(odir, exist_ok=True)
+        np.save(
+            f"{odir}/{records['time'][0]:019d}_{records['time'][-1]:019d}.npy", records
+        )
+
+    def compact(self):
+        """
+        Method to move ticks of the journal to the files of odir (in oformat),
+        the journal is then cleared.
+        Ticks still in the market are saved with all columns (as save),
+        older ticks (removed by clean) with ask, bid and volume only.
+        """
+        if self.journal is None or len(self.journal) == 0:
+            return
+        raw = self.journal.dataframe()
+        raw = raw[~raw.index.duplicated(keep="last")]
+        data = self.dataframe()
+        data = pd.concat(
+            [raw[~raw.index.isin(data.index)], data[data.index.isin(raw.index)]],
+            axis=0,
+        )[data.columns].sort_index()
+        self.save(data)
+        self.flush()
+        self.journal.clear()
+
+    def recover(self) -> int:
+        """
+        Method to restore the last ticks of the journal in the market,
+        after a restart of the process
+
+        Returns
+        -------
+        int
+            number of ticks restored
+        """
+        if self.journal is None:
+            return 0
+        data = self.journal.dataframe().iloc[-self.nclean - 1 :]
+        data = data[~data.index.duplicated(keep="last")]
+        if self.ask.size > 0:
+            data = data[data.index > self.ask.index[-1]]
+        if len(data) > 0:
+            index = list(data.index)
+            self.ask.add_value(index=index, value=data["ask"].values)
+            self.bid.add_value(index=index, value=data["bid"].values)
+            self.volume.add_value(index=index, value=data["volume"].values)
+        return len(data)
+
     def set_maximum_rows(self, nrows: int):
         """
         set maximum number of rows in the DataFrame (before cleaning)
@@ -157,12 +384,15 @@ class Market:
             number of rows
         """
         self.nclean = nrows
+        # buffers are only reduced by clean, to keep current rows
+        for prop in [self.ask, self.bid, self.volume]:
+            prop.set_capacity(max(nrows + 1, prop.size))
 
     def clean(self):
         """
         Method to clean the market
         """
-        if len(self.ask.data) > self.nclean:
+        if self.ask.size > self.nclean:
             print("Market cleaned")
             # TODO: get maximum K value in properties
             nrows = 1
@@ -171,28 +401,103 @@ class Market:
             self.ask.clean(nrows=nrows)
             self.bid.clean(nrows=nrows)
             self.volume.clean(nrows=nrows)
-            for prop in self.child:
+            for prop in self._get_all_child():
                 prop.clean(nrows=nrows)
+            for prop in [self.ask, self.bid, self.volume]:
+                prop.set_capacity(self.nclean + 1)
 
-    @staticmethod
-    def delete_properties(obj: properties.PropertiesABC):
-        """Method to delete properties from childs"""
+    def delete_properties(self, obj: properties.PropertiesABC):
+        """
+        Method to delete properties from childs, with their children.
+        Their columns are removed from the columnar storage (if any)
+        """
+        deleted = [obj]
+        for prop in deleted:
+            deleted.extend(child for child in prop.child if child not in deleted)
         obj.delete_link()
         del obj
+        self.reset_graph()
+        if self.frame is None:
+            return
+        moved = False
+        for name, (stored, _) in list(self._stored.items()):
+            if stored in deleted:
+                moved = self.frame.delete_column(name) or moved
+                del self._stored[name]
+        if moved:
+            self._move_views()
+
+    def reset_graph(self):
+        """
+        Method to reset the cached graph of properties.
+        Called each time a property is added or deleted
+        """
+        self._graph = None
+
+    def _get_graph(self) -> dict:
+        """
+        Method to get the graph of properties, built once and cached until reset_graph.
+
+        Returns
+        -------
+        dict: with keys
+            order: list of properties, each property is after its parents
+            set: set of properties
+            name: dict of properties by name
+            type: dict of list of properties by type
+        """
+        if self._graph is not None:
+            return self._graph
+
+        # find all properties, breadth first from the market
+        child = list(self.child)
+        found = set(child)
+        for prop in child:  # child grows during the loop
+            for c in prop.child:
+                if c not in found:
+                    found.add(c)
+                    child.append(c)
+
+        # sort by dependencies, keeping the search order when possible
+        # (parents given as a dict are not linked to their child, use parents only)
+        position = {prop: i for i, prop in enumerate(child)}
+        dependents = {prop: [] for prop in child}
+        nparents = {}
+        for prop in child:
+            parents = {
+                id(p): p
+                for key, p in prop.parents.items()
+                if key != "market" and p in found
+            }
+            nparents[prop] = len(parents)
+            for p in parents.values():
+                dependents[p].append(prop)
+        heap = [position[prop] for prop in child if nparents[prop] == 0]
+        heapq.heapify(heap)
+        order = []
+        while len(heap) > 0:
+            prop = child[heapq.heappop(heap)]
+            order.append(prop)
+            for c in dependents[prop]:
+                nparents[c] -= 1
+                if nparents[c] == 0:
+                    heapq.heappush(heap, position[c])
+
+        graph = {"order": order, "set": found, "name": {}, "type": {}}
+        for prop in order:
+            graph["name"].setdefault(prop.name, prop)
+            graph["type"].setdefault(prop.type, []).append(prop)
+        self._graph = graph
+        return graph
 
     def _get_all_child(self) -> list:
         """
         Method to return of child objects (properties)
         Returns
         -------
-        list of properties object
+        list of properties object, each property is after its parents
         """
-        child = self.child
-        tmp = child
-        while len(tmp) != 0:
-            tmp = [prop for c in tmp for prop in c.child if prop not in child]
-            child += tmp
-        return child
+        return list(self._get_graph()["order"])
 
     def _get_all_child_name(self) -> list:
         """
@@ -201,8 +506,7 @@ class Market:
         -------
         list of str: each str is the name of a property
         """
-        child = self._get_all_child()
-        return [c.name for c in child]
+        return list(self._get_graph()["name"])
 
     def find_property_by_name(self, name: str) -> properties.PropertiesABC:
         """
@@ -217,7 +521,7 @@ class Market:
         -------
         Properties
         """
-        return [c for c in self._get_all_child() if c.name == name][0]
+        return self._get_graph()["name"][name]
 
     def is_property(self, prop: properties.PropertiesABC) -> bool:
         """
@@ -231,7 +535,7 @@ class Market:
         -------
         Bool
         """
-        return prop in self._get_all_child()
+        return prop in self._get_graph()["set"]
 
     def is_property_by_name(self, name: str) -> bool:
         """
@@ -246,7 +550,7 @@ class Market:
         -------
         Bool
         """
-        return name in self._get_all_child_name()
+        return name in self._get_graph()["name"]
 
     def find_properties_by_type(self, ptype: str) -> list:
         """
@@ -261,7 +565,7 @@ class Market:
         -------
         list of properties object
         """
-        return [c for c in self._get_all_child() if c.type == ptype]
+        return list(self._get_graph()["type"].get(ptype, []))
 
     def find_property_by_type(self, ptype: str) -> properties.PropertiesABC:
         """
@@ -288,7 +592,18 @@ class Market:
         path: str
             path of the input file
         """
-        properties_list = read_input_analysis_config(path)
+        self.generate_property_from_config(read_input_analysis_config(path))
+
+    def generate_property_from_config(self, properties_list: list):
+        """
+        Method to generate properties from the analysis part of a config
+        already read (see read_input_analysis_config)
+
+        Parameters
+        ----------
+        properties_list: list
+            properties, each one stored in a dict with format and value keys
+        """
         for prop in properties_list:
             if prop["format"] == "name":
                 properties.generate_property_by_name(prop["value"], self)
@@ -302,8 +617,19 @@ class Market:
         path: str
             path of the xml input file
         """
+        self.generate_order_from_config(read_input_order_config(path))
+
+    def generate_order_from_config(self, actions: list):
+        """
+        Method to generate order from the order part of a config
+        already read (see read_input_order_config)
+
+        Parameters
+        ----------
+        actions: list
+            actions, each one stored in a dict with type and conditions keys
+        """
         self.order = orders.Order(market=self)  # (Re)Init order
-        actions = read_input_order_config(path)
         for action in actions:
             self.order.add_child(orders.generate_action_from_dict(action, market=self))
 
@@ -313,14 +639,34 @@ class MarketLoad(Market):
     Class Market where initial data is not empty
     """
 
-    def __init__(self, ask: pd.Series, bid: pd.Series, volume: pd.Series):
+    def __init__(
+        self,
+        ask: pd.Series,
+        bid: pd.Series,
+        volume: pd.Series,
+        columnar: bool = False,
+    ):
+        """
+        Parameters
+        ----------
+        ask: pd.Series
+        bid: pd.Series
+        volume: pd.Series
+        columnar: bool
+            store all properties in one preallocated array sharing the index,
+            dataframe() is then a view without copy
+        """
         super().__init__()
         self.child = []
+        self.reset_graph()
+        if columnar:
+            self.frame = ColumnStore(ask.index)
         self.ask = properties.AskLoad(data=ask, market=self)
         self.bid = properties.BidLoad(data=bid, market=self)
         self.volume = properties.VolumeLoad(data=volume, market=self)
         for prop in [self.ask, self.bid, self.volume]:
             self.add_child(prop)
+            self.store(prop)
 
     def analyse(self, verbose=True):
         """
@@ -330,9 +676,9 @@ class MarketLoad(Market):
         if verbose:
             with alive_bar(len(update_func)) as mybar:
                 for update in update_func:
-                    update()
+                    update(parents=False)
                     mybar()
         else:
             for update in update_func:
-                update()
+                update(parents=False)
         self.order.update()
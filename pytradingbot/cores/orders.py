@@ -4,10 +4,13 @@ Module containing all classes and functions for market Orders
 
 from abc import ABC
 import logging
+import re
 import pandas as pd
 import numpy as np
 from pytradingbot.cores.properties import PropertiesABC, generate_property_by_name
 
+VECTORIZED = True  # simulate trading with NumPy instead of a loop over actions
+
 
 class Condition(ABC):
     """Condition Class"""
@@ -102,9 +105,7 @@ class Order(ABC):
 
         if force:
             update = True
-        elif "market" in self.parents and len(self.data) < len(
-            self.parents["market"].dataframe()
-        ):
+        elif "market" in self.parents and len(self.data) < self.parents["market"].size:
             update = True
         elif len(self.child) > 0 and len(self.data) < len(self.child[0].data):
             update = True
@@ -189,15 +190,6 @@ class Order(ABC):
         """
         # Update order
         self.update()
-        # Init variable
-        list_buy: list = []  # list of buy action
-        list_sell: list = []  # list of sell action
-        list_fees_buy: list = []
-        list_fees_sell: list = []
-        money: float = imoney
-        balance_action: float = 0  # action in balance
-        action: int = 1  # buy: 1, sell: -1
-        counter: int = 0  # last position in array
         if "market" in self.parents:
             market = self.parents["market"]
         else:
@@ -210,6 +202,67 @@ class Order(ABC):
         ndays = market_duration.total_seconds() / 3600 / 24
 
         # simulate
+        if VECTORIZED:
+            money, win, loose = self._simulate(imoney, fees, cost_no_action, verbose)
+        else:
+            money, win, loose = self._simulate_loop(
+                imoney, fees, cost_no_action, verbose
+            )
+        if win + loose > min_order_per_day * ndays:
+            return money, win, loose
+        else:
+            penalty = (win + loose) - (min_order_per_day * ndays)
+            return money + penalty, win, loose
+
+    def _simulate(
+        self, imoney: float, fees: float, cost_no_action: float, verbose=1
+    ) -> tuple:
+        """
+        Vectorized simulation of trading, see simulate_trading
+
+        Returns
+        -------
+        tuple: money win, number of win, number of loose
+        """
+        market = self.parents["market"]
+        ask = np.asarray(market.ask.data.values, dtype=float)
+        bid = np.asarray(market.bid.data.values, dtype=float)
+        money, win, loose = simulate_orders(
+            self.data.values, ask, bid, imoney, fees, cost_no_action
+        )
+        if verbose == 1:
+            index = market.ask.data.index
+            buy, sell = trade_positions(self.data.values)
+            if imoney < 0:
+                buy, sell = buy[:0], sell[:0]  # no money to buy
+            _, shares = simulate_trades(ask, bid, buy, sell, imoney, fees)
+            for i, amount in enumerate(shares):
+                print(f"{index[buy[i]]} : BUY : {amount} @ {ask[buy[i]]}")
+                if i < len(sell):
+                    print(f"{index[sell[i]]} : SELL : {amount} @ {bid[sell[i]]}")
+        return float(money[0]), int(win[0]), int(loose[0])
+
+    def _simulate_loop(
+        self, imoney: float, fees: float, cost_no_action: float, verbose=1
+    ) -> tuple:
+        """
+        Simulation of trading, one action after the other, see simulate_trading
+
+        Returns
+        -------
+        tuple: money win, number of win, number of loose
+        """
+        # Init variable
+        market = self.parents["market"]
+        list_buy: list = []  # list of buy action
+        list_sell: list = []  # list of sell action
+        list_fees_buy: list = []
+        list_fees_sell: list = []
+        money: float = imoney
+        balance_action: float = 0  # action in balance
+        action: int = 1  # buy: 1, sell: -1
+        counter: int = 0  # last position in array
+
         while True:
             i = np.where(self.data == action)[0]  # array of index where action
             i = i[np.where(i > counter)[0]]  # first item upper than last action
@@ -266,11 +319,7 @@ class Order(ABC):
         else:
             win, loose = 0, 0
             money -= cost_no_action
-        if win + loose > min_order_per_day * ndays:
-            return money, win, loose
-        else:
-            penalty = (win + loose) - (min_order_per_day * ndays)
-            return money + penalty, win, loose
+        return money, win, loose
 
 
 class Action(ABC):
@@ -375,24 +424,41 @@ class ConditionCrossUp(Condition):
         return cross_up(self.parent.data, self.value)
 
 
-class ConditionCrossUp5(Condition):
-    """Condition Class with cross up last ten function"""
+class ConditionCrossUpN(Condition):
+    """Condition Class with cross up in last n steps function"""
+
+    name = "cross_up_last_n"
+    type = "+=N"
+
+    def __init__(self, parent: PropertiesABC, value: float, n: int = 5):
+        """Initialisation method"""
+        super().__init__(parent, value)
+        self.n = n
+
+    def _function(self) -> pd.Series:
+        return cross_up_last_n(self.parent.data, self.value, n=self.n)
+
+
+class ConditionCrossUp5(ConditionCrossUpN):
+    """Condition Class with cross up last five function"""
 
     name = "cross_up_last_five"
     type = "+=5"
 
-    def _function(self) -> pd.Series:
-        return cross_up_last_n(self.parent.data, self.value, n=5)
+    def __init__(self, parent: PropertiesABC, value: float):
+        """Initialisation method"""
+        super().__init__(parent, value, n=5)
 
 
-class ConditionCrossUp10(Condition):
+class ConditionCrossUp10(ConditionCrossUpN):
     """Condition Class with cross up last ten function"""
 
     name = "cross_up_last_ten"
     type = "+=10"
 
-    def _function(self) -> pd.Series:
-        return cross_up_last_n(self.parent.data, self.value, n=10)
+    def __init__(self, parent: PropertiesABC, value: float):
+        """Initialisation method"""
+        super().__init__(parent, value, n=10)
 
 
 class ConditionCrossDown(Condition):
@@ -405,24 +471,41 @@ class ConditionCrossDown(Condition):
         return cross_down(self.parent.data, self.value)
 
 
-class ConditionCrossDown5(Condition):
+class ConditionCrossDownN(Condition):
+    """Condition Class with cross down in last n steps function"""
+
+    name = "cross_down_last_n"
+    type = "-=N"
+
+    def __init__(self, parent: PropertiesABC, value: float, n: int = 5):
+        """Initialisation method"""
+        super().__init__(parent, value)
+        self.n = n
+
+    def _function(self) -> pd.Series:
+        return cross_down_last_n(self.parent.data, self.value, n=self.n)
+
+
+class ConditionCrossDown5(ConditionCrossDownN):
     """Condition Class with cross down last 5 steps function"""
 
     name = "cross_down_last_five"
     type = "-=5"
 
-    def _function(self) -> pd.Series:
-        return cross_down_last_n(self.parent.data, self.value, n=5)
+    def __init__(self, parent: PropertiesABC, value: float):
+        """Initialisation method"""
+        super().__init__(parent, value, n=5)
 
 
-class ConditionCrossDown10(Condition):
+class ConditionCrossDown10(ConditionCrossDownN):
     """Condition Class with cross down last 10 steps function"""
 
     name = "cross_down_last_ten"
     type = "-=10"
 
-    def _function(self) -> pd.Series:
-        return cross_down_last_n(self.parent.data, self.value, n=10)
+    def __init__(self, parent: PropertiesABC, value: float):
+        """Initialisation method"""
+        super().__init__(parent, value, n=10)
 
 
 def greater_than(data: pd.Series, value: float) -> pd.Series:
@@ -501,18 +584,13 @@ def cross_up_last_n(data: pd.Series, value: float, n: int = 5) -> pd.Series:
     Series of bool
     """
     cross_up_data = cross_up(data, value)
-    index = list(data.index)
-    idx_cross_up = list(cross_up_data[cross_up_data == True].index)
-    i_cross_up = [index.index(i) for i in idx_cross_up]
-    idx_new = [
-        index[i]
-        for j in i_cross_up
-        for i in range(j, j + n + 1)
-        if i < len(cross_up_data)
-    ]
-    cross_up_data[cross_up_data.index.isin(idx_new)] = True
-    # cross_up_data.iloc[idx_new] = True
-    return cross_up_data
+    if len(data) <= 1:
+        return cross_up_data
+    return pd.Series(
+        data=last_n(cross_up_data.to_numpy(dtype=bool), n),
+        index=cross_up_data.index,
+        name=cross_up_data.name,
+    )
 
 
 def cross_down(data: pd.Series, value: float) -> pd.Series:
@@ -555,18 +633,34 @@ def cross_down_last_n(data: pd.Series, value: float, n: int = 5) -> pd.Series:
     Series of bool
     """
     cross_down_data = cross_down(data, value)
-    index = list(data.index)
-    idx_cross_down = list(cross_down_data[cross_down_data == True].index)
-    i_cross_down = [index.index(i) for i in idx_cross_down]
-    idx_new = [
-        index[i]
-        for j in i_cross_down
-        for i in range(j, j + n + 1)
-        if i < len(cross_down_data)
-    ]
-    # cross_down_data.iloc[idx_new] = True
-    cross_down_data[cross_down_data.index.isin(idx_new)] = True
-    return cross_down_data
+    if len(data) <= 1:
+        return cross_down_data
+    return pd.Series(
+        data=last_n(cross_down_data.to_numpy(dtype=bool), n),
+        index=cross_down_data.index,
+        name=cross_down_data.name,
+    )
+
+
+def last_n(mask: np.ndarray, n: int) -> np.ndarray:
+    """
+    function to check if a mask is true in the current or previous n steps
+    (rolling OR over a window of n + 1 rows)
+
+    Parameters
+    ----------
+    mask: np.ndarray
+        array of bool
+    n: int
+        number of previous steps to check
+
+    Returns
+    -------
+    np.ndarray of bool
+    """
+    count = np.cumsum(mask, dtype=np.int64)
+    count[n + 1 :] -= count[: -n - 1]
+    return count > 0
 
 
 def generate_condition_from_dict(cond_dict: dict, market=None) -> [None, Condition]:
@@ -577,7 +671,7 @@ def generate_condition_from_dict(cond_dict: dict, market=None) -> [None, Conditi
     Parameters
     ----------
     cond_dict: dict
-        dict keys: function (<,>,-=,+=), value (float) and property (str of the property name)
+        dict keys: function (<,>,-=,+=,-=N,+=N), value (float) and property (str of the property name)
     market: Market object
 
     Returns
@@ -629,6 +723,18 @@ def generate_condition_from_dict(cond_dict: dict, market=None) -> [None, Conditi
                 generate_property_by_name(cond_dict["property"], market=market),
                 cond_dict["value"],
             )
+        elif re.fullmatch(r"\+=\d+", cond_dict["function"]):
+            return ConditionCrossUpN(
+                generate_property_by_name(cond_dict["property"], market=market),
+                cond_dict["value"],
+                n=int(cond_dict["function"][2:]),
+            )
+        elif re.fullmatch(r"-=\d+", cond_dict["function"]):
+            return ConditionCrossDownN(
+                generate_property_by_name(cond_dict["property"], market=market),
+                cond_dict["value"],
+                n=int(cond_dict["function"][2:]),
+            )
         else:
             logging.warning(f"Unknown function: {cond_dict['function']}")
             return None
@@ -680,3 +786,223 @@ def generate_action_from_dict(action_dict: dict, market) -> [Action, None]:
             "Invalid dictionary keys to generate action: should contain type and condition keys"
         )
         return None
+
+
+def trade_positions(
+    order: np.ndarray, action: int = 1, first: int = 1
+) -> (np.ndarray, np.ndarray):
+    """
+    Function to get positions of trades from an array of actions.
+    Trades alternate, starting by a buy: the first buy (1) after the first row,
+    then the first sell (-1) after this buy, and so on.
+
+    Parameters
+    ----------
+    order: np.ndarray
+        actions: 1 to buy, -1 to sell, 0 to do nothing
+    action: int
+        first trade: 1 to start by a buy, -1 to start by a sell
+    first: int
+        position of the first row where a trade is possible
+
+    Returns
+    -------
+    np.ndarray: positions of buys
+    np.ndarray: positions of sells, same size or one less than buys
+        (or one more if action is -1)
+    """
+    order = np.asarray(order)
+    position = np.flatnonzero(order[first:]) + first
+    value = order[position]
+    # a trade is the first action of each run of identical actions
+    runs = np.ones(len(value), dtype=bool)
+    runs[1:] = value[1:] != value[:-1]
+    position, value = position[runs], value[runs]
+    if len(value) > 0 and value[0] != action:
+        position = position[1:]  # first trade is action
+    if action == 1:
+        return position[0::2], position[1::2]
+    return position[1::2], position[0::2]
+
+
+def simulate_trades(
+    ask: np.ndarray,
+    bid: np.ndarray,
+    buy: np.ndarray,
+    sell: np.ndarray,
+    imoney: float = 100,
+    fees: float = 0.1,
+) -> (float, np.ndarray):
+    """
+    Function to simulate trades: all money is used at each buy (at ask value)
+    and all shares are sold at each sell (at bid value).
+    If the last buy is not sold, it is cancelled.
+
+    Parameters
+    ----------
+    ask: np.ndarray
+        ask values
+    bid: np.ndarray
+        bid values
+    buy: np.ndarray
+        positions of buys, see trade_positions
+    sell: np.ndarray
+        positions of sells
+    imoney: float
+        initial money
+    fees: float
+        trading fees in percent
+
+    Returns
+    -------
+    float: final money
+    np.ndarray: shares bought at each buy
+    """
+    nsell = len(sell)
+    fee = fees / 100
+    # money is multiplied by this ratio for each buy then sell
+    ratio = (1 - fee) * bid[sell] / ask[buy[:nsell]] * (1 - fee)
+    money = imoney * np.concatenate([[1.0], np.cumprod(ratio)])
+    shares = money[: len(buy)] / ask[buy] - money[: len(buy)] * fee / ask[buy]
+    return float(money[nsell]), shares
+
+
+def simulate_orders(
+    orders: np.ndarray,
+    ask: np.ndarray,
+    bid: np.ndarray,
+    imoney: float = 100,
+    fees: float = 0.1,
+    cost_no_action: float = 100,
+) -> (np.ndarray, np.ndarray, np.ndarray):
+    """
+    Function to simulate trading for several arrays of actions on the same market
+
+    Parameters
+    ----------
+    orders: np.ndarray
+        actions (1 to buy, -1 to sell, 0 to do nothing), one simulation by row.
+        A 1D array is one simulation
+    ask: np.ndarray
+        ask values
+    bid: np.ndarray
+        bid values
+    imoney: float
+        initial money
+    fees: float
+        trading fees in percent
+    cost_no_action: float
+        cost if no trade
+
+    Returns
+    -------
+    np.ndarray: money of each simulation
+    np.ndarray: number of win of each simulation
+    np.ndarray: number of loose of each simulation
+    """
+    orders = np.atleast_2d(orders)
+    money = np.zeros(orders.shape[0])
+    win = np.zeros(orders.shape[0], dtype=int)
+    loose = np.zeros(orders.shape[0], dtype=int)
+    for i, order in enumerate(orders):
+        buy, sell = trade_positions(order)
+        if imoney < 0:
+            buy, sell = buy[:0], sell[:0]  # no money to buy
+        money[i], shares = simulate_trades(ask, bid, buy, sell, imoney, fees)
+        if len(sell) > 0:
+            cost = shares[: len(sell)] * ask[buy[: len(sell)]]
+            gain = shares[: len(sell)] * bid[sell]
+            win[i] = np.count_nonzero(gain > cost)
+            loose[i] = np.count_nonzero(gain < cost)
+        else:
+            money[i] -= cost_no_action
+    return money, win, loose
+
+
+class TradingSimulation:
+    """
+    Simulation of trading fed chunk by chunk, with the same results than
+    Order.simulate_trading on all chunks together
+    """
+
+    def __init__(self, imoney: float = 100, fees: float = 0.1):
+        """
+        Parameters
+        ----------
+        imoney: float
+            initial money
+        fees: float
+            trading fees in percent
+        """
+        self.imoney = imoney
+        self.fees = fees
+        self.money = imoney  # money when nothing is bought
+        self.action = 1  # next trade: 1 to buy, -1 to sell
+        self.shares = 0.0  # shares of the last buy, if not sold
+        self.price = 0.0  # ask value of the last buy, if not sold
+        self.nrows = 0
+        self.trades = 0  # number of buys sold
+        self.win = 0
+        self.loose = 0
+
+    def feed(self, order: np.ndarray, ask: np.ndarray, bid: np.ndarray):
+        """
+        Method to simulate the trading on the next rows
+
+        Parameters
+        ----------
+        order: np.ndarray
+            actions: 1 to buy, -1 to sell, 0 to do nothing
+        ask: np.ndarray
+            ask values
+        bid: np.ndarray
+            bid values
+        """
+        first = 1 if self.nrows == 0 else 0  # no trade at the first row
+        self.nrows += len(order)
+        if self.imoney < 0:
+            return  # no money to buy
+        buy, sell = trade_positions(order, action=self.action, first=first)
+        if self.action == -1 and len(sell) > 0:
+            # sell shares bought in a previous chunk
+            fee = self.fees / 100
+            ratio = (1 - fee) * bid[sell[0]] / self.price * (1 - fee)
+            self._count(self.shares * bid[sell[0]], self.shares * self.price)
+            self.money *= ratio
+            self.action = 1
+            sell = sell[1:]
+        if self.action == -1 or len(buy) == 0:
+            return
+        money, shares = simulate_trades(ask, bid, buy, sell, self.money, self.fees)
+        self._count(
+            shares[: len(sell)] * bid[sell], shares[: len(sell)] * ask[buy[: len(sell)]]
+        )
+        self.money = money
+        if len(buy) > len(sell):  # last buy not sold
+            self.shares = shares[-1]
+            self.price = ask[buy[-1]]
+            self.action = -1
+
+    def _count(self, gain, cost):
+        """Method to count trades, win and loose trades"""
+        self.trades += np.size(gain)
+        self.win += int(np.count_nonzero(gain > cost))
+        self.loose += int(np.count_nonzero(gain < cost))
+
+    def result(self, cost_no_action: float = 100) -> tuple:
+        """
+        Method to get the result of the simulation, the last buy is cancelled if not sold
+
+        Parameters
+        ----------
+        cost_no_action: float
+            cost if no trade
+
+        Returns
+        -------
+        tuple: money, number of win, number of loose
+        """
+        money = self.money
+        if self.trades == 0:
+            money -= cost_no_action
+        return money, self.win, self.loose
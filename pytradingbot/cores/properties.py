@@ -8,12 +8,14 @@ Module containing all properties
 import logging
 from typing import Dict, Any
 from abc import ABC
+import numpy as np
 import pandas as pd
 
 # =================
 # Internal IMPORTS
 # =================
 from pytradingbot.properties_functions import functions
+from pytradingbot.utils.ring_buffer import RingBuffer
 
 # =================
 # Variables
@@ -26,6 +28,7 @@ class PropertiesABC(ABC):
     """
 
     type = ""
+    incremental = False  # new rows only depend on the last window rows of parents
 
     def __init__(
         self, parent=None, market=None, param: [Dict[str, Any], object] = None
@@ -33,6 +36,7 @@ class PropertiesABC(ABC):
 
         self.child = []
         self.data = pd.Series(dtype=float)
+        self.recomputed = False  # all rows calculated at the last update
 
         self.parents: Dict[str, object] = {}
         if isinstance(parent, dict):
@@ -58,26 +62,136 @@ class PropertiesABC(ABC):
         """Method when call is called"""
         return self.data
 
-    def _function(self) -> pd.Series:
+    def _function(self, nrows: int = None) -> pd.Series:
         """function attach to the properties"""
         return self.data
 
-    def update(self):
+    @property
+    def window(self) -> int:
+        """number of rows of parents needed to calculate one row"""
+        return self.param.get("k", 1)
+
+    @property
+    def size(self) -> int:
+        """number of rows of data"""
+        return len(self.data)
+
+    @property
+    def index(self) -> pd.Index:
+        """times of data"""
+        return self.data.index
+
+    @property
+    def dtype(self):
+        """type of the values of data"""
+        return self.data.dtype
+
+    @property
+    def last(self):
+        """value of the last row of data"""
+        return self.data.iloc[-1]
+
+    def _parent_data(self, name: str, nrows: int = None) -> pd.Series:
+        """
+        Method to get data of a parent
+
+        Parameters
+        ----------
+        name: str
+            key of parent in the dict
+        nrows: int
+            number of last rows to return, all rows if None
+
+        Returns
+        -------
+        pd.Series
+        """
+        data = self.parents[name].data
+        if nrows is None:
+            return data
+        return data.iloc[-nrows:]
+
+    def _count_new_rows(self) -> [int, None]:
+        """
+        Method to count rows appended to parents since the last update
+
+        Returns
+        -------
+        int: number of new rows, None if parents are not an extension of data
+            or if a parent was calculated again (ex: after a clean of the market)
+        """
+        parents = [value for key, value in self.parents.items() if key != "market"]
+        if len(parents) == 0 or len(self.data) < self.window:
+            return None
+        if self.data.dtype == object:  # only None values, parents were too short
+            return None
+        for parent in parents:
+            if parent.recomputed or parent.dtype == object:
+                return None
+        index = parents[0].index
+        position = index.searchsorted(self.data.index[-1], side="right")
+        if position == 0 or index[position - 1] != self.data.index[-1]:
+            return None
+        nrows = len(index) - position
+        if nrows + self.window - 1 > len(index):
+            return None
+        return nrows
+
+    def _update_data(self):
+        """
+        Method to set data from parents values.
+        If the property is incremental, only new rows of parents are calculated,
+        otherwise (or if parents are not an extension of data) all rows are.
+        """
+        nrows = self._count_new_rows() if self.incremental else None
+        self.recomputed = nrows is None
+        if nrows is None:
+            self.data = self._function()
+        elif nrows > 0:
+            odata = self._function(nrows=nrows + self.window - 1).iloc[-nrows:]
+            self.data = pd.concat([self.data, odata], axis=0)
+        self.data = self.data.rename(self.name)
+        if "market" in self.parents:
+            self.parents["market"].store(self)
+
+    def update(self, parents: bool = True):
         """
         Update values of the properties in function of parent values
+
+        Parameters
+        ----------
+        parents: bool
+            update parents before, not needed if they are already updated
         """
         # Update parents and check if update is needed
         update = False
         for key, value in self.parents.items():
             if key != "market":
-                value.update()
-                if len(value.data) > len(self.data):
+                if parents:
+                    value.update()
+                if self._is_outdated(value):
                     update = True
 
         # update data
         if update:
-            self.data = self._function()
-            self.data = self.data.rename(self.name)
+            self._update_data()
+
+    def _is_outdated(self, parent) -> bool:
+        """
+        Method to check if a parent has rows not calculated in data
+
+        Parameters
+        ----------
+        parent: parent object
+
+        Returns
+        -------
+        Bool
+        """
+        if parent.size > self.size:
+            return True
+        # parents stored in a ring buffer could be shorter than data
+        return parent.size > 0 and parent.index[-1] != self.index[-1]
 
     def add_parent(self, name: str, obj):
         """
@@ -102,6 +216,8 @@ class PropertiesABC(ABC):
         """
         if obj not in self.child:
             self.child.append(obj)
+            if "market" in self.parents:
+                self.parents["market"].reset_graph()
 
     def clean(self, nrows: int = 0):
         """
@@ -119,6 +235,8 @@ class PropertiesABC(ABC):
         for parents in self.parents.values():
             if self in parents.child:
                 parents.child.remove(self)
+        if "market" in self.parents:
+            self.parents["market"].reset_graph()
         for child in self.child:
             child.delete_link()
             del child
@@ -131,17 +249,47 @@ class Ask(PropertiesABC):
 
     type = "market"
 
-    def __init__(self, market=None):
+    def __init__(self, market=None, capacity: int = None):
         """
         Parameters
         ----------
         market: parent Market object
+        capacity: int
+            maximum number of rows stored in a ring buffer.
+            If None, values are stored in a pd.Series without limit
         """
+        self.buffer = RingBuffer(capacity) if capacity is not None else None
+        self._series = None  # copy of the buffer, built again after a row is written
         super().__init__(market=market)
         self.add_parent("market", market)
         self.name = "ask"
         self.data = self.data.rename(self.name)
 
+    @property
+    def data(self) -> pd.Series:
+        """
+        values of the market, a copy of the buffer if there is one (copied once
+        after rows are written, see size, index and last to read without a copy)
+        """
+        if self.buffer is None:
+            return self._data
+        if self._series is None:
+            self._series = self.buffer.series(name=self.name)
+        return self._series
+
+    @data.setter
+    def data(self, value: pd.Series):
+        if self.buffer is None:
+            self._data = value
+        else:
+            self._series = None
+            self.buffer.clear()
+            if len(value) > 0:
+                self.buffer.extend(
+                    pd.DatetimeIndex(value.index).asi8.copy(),
+                    np.array(value.values, dtype=float),
+                )
+
     def add_value(self, index: list = None, value: list = None):
         """
         Add value to the pd.Series
@@ -152,8 +300,67 @@ class Ask(PropertiesABC):
         value: list
             list of float for pd.Series values
         """
-        row = pd.Series(index=index, data=value, name=self.name)
-        self.data = pd.concat([self.data, row], axis=0)
+        if self.buffer is None:
+            row = pd.Series(index=index, data=value, name=self.name)
+            self.data = pd.concat([self.data, row], axis=0)
+        else:
+            self._series = None
+            self.buffer.extend(pd.DatetimeIndex(index).asi8, value)
+
+    @property
+    def size(self) -> int:
+        """number of rows, without a copy of the buffer"""
+        if self.buffer is None:
+            return len(self._data)
+        return len(self.buffer)
+
+    @property
+    def index(self) -> pd.Index:
+        """times of the rows: a view on the buffer, valid until the next row"""
+        if self.buffer is None:
+            return self._data.index
+        return pd.DatetimeIndex(self.buffer.times.view("datetime64[ns]"), copy=False)
+
+    @property
+    def dtype(self):
+        """type of the values, float in a buffer"""
+        if self.buffer is None:
+            return self._data.dtype
+        return self.buffer.values.dtype
+
+    @property
+    def last(self):
+        """value of the last row, without a copy of the buffer"""
+        if self.buffer is None:
+            return self._data.iloc[-1]
+        return self.buffer.values[-1]
+
+    def set_capacity(self, capacity: int):
+        """
+        Method to change the maximum number of rows of the buffer
+
+        Parameters
+        ----------
+        capacity: int
+            maximum number of rows
+        """
+        if self.buffer is not None and self.buffer.capacity != capacity:
+            self._series = None
+            self.buffer.resize(capacity)
+
+    def clean(self, nrows: int = 0):
+        """
+        Method to clean data
+        Parameters
+        ----------
+        nrows: int
+            maximum number of rows in the pd.Series
+        """
+        if self.buffer is None:
+            super().clean(nrows=nrows)
+        else:
+            self._series = None
+            self.buffer.keep(nrows + 1)
 
 
 class Bid(Ask):
@@ -161,14 +368,16 @@ class Bid(Ask):
     Bid value of the market
     """
 
-    def __init__(self, market=None):
+    def __init__(self, market=None, capacity: int = None):
         """
 
         Parameters
         ----------
         market: market object
+        capacity: int
+            maximum number of rows stored in a ring buffer
         """
-        super().__init__(market=market)
+        super().__init__(market=market, capacity=capacity)
         self.name = "bid"
         self.data = self.data.rename(self.name)
 
@@ -178,13 +387,15 @@ class Volume(Ask):
     volume value of the market
     """
 
-    def __init__(self, market=None):
+    def __init__(self, market=None, capacity: int = None):
         """
         Parameters
         ----------
         market: parent object
+        capacity: int
+            maximum number of rows stored in a ring buffer
         """
-        super().__init__(market=market)
+        super().__init__(market=market, capacity=capacity)
         self.name = "volume"
         self.data = self.data.rename(self.name)
 
@@ -225,6 +436,7 @@ class Derivative(PropertiesABC):
     """
 
     type = "deriv"
+    incremental = True
 
     def __init__(self, market=None, parent: [dict, PropertiesABC] = None):
         super().__init__(market=market, parent=parent)
@@ -232,9 +444,14 @@ class Derivative(PropertiesABC):
             self.name = f"{self.type}_{self.parents['data'].name}"
         self.data = self.data.rename(self.name)
 
-    def _function(self) -> pd.Series:
+    @property
+    def window(self) -> int:
+        """the previous row is needed for the difference"""
+        return 2
+
+    def _function(self, nrows: int = None) -> pd.Series:
         """Derivative function"""
-        return functions.derivative(self.parents["data"].data)
+        return functions.derivative(self._parent_data("data", nrows))
 
 
 class MovingAverage(PropertiesABC):
@@ -243,6 +460,7 @@ class MovingAverage(PropertiesABC):
     """
 
     type = "MA"
+    incremental = True
 
     def __init__(
         self,
@@ -262,9 +480,11 @@ class MovingAverage(PropertiesABC):
             if "data" in self.parents.keys():
                 self.name = f"{self.type}_k-{param['k']}_{self.parents['data'].name}"
 
-    def _function(self) -> pd.Series:
+    def _function(self, nrows: int = None) -> pd.Series:
         """Mooving average function"""
-        return functions.moving_average(self.parents["data"].data, k=self.param["k"])
+        return functions.moving_average(
+            self._parent_data("data", nrows), k=self.param["k"]
+        )
 
 
 class ExponentialMovingAverage(PropertiesABC):
@@ -273,6 +493,7 @@ class ExponentialMovingAverage(PropertiesABC):
     """
 
     type = "EMA"
+    incremental = True
 
     def __init__(
         self,
@@ -292,10 +513,10 @@ class ExponentialMovingAverage(PropertiesABC):
             if "data" in self.parents.keys():
                 self.name = f"{self.type}_k-{param['k']}_{self.parents['data'].name}"
 
-    def _function(self) -> pd.Series:
+    def _function(self, nrows: int = None) -> pd.Series:
         """Exponential moving avergae"""
         return functions.exponential_moving_average(
-            self.parents["data"].data, k=self.param["k"]
+            self._parent_data("data", nrows), k=self.param["k"]
         )
 
 
@@ -305,6 +526,7 @@ class StandardDeviation(PropertiesABC):
     """
 
     type = "std"
+    incremental = True
 
     def __init__(
         self,
@@ -324,10 +546,10 @@ class StandardDeviation(PropertiesABC):
             if "data" in self.parents.keys():
                 self.name = f"{self.type}_k-{param['k']}_{self.parents['data'].name}"
 
-    def _function(self) -> pd.Series:
+    def _function(self, nrows: int = None) -> pd.Series:
         """Standard deviation function"""
         return functions.standard_deviation(
-            self.parents["data"].data, k=self.param["k"]
+            self._parent_data("data", nrows), k=self.param["k"]
         )
 
 
@@ -337,6 +559,7 @@ class Variation(PropertiesABC):
     """
 
     type = "variation"
+    incremental = True
 
     def __init__(
         self,
@@ -356,9 +579,9 @@ class Variation(PropertiesABC):
             if "data" in self.parents.keys():
                 self.name = f"{self.type}_k-{param['k']}_{self.parents['data'].name}"
 
-    def _function(self) -> pd.Series:
+    def _function(self, nrows: int = None) -> pd.Series:
         """Variation function"""
-        return functions.variation(self.parents["data"].data, k=self.param["k"])
+        return functions.variation(self._parent_data("data", nrows), k=self.param["k"])
 
 
 class RSI(PropertiesABC):
@@ -367,6 +590,7 @@ class RSI(PropertiesABC):
     """
 
     type = "rsi"
+    incremental = True
 
     def __init__(
         self,
@@ -386,9 +610,9 @@ class RSI(PropertiesABC):
                 self.name = f"{self.type}_k-{param['k']}_{self.parents['data'].name}"
         self.data = self.data.rename(self.name)
 
-    def _function(self) -> pd.Series:
+    def _function(self, nrows: int = None) -> pd.Series:
         """RSI function"""
-        return functions.rsi(self.parents["data"].data, k=self.param["k"])
+        return functions.rsi(self._parent_data("data", nrows), k=self.param["k"])
 
 
 class MACD(PropertiesABC):
@@ -397,6 +621,7 @@ class MACD(PropertiesABC):
     """
 
     type = "macd"
+    incremental = True
 
     def __init__(
         self, market=None, parent: [dict, PropertiesABC] = None, param: dict = None
@@ -412,31 +637,32 @@ class MACD(PropertiesABC):
             logging.warning(f"k is not defined in parameters: {param}")
         self.data = self.data.rename(self.name)
 
-    def _function(self) -> pd.Series:
+    def _function(self, nrows: int = None) -> pd.Series:
         """MACD function"""
         return functions.macd(
-            self.parents["short"].data, self.parents["long"].data, k=self.param["k"]
+            self._parent_data("short", nrows),
+            self._parent_data("long", nrows),
+            k=self.param["k"],
         )
 
-    def update(self):
-        """Update function for MACD"""
+    def update(self, parents: bool = True):
+        """Update function for MACD, parents are not updated"""
         update = False
         if len(self.parents) > 0:
             if (
                 "short" in self.parents
                 and "long" in self.parents
-                and len(self.parents["short"].data) > len(self.data)
+                and self._is_outdated(self.parents["short"])
             ):
                 update = True
-            elif "market" in self.parents and len(
-                self.parents["market"].ask.data
-            ) > len(self.data):
+            elif "market" in self.parents and self._is_outdated(
+                self.parents["market"].ask
+            ):
                 update = True
 
         # update data
         if update:
-            self.data = self._function()
-            self.data = self.data.rename(self.name)
+            self._update_data()
 
 
 class Bollinger(PropertiesABC):
@@ -445,6 +671,7 @@ class Bollinger(PropertiesABC):
     """
 
     type = "bollinger"
+    incremental = True
 
     def __init__(
         self, market=None, parent: [dict, PropertiesABC] = None, param: dict = None
@@ -467,12 +694,17 @@ class Bollinger(PropertiesABC):
             self.name = self.type
         self.data = self.data.rename(self.name)
 
-    def _function(self) -> pd.Series:
+    @property
+    def window(self) -> int:
+        """k is not a window size for Bollinger: each row is independent"""
+        return 1
+
+    def _function(self, nrows: int = None) -> pd.Series:
         """Bollinger function"""
         return functions.bollinger(
-            self.parents["data"].data,
-            self.parents["mean"].data,
-            self.parents["std"].data,
+            self._parent_data("data", nrows),
+            self._parent_data("mean", nrows),
+            self._parent_data("std", nrows),
             self.param["k"],
         )
 
@@ -20,7 +20,10 @@ from lxml import etree
 from pytradingbot.cores import markets
 from pytradingbot.utils.market_tools import market_from_file
 from pytradingbot.utils import math
-
+from pytradingbot.iolib.retry import RETRY_EXCEPTIONS, CircuitOpenError
+from pytradingbot.utils.journal import TickJournal
+from pytradingbot.utils import scheduler
+from pytradingbot.utils.cache import TTLCache
 
 # =================
 # Variables
@@ -44,6 +47,19 @@ class ApiABC(ABC):
         self.session = None
         self.odir = None
         self.oformat = "pandas"
+        self.save_chunk = 1000  # rows by file of the numpy format
+        self.journal_path = None  # journal of ticks, see Market.compact
+        self.journal_fsync = 1
+        self.journal_compact = 100  # number of iterations between compactions
+        self.overrun = "skip"  # policy of the scheduler, see TickScheduler
+        self.scheduler = None
+        self.clock = time.monotonic  # clock and sleep of the scheduler
+        self.sleep = time.sleep
+        self.pairs = []  # all traded pairs, see AsyncEngine
+        self.symbols = {}  # symbol of each pair
+        self.cache = TTLCache()  # balance and open orders, see BaseApi.new_tick
+        self.npairs = 1  # pairs sharing the money, see calculate_quantity_buy
+        self._tick_money = None  # money of a pair in the current tick
 
     @abstractmethod
     def _set_id(self, user: str):
@@ -61,7 +77,7 @@ class ApiABC(ABC):
         pass
 
     @abstractmethod
-    def get_market(self):
+    def get_market(self, pair: str = None):
         """get market value"""
         pass
 
@@ -165,21 +181,55 @@ class BaseApi(ApiABC):
         self.oformat = "pandas"
         for node in main.xpath("/pytradingbot/market/odir"):
             self.odir = node.text
-            if "format" in node.attrib and node.attrib["format"] in ["pandas"]:
+            if "format" in node.attrib and node.attrib["format"] in markets.OFORMATS:
                 self.oformat = node.attrib["format"]
             else:
                 logging.warning(
-                    f"{node.attrib['format']} is not a good value: "
+                    f"{node.attrib.get('format')} is not a good value: "
                     f"set by default to pandas"
                 )
                 self.oformat = "pandas"
+            if "chunk" in node.attrib:
+                try:
+                    self.save_chunk = int(node.attrib["chunk"])
+                except ValueError:
+                    logging.warning(
+                        f"chunk of odir {node.attrib['chunk']} is not an integer. "
+                        f"Set to default value {self.save_chunk}"
+                    )
+        # Journal of ticks
+        self.journal_path = None
+        for node in main.xpath("/pytradingbot/market/journal"):
+            self.journal_path = node.text
+            for key in ["fsync", "compact"]:
+                if key in node.attrib:
+                    try:
+                        setattr(self, f"journal_{key}", int(node.attrib[key]))
+                    except ValueError:
+                        logging.warning(
+                            f"{key} of journal {node.attrib[key]} is not an integer. "
+                            f"Set to default value {getattr(self, f'journal_{key}')}"
+                        )
+        if (
+            self.oformat == "numpy"
+            and self.journal_path is None
+            and self.save_chunk > 1
+        ):
+            logging.warning(
+                f"numpy format without journal: up to {self.save_chunk} rows are kept "
+                f"in memory and lost if the bot is killed, add a journal or set chunk to 1"
+            )
         # Symbol
         for node in main.xpath("/pytradingbot/trading/symbol"):
             self.symbol = node.text
 
-        # Pair
+        # Pair(s), symbol of a pair can be defined by an attribute
+        self.pairs = []
+        self.symbols = {}
         for node in main.xpath("/pytradingbot/trading/pair"):
             self.pair = node.text
+            self.pairs.append(node.text)
+            self.symbols[node.text] = node.attrib.get("symbol", self.symbol)
 
         # Refresh time
         for node in main.xpath("/pytradingbot/trading/refresh"):
@@ -190,6 +240,24 @@ class BaseApi(ApiABC):
                     f"Refresh time read {node.text} is not a float. "
                     f"Set to default value {self.refresh}"
                 )
+            if "overrun" in node.attrib:
+                if node.attrib["overrun"] in scheduler.POLICIES:
+                    self.overrun = node.attrib["overrun"]
+                else:
+                    logging.warning(
+                        f"{node.attrib['overrun']} is not an overrun policy: "
+                        f"set by default to {self.overrun}"
+                    )
+
+        # Time to live of balance and open orders
+        for node in main.xpath("/pytradingbot/trading/cache"):
+            try:
+                self.cache.ttl = float(node.attrib.get("ttl", self.cache.ttl))
+            except ValueError:
+                logging.warning(
+                    f"ttl of cache {node.attrib['ttl']} is not a float. "
+                    f"Set to default value {self.cache.ttl}"
+                )
 
     def connect(self):
         """
@@ -197,6 +265,14 @@ class BaseApi(ApiABC):
         """
         pass
 
+    def new_tick(self):
+        """
+        method called at the start of each iteration: balance and open orders
+        are fetched again, at most once during the iteration
+        """
+        self.cache.invalidate()
+        self._tick_money = None
+
     def set_market(self, obj: markets.Market):
         """
         method to set a market as attribute
@@ -212,6 +288,62 @@ class BaseApi(ApiABC):
     def cancel_order_by_id(self, order_id: str):
         pass
 
+    def create_market(
+        self, pair: str = None, journal: TickJournal = None
+    ) -> markets.Market:
+        """
+        method to create a market of a pair with properties and order of the config
+
+        Parameters
+        ----------
+        pair: str
+            traded pair, self.pair if None
+        journal: TickJournal
+            journal of ticks of the market (see Market.compact)
+
+        Returns
+        -------
+        Market
+        """
+        pair = self.pair if pair is None else pair
+        market = markets.Market(
+            parent=self,
+            odir=f"{self.odir}/{pair}",
+            oformat=self.oformat,
+            journal=journal,
+        )
+        market.save_chunk = self.save_chunk
+        market.generate_property_from_xml_config(self.inputs_config_path)
+        market.generate_order_from_xml_config(self.inputs_config_path)
+        # ticks of a previous run which were not compacted
+        market.recover()
+        return market
+
+    def trade(self, market: markets.Market, pair: str = None):
+        """
+        method to send the order of the last row of a market
+
+        Parameters
+        ----------
+        market: Market
+            analysed market
+        pair: str
+            traded pair, self.pair if None
+        """
+        action = market.order.action
+        if action == 1:
+            price = market.ask.last
+            quantity = self.calculate_quantity_buy(price)
+            self.buy(quantity, price, pair=pair)
+        elif action == -1:
+            balance = self.balance
+            quantity = balance[self.symbols.get(pair, self.symbol)]
+            price = market.bid.last
+            self.sell(quantity, price, pair=pair)
+        else:
+            for o_id in self.open_orders(type="buy", pair=pair):
+                self.cancel_order_by_id(o_id)
+
     def run(self, times: int = np.inf):
         """
         method to run the analysis of market in real time
@@ -222,50 +354,65 @@ class BaseApi(ApiABC):
             number of iterations
         """
         # Init Market
-        self.set_market(
-            markets.Market(
-                parent=self, odir=f"{self.odir}/{self.pair}", oformat=self.oformat
-            )
-        )
-        self.market.generate_property_from_xml_config(self.inputs_config_path)
-        self.market.generate_order_from_xml_config(self.inputs_config_path)
+        journal = None
+        if self.journal_path is not None:
+            journal = TickJournal(self.journal_path, fsync=self.journal_fsync)
+        self.set_market(self.create_market(journal=journal))
 
-        # Init counter
+        # Init counter, ticks every refresh seconds
         count = 0
         tstart = datetime.now()
+        self.scheduler = scheduler.TickScheduler(
+            self.refresh, policy=self.overrun, clock=self.clock, sleep=self.sleep
+        )
         # start run
         while count < times:
             count += 1
+            self.scheduler.tick()
+            self.new_tick()
             init_time = datetime.now()
-            self.update_market()
-            self.analyse()
-            action = self.market.action
-            if action == 1:
-                price = self.market.ask.data.iloc[-1]
-                quantity = self.calculate_quantity_buy(price)
-                self.buy(quantity, price)
-            elif action == -1:
-                balance = self.balance
-                quantity = balance[self.symbol]
-                price = self.market.bid.data.iloc[-1]
-                self.sell(quantity, price)
-            else:
-                for o_id in self.open_orders(type='buy'):
-                    self.cancel_order_by_id(o_id)
-            self.market.save()
+            try:
+                self.update_market()
+                self.analyse()
+                self.trade(self.market)
+            except (CircuitOpenError, *RETRY_EXCEPTIONS) as error:
+                # api not available: next iteration
+                logging.warning(f"iteration {count} failed: {error!r}")
+            if journal is None:
+                self.market.save()
+            elif count % max(self.journal_compact, 1) == 0:
+                self.market.compact()
             self.market.clean()
             final_time = datetime.now()
             print(
                 f"count={count}: {final_time-init_time}s, (mean={(final_time-tstart)/count})",
                 end="\r",
             )
-            wait = self.refresh - (final_time - init_time).total_seconds()
-            if wait > 0:
-                time.sleep(self.refresh)
-
-    def get_market(self):
+            if count < times:
+                self.scheduler.wait()
+        logging.info(f"scheduler: {self.scheduler.metrics}")
+        self.market.flush()
+        if journal is not None:
+            self.market.compact()
+            journal.close()
+
+    def get_market(self, pair: str = None):
         pass
 
+    def get_markets(self, pairs: list) -> dict:
+        """
+        method to get market values of several pairs
+
+        Parameters
+        ----------
+        pairs: list
+
+        Returns
+        -------
+        dict: market values by pair
+        """
+        return {pair: self.get_market(pair) for pair in pairs}
+
     def _add_child(self):
         pass
 
@@ -283,16 +430,22 @@ class BaseApi(ApiABC):
         self.market.analyse()
 
     def calculate_quantity_buy(self, price: float):
-        """Method to calculate quantity to buy in function of a price"""
+        """
+        Method to calculate quantity to buy in function of a price.
+        The money at the first buy of a tick is split between npairs pairs,
+        so that buy orders of several pairs in one tick do not exceed the balance
+        """
         precision = 5
-        money = self.mymoney
+        if self._tick_money is None:
+            self._tick_money = self.mymoney / max(self.npairs, 1)
+        money = min(self._tick_money, self.mymoney)
         qtt = math.floor(money / price, precision=precision)
         return qtt
 
-    def buy(self, quantity, price):
+    def buy(self, quantity, price, pair: str = None):
         pass
 
-    def sell(self, quantity, price):
+    def sell(self, quantity, price, pair: str = None):
         pass
 
     def _get_balance(self):
@@ -300,7 +453,8 @@ class BaseApi(ApiABC):
 
     @property
     def balance(self) -> dict:
-        return self._get_balance()
+        """balance of the account, kept in cache (see TTLCache)"""
+        return dict(self.cache.get("balance", self._get_balance))
 
     @property
     def mymoney(self) -> float:
@@ -8,19 +8,32 @@ Module containing API for crypto trading
 import os
 import logging
 from datetime import datetime
-from time import sleep
-import requests.exceptions
-import krakenex
 import pandas as pd
+from lxml import etree
 
 # =================
 # Internal IMPORTS
 # =================
 from pytradingbot.iolib.base import BaseApi
+from pytradingbot.iolib.ratelimit import PrivateScheduler
+from pytradingbot.iolib.retry import RetryPolicy
+from pytradingbot.iolib.transport import KrakenTransport, TIMEOUTS
 
 # =================
 # Variables
 # =================
+RETRY_PARAMETERS = {
+    "base": float,
+    "factor": float,
+    "max_delay": float,
+    "max_elapsed": float,
+    "max_failures": int,
+    "reset_timeout": float,
+}  # parameters of RetryPolicy read in config
+RATELIMIT_PARAMETERS = {
+    "capacity": float,
+    "rate": float,
+}  # parameters of PrivateScheduler read in config
 
 
 class KrakenApi(BaseApi):
@@ -28,86 +41,210 @@ class KrakenApi(BaseApi):
     API for Kraken
     """
 
-    def __int__(self, input_path: str = ""):
+    def __init__(self, input_path: str = ""):
+        self.uri = None  # Kraken by default
+        self.pool_size = 10
+        self.timeouts = dict(TIMEOUTS)
+        self.retry = {}  # arguments of the retry policy, see RetryPolicy
+        self.ratelimit = {}  # arguments of the private scheduler, see PrivateScheduler
+        self.unknown_pairs = set()  # pairs rejected by Ticker, not in batch queries
         super().__init__(input_path=input_path)
 
+    def set_config(self, path: str):
+        """
+        method to read input config file and to set attributes,
+        with the connection section: uri, pool size, timeouts by method,
+        retry policy and rate limit of private queries
+        Parameters
+        ----------
+        path: str
+            path to inputs config file
+        """
+        super().set_config(path)
+        if not os.path.isfile(path):
+            return
+        main = etree.parse(path)
+        for node in main.xpath("/pytradingbot/connection"):
+            self.uri = node.attrib.get("uri", self.uri)
+            if "pool" in node.attrib:
+                try:
+                    self.pool_size = int(node.attrib["pool"])
+                except ValueError:
+                    logging.warning(
+                        f"pool of connection {node.attrib['pool']} is not an integer. "
+                        f"Set to default value {self.pool_size}"
+                    )
+            for timeout in node.xpath("timeout"):
+                method = timeout.attrib.get("method", "default")
+                try:
+                    self.timeouts[method] = float(timeout.text)
+                except ValueError:
+                    logging.warning(
+                        f"timeout of {method} {timeout.text} is not a float. "
+                        f"Set to default value {self.timeouts.get(method)}"
+                    )
+            for name, parameters in [
+                ("retry", RETRY_PARAMETERS),
+                ("ratelimit", RATELIMIT_PARAMETERS),
+            ]:
+                for subnode in node.xpath(name):
+                    for key, value in subnode.attrib.items():
+                        if key not in parameters:
+                            logging.warning(
+                                f"{key} is not a parameter of {name}. "
+                                f"Possible choices: {list(parameters)}"
+                            )
+                            continue
+                        try:
+                            number = parameters[key](value)
+                        except ValueError:
+                            logging.warning(
+                                f"{key} of {name} {value} is not a number, not used"
+                            )
+                            continue
+                        if name == "ratelimit" and number <= 0:
+                            logging.warning(
+                                f"{key} of {name} {value} is not positive, not used"
+                            )
+                            continue
+                        getattr(self, name)[key] = number
+
     def connect(self):
         """
-        connection to the API
+        connection to the API: the session and its connections are kept
+        if already connected
         """
         self._set_id()
-        test = True
-        while test:
-            try:
-                self.session = krakenex.API(
-                    key=self.id["key"], secret=self.id["private"]
-                )
-                test = False
-            except:
-                pass
+        if isinstance(self.session, KrakenTransport):
+            self.session.key = self.id["key"]
+            self.session.secret = self.id["private"]
+            return
+        self.session = KrakenTransport(
+            key=self.id["key"],
+            secret=self.id["private"],
+            pool_size=self.pool_size,
+            timeouts=self.timeouts,
+            uri=self.uri,
+            policy=RetryPolicy(**self.retry),
+            scheduler=PrivateScheduler(**self.ratelimit),
+        )
 
-    def _query_market(self, timeout: int = 5) -> dict:
+    def _query_market(self, timeout: float = None, pair: str = None) -> dict:
         """
         Method to query the Kraken market
 
         Parameters
         ----------
-        timeout: int
-            maximum time for the query
+        timeout: float
+            maximum time for the query, timeout of Ticker if None
+        pair: str
+            queried pair, self.pair if None
 
         Returns
         -------
             dict: with market value
 
         """
-        query = self.session.query_public(
-            "Ticker", {"pair": self.pair}, timeout=timeout
-        )
-        values = {
-            "ask": float(query["result"][self.pair]["a"][0]),
-            "bid": float(query["result"][self.pair]["b"][0]),
-            "volume": float(query["result"][self.pair]["v"][0]),
-            "time": datetime.now(),
-        }
-        return values
+        pair = self.pair if pair is None else pair
+        query = self.session.query_public("Ticker", {"pair": pair}, timeout=timeout)
+        return self._ticker_values(query["result"][pair], datetime.now())
 
-    def get_market(self) -> dict:
+    def _query_markets(self, pairs: list, timeout: float = None) -> dict:
         """
-        Method to get market value
+        Method to query the Kraken market of several pairs in one request.
+        An unknown pair makes the whole request fail: pairs are then queried
+        one by one, and pairs still failing are kept out of next requests.
+
+        Parameters
+        ----------
+        pairs: list
+            queried pairs
+        timeout: float
+            maximum time for the query, timeout of Ticker if None
 
         Returns
         -------
-            dict: with market value
+            dict: market value by pair, pairs missing in the answer are skipped
         """
-        test = True
-        failed = 0
-        values = {}
-        while test:
-            if failed > 0 and failed % 5 == 0:
-                self.connect()
-            if failed > 0 and failed % 10 == 0:
-                sleep(10)
-            try:
-                values = self._query_market()
-                test = False
-            except requests.exceptions.ConnectionError:
-                if failed == 0:
-                    logging.warning(f"Connexion problem at {datetime.now()}")
-                failed += 1
-            except requests.exceptions.ReadTimeout:
-                if failed == 0:
-                    logging.warning(f"Timeout error at {datetime.now()}")
-                failed += 1
-            except requests.exceptions.HTTPError:
-                if failed == 0:
-                    logging.warning(f"HTTP error at {datetime.now()}")
-                failed += 1
-        if failed > 0:
-            logging.warning(
-                f"Problem solved at {datetime.now()} after {failed} test(s)"
+        batch = [pair for pair in pairs if pair not in self.unknown_pairs]
+        query = {"error": [], "result": {}}
+        if len(batch) > 0:
+            query = self.session.query_public(
+                "Ticker", {"pair": ",".join(batch)}, timeout=timeout
             )
+        if len(query["error"]) > 0:
+            logging.warning(f"Error in Ticker query: {';'.join(query['error'])}")
+        if "result" not in query and len(batch) > 1:
+            result = {}
+            for pair in batch:
+                answer = self.session.query_public(
+                    "Ticker", {"pair": pair}, timeout=timeout
+                )
+                if "result" in answer:
+                    result.update(answer["result"])
+                else:
+                    self.unknown_pairs.add(pair)
+                    logging.warning(
+                        f"{pair} removed from Ticker queries: {';'.join(answer['error'])}"
+                    )
+        else:
+            result = query.get("result", {})
+        now = datetime.now()
+        values = {}
+        for pair in pairs:
+            if pair in result:
+                values[pair] = self._ticker_values(result[pair], now)
+            else:
+                logging.warning(f"{pair} is not in the Ticker result")
         return values
 
+    @staticmethod
+    def _ticker_values(ticker: dict, time: datetime) -> dict:
+        """
+        Method to format the Ticker result of one pair
+
+        Returns
+        -------
+            dict: with market value
+        """
+        return {
+            "ask": float(ticker["a"][0]),
+            "bid": float(ticker["b"][0]),
+            "volume": float(ticker["v"][0]),
+            "time": time,
+        }
+
+    def get_market(self, pair: str = None) -> dict:
+        """
+        Method to get market value, a failed query is retried (see RetryPolicy)
+
+        Parameters
+        ----------
+        pair: str
+            queried pair, self.pair if None
+
+        Returns
+        -------
+            dict: with market value
+        """
+        return self._query_market(pair=pair)
+
+    def get_markets(self, pairs: list) -> dict:
+        """
+        Method to get market value of several pairs in one request,
+        a failed query is retried (see RetryPolicy)
+
+        Parameters
+        ----------
+        pairs: list
+            queried pairs
+
+        Returns
+        -------
+            dict: market value by pair
+        """
+        return self._query_markets(pairs)
+
     def _get_balance(self) -> dict:
         """
         Method to request balance of Kraken account
@@ -124,7 +261,7 @@ class KrakenApi(BaseApi):
         balance = {key: float(value) for key, value in balance.items()}
         return balance
 
-    def buy(self, quantity: float, price: float):
+    def buy(self, quantity: float, price: float, pair: str = None):
         """
         send a order to buy on market
 
@@ -134,17 +271,20 @@ class KrakenApi(BaseApi):
             quantity to buy
         price: float
             price
+        pair: str
+            traded pair, self.pair if None
         """
         result = self.session.query_private(
             "AddOrder",
             {
-                "pair": self.pair,
+                "pair": self.pair if pair is None else pair,
                 "type": "buy",
                 "ordertype": "limit",
                 "price": price,
                 "volume": quantity,
             },
         )
+        self.cache.invalidate()
         if len(result["error"]) > 0:
             print(f"Warning: error buying. \n{';'.join(result['error'])}")
         else:
@@ -152,17 +292,18 @@ class KrakenApi(BaseApi):
                 f"Order id: {result['result']['txid']} : {result['result']['descr']['order']}"
             )
 
-    def sell(self, quantity: float, price: float):
+    def sell(self, quantity: float, price: float, pair: str = None):
         result = self.session.query_private(
             "AddOrder",
             {
-                "pair": self.pair,
+                "pair": self.pair if pair is None else pair,
                 "type": "sell",
                 "ordertype": "limit",
                 "price": price,
                 "volume": quantity,
             },
         )
+        self.cache.invalidate()
         if len(result["error"]) > 0:
             print(f"Warning: error selling. \n{';'.join(result['error'])}")
         else:
@@ -179,6 +320,7 @@ class KrakenApi(BaseApi):
             txid of order to close
         """
         result = self.session.query_private("CancelOrder", {"txid": order_id})
+        self.cache.invalidate()
         if len(result["error"]) > 0:
             print(f"Warning: error closing order. \n{';'.join(result['error'])}")
         else:
@@ -215,6 +357,7 @@ class KrakenApi(BaseApi):
     def open_orders(self, type: str = None, pair: str = None) -> list:
         """
         Method to return list of order's ids opened. Could be filtered by type (sell or buy) and by symbol.
+        Opened orders are kept in cache (see TTLCache).
 
         Parameters
         ----------
@@ -228,7 +371,7 @@ class KrakenApi(BaseApi):
         list of id
         """
         ids = []
-        open_orders = self._get_open_orders()
+        open_orders = self.cache.get("open_orders", self._get_open_orders)
         # filtering on type
         order_types = [type] if type is not None else list(open_orders.keys())
         for o_type in order_types:
@@ -266,6 +409,21 @@ class KrakenApiDev(KrakenApi):
         elif not os.path.isfile(balance_path):
             raise FileNotFoundError(f"Balance file {balance_path} is not a file")
 
+    @property
+    def balance(self) -> dict:
+        """
+        balance of the account: the balance in memory, or the balance file
+        kept in cache until it changes (see TTLCache)
+        """
+        if self.balance_path is None:
+            return self.balance_dict
+        stat = os.stat(self.balance_path)
+        return dict(
+            self.cache.get(
+                ("balance", stat.st_mtime_ns, stat.st_size), self._get_balance
+            )
+        )
+
     def _get_balance(self):
         if self.balance_path is None:
             balance = self.balance_dict
@@ -278,40 +436,44 @@ class KrakenApiDev(KrakenApi):
         balance = {key: float(value) for key, value in balance.items()}
         return balance
 
-    def buy(self, quantity, price):
+    def buy(self, quantity, price, pair: str = None):
+        pair = self.pair if pair is None else pair
         tot_price = quantity * price
         if self.balance_path is None:
             self.balance_dict["ZEUR"] -= tot_price
-            if self.pair not in self.balance_dict:
-                self.balance_dict[self.pair] = quantity
+            if pair not in self.balance_dict:
+                self.balance_dict[pair] = quantity
             else:
-                self.balance_dict[self.pair] += quantity
+                self.balance_dict[pair] += quantity
         else:
             balance = self.balance
             balance["ZEUR"] -= tot_price
-            if self.pair in balance.keys():
-                balance[self.pair] += quantity
+            if pair in balance.keys():
+                balance[pair] += quantity
             else:
-                balance[self.pair] = quantity
+                balance[pair] = quantity
             tmp = pd.Series(balance).to_frame().reset_index()
             tmp.columns = ["name", "quantity"]
             tmp.to_csv(self.balance_path, sep=";", index=False)
+        self.cache.invalidate()
 
-    def sell(self, quantity, price):
+    def sell(self, quantity, price, pair: str = None):
+        pair = self.pair if pair is None else pair
         if self.balance_path is None:
-            quantity = min(quantity, self.balance[self.pair])
+            quantity = min(quantity, self.balance[pair])
             self.balance_dict["ZEUR"] += quantity * price
-            self.balance_dict[self.pair] -= quantity
+            self.balance_dict[pair] -= quantity
         else:
             balance = self.balance
-            quantity = min(quantity, balance[self.pair])
-            if quantity > balance[self.pair]:
-                quantity = balance[self.pair]
+            quantity = min(quantity, balance[pair])
+            if quantity > balance[pair]:
+                quantity = balance[pair]
             balance["ZEUR"] += quantity * price
-            balance[self.pair] -= quantity
+            balance[pair] -= quantity
             tmp = pd.Series(balance).to_frame().reset_index()
             tmp.columns = ["name", "quantity"]
             tmp.to_csv(self.balance_path, sep=";", index=False)
+        self.cache.invalidate()
 
 
 class CryptoEmptyLoad:
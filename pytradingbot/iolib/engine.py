@@ -0,0 +1,244 @@
+"""
+Module containing an asynchronous engine to trade several pairs in one process
+"""
+
+# =================
+# Python IMPORTS
+# =================
+import asyncio
+import logging
+import os.path
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import numpy as np
+
+# =================
+# Internal IMPORTS
+# =================
+from pytradingbot.cores.markets import Market
+from pytradingbot.iolib.base import BaseApi
+from pytradingbot.iolib.retry import CircuitOpenError
+from pytradingbot.utils.journal import TickJournal
+from pytradingbot.utils.scheduler import TickScheduler
+
+# =================
+# Variables
+# =================
+STEP_ERRORS = (
+    CircuitOpenError,
+    OSError,
+    KeyError,
+    ValueError,
+)  # errors of an iteration of a pair (query, analysis or order): other pairs go on
+
+
+class AsyncEngine:
+    """
+    Live trading of several pairs with one api (one session).
+    Each iteration, markets of all pairs are queried concurrently (or in one request
+    with batch), then each market is updated, analysed and traded as soon as
+    its values are received.
+    Blocking calls of the api run in a pool of threads, orders are sent one by one.
+    """
+
+    def __init__(
+        self,
+        api: BaseApi,
+        pairs: list = None,
+        workers: int = None,
+        batch: bool = False,
+        clock=None,
+        sleep=asyncio.sleep,
+    ):
+        """
+        Parameters
+        ----------
+        api: BaseApi
+            connected api, with the input config
+        pairs: list
+            traded pairs, pairs of the api config if None
+        workers: int
+            number of threads for the api calls, one by pair if None
+        batch: bool
+            query markets of all pairs in one request (see BaseApi.get_markets)
+        clock: callable
+            monotonic clock of the scheduler and latencies, time of the loop if None
+        sleep: coroutine function
+            function to wait the next iteration
+        """
+        self.api = api
+        if pairs is None:
+            pairs = api.pairs if len(api.pairs) > 0 else [api.pair]
+        self.pairs = list(pairs)
+        self.workers = len(self.pairs) if workers is None else workers
+        self.batch = batch
+        self.markets = {}
+        self.journals = {}
+        self.latency = {pair: np.nan for pair in self.pairs}  # last iteration (s)
+        self.latency_max = {pair: 0.0 for pair in self.pairs}
+        self.errors = {pair: 0 for pair in self.pairs}
+        self.scheduler = None  # ticks of iterations, see TickScheduler
+        self.clock = clock
+        self.sleep = sleep
+        self._executor = None
+        self._orders = None  # lock: private calls of the api are not concurrent
+        self._markets = None  # batch query of the current iteration
+
+    def journal_path(self, pair: str) -> [str, None]:
+        """
+        Method to get the journal path of a pair: pair is added to the api journal name
+
+        Returns
+        -------
+        str: path, None if the api has no journal
+        """
+        if self.api.journal_path is None:
+            return None
+        root, ext = os.path.splitext(self.api.journal_path)
+        return f"{root}_{pair}{ext}"
+
+    def open(self):
+        """
+        Method to create the market (and its journal) of each pair,
+        the money of the api is shared by pairs
+        """
+        self.api.npairs = len(self.pairs)
+        for pair in self.pairs:
+            journal = None
+            if self.journal_path(pair) is not None:
+                journal = TickJournal(
+                    self.journal_path(pair), fsync=self.api.journal_fsync
+                )
+            self.journals[pair] = journal
+            self.markets[pair] = self.api.create_market(pair=pair, journal=journal)
+
+    def close(self):
+        """Method to write rows kept in memory, to compact and close journals"""
+        for market in self.markets.values():
+            market.flush()
+        for pair, journal in self.journals.items():
+            if journal is not None:
+                self.markets[pair].compact()
+                journal.close()
+        self.journals = {}
+
+    async def _call(self, func, *args, **kwargs):
+        """Method to run a blocking function in the pool of threads"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, partial(func, *args, **kwargs)
+        )
+
+    async def _fetch(self, pair: str) -> dict:
+        """Method to query market values of a pair"""
+        if self.batch:
+            values = (await self._markets).get(pair)
+            if values is None:
+                raise KeyError(f"{pair} is not in queried markets")
+            return values
+        return await self._call(self.api.get_market, pair)
+
+    def _persist(self, pair: str, count: int):
+        """Method to save (or compact) and to clean the market of a pair"""
+        market = self.markets[pair]
+        if self.journals.get(pair) is None:
+            market.save()
+        elif count % max(self.api.journal_compact, 1) == 0:
+            market.compact()
+        market.clean()
+
+    @staticmethod
+    def _analyse(market: Market, values: dict):
+        """Method to update and analyse a market with queried values"""
+        market.update(values)
+        market.analyse()
+
+    async def _step(self, pair: str, count: int, start: float):
+        """
+        Method to do one iteration for a pair: update, analysis, order and save.
+        Blocking calls run in the pool of threads, an error of the pair (see
+        STEP_ERRORS) is logged without stopping other pairs, the market is saved
+        and cleaned in any case.
+
+        Parameters
+        ----------
+        pair: str
+        count: int
+            iteration number
+        start: float
+            start time of the iteration (time of the scheduler clock)
+        """
+        market = self.markets[pair]
+        try:
+            values = await self._fetch(pair)
+            await self._call(self._analyse, market, values)
+            async with self._orders:
+                await self._call(self.api.trade, market, pair)
+        except STEP_ERRORS as error:
+            self.errors[pair] += 1
+            logging.warning(f"{pair}: iteration {count} failed: {error!r}")
+            return
+        finally:
+            await self._call(self._persist, pair, count)
+
+        self.latency[pair] = self.scheduler.clock() - start
+        self.latency_max[pair] = max(self.latency_max[pair], self.latency[pair])
+        if self.latency[pair] > self.api.refresh:
+            logging.warning(
+                f"{pair}: iteration {count} done in {self.latency[pair]:.3f}s, "
+                f"more than refresh time {self.api.refresh}s"
+            )
+
+    async def _iteration(self, count: int):
+        """Method to do one iteration for all pairs"""
+        start = self.scheduler.clock()
+        if self.batch:
+            # shared by all pairs, each pair waits for the same request
+            self._markets = asyncio.ensure_future(
+                self._call(self.api.get_markets, self.pairs)
+            )
+        # errors are handled by pair: a failing pair does not stop other pairs
+        await asyncio.gather(*[self._step(pair, count, start) for pair in self.pairs])
+
+    async def run_async(self, times: int = np.inf):
+        """
+        Method to run the analysis of markets in real time, in an event loop
+
+        Parameters
+        ----------
+        times: int
+            number of iterations
+        """
+        clock = asyncio.get_running_loop().time if self.clock is None else self.clock
+        self._orders = asyncio.Lock()
+        self.scheduler = TickScheduler(
+            self.api.refresh, policy=self.api.overrun, clock=clock
+        )
+        with ThreadPoolExecutor(max_workers=max(self.workers, 1)) as executor:
+            self._executor = executor
+            count = 0
+            while count < times:
+                count += 1
+                self.scheduler.tick()
+                self.api.new_tick()
+                await self._iteration(count)
+                if count < times:
+                    await self.sleep(self.scheduler.next_delay())
+            self._executor = None
+
+    def run(self, times: int = np.inf):
+        """
+        Method to run the analysis of markets in real time
+
+        Parameters
+        ----------
+        times: int
+            number of iterations
+        """
+        if len(self.markets) == 0:
+            self.open()
+        try:
+            asyncio.run(self.run_async(times))
+        finally:
+            self.close()
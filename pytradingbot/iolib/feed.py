@@ -0,0 +1,243 @@
+"""
+Module containing a push feed of market values, alternative to the polling of the api
+"""
+
+# =================
+# Python IMPORTS
+# =================
+import asyncio
+import json
+import logging
+from datetime import datetime
+from urllib.parse import urlparse
+
+import numpy as np
+
+# =================
+# Internal IMPORTS
+# =================
+from pytradingbot.iolib.retry import RetryPolicy
+
+# =================
+# Variables
+# =================
+FEED_ERRORS = (
+    OSError,
+    asyncio.TimeoutError,
+    json.JSONDecodeError,
+)  # errors of a connection to the feed: reconnection
+
+
+class TickerFeed:
+    """
+    Streaming client of a ticker feed: each tick is appended to the market of its pair
+    as soon as it is received.
+
+    Messages are JSON objects, one by line, as the channels of a websocket:
+    the client sends {"method": "subscribe", "params": {"channel": "ticker",
+    "symbol": [pairs], "from": {pair: last sequence received}}}, the feed sends
+    {"channel": "ticker", "data": [{"symbol", "seq", "time", "ask", "bid", "volume"}]}
+    and {"channel": "heartbeat"} when there is no tick.
+
+    Sequence numbers are checked by pair: a tick already received is dropped,
+    a gap triggers a new subscription from the last tick received (resync);
+    ticks still missing after the resync are counted as lost.
+    The connection is opened again after an error, or without message during timeout,
+    with the backoff of policy (see RetryPolicy.delay).
+    """
+
+    def __init__(
+        self,
+        uri: str,
+        markets: dict,
+        on_tick=None,
+        timeout: float = 10,
+        retries: int = 10,
+        policy: RetryPolicy = None,
+    ):
+        """
+        Parameters
+        ----------
+        uri: str
+            address of the feed: tcp://host:port
+        markets: dict
+            Market by pair, the subscribed pairs
+        on_tick: callable
+            function called with (pair, market) after each tick (ex: analyse, trade)
+        timeout: float
+            time without message before a reconnection (s)
+        retries: int
+            number of consecutive failed connections before an error
+        policy: RetryPolicy
+            backoff of reconnections, RetryPolicy() if None
+        """
+        self.uri = uri
+        self.markets = markets
+        self.on_tick = on_tick
+        self.timeout = timeout
+        self.retries = retries
+        self.policy = RetryPolicy() if policy is None else policy
+        self.seq = {pair: None for pair in markets}  # last sequence received
+        self.counters = {
+            "messages": 0,
+            "ticks": 0,  # ticks appended to markets
+            "duplicates": 0,  # ticks already received
+            "resyncs": 0,  # subscriptions again after a gap
+            "gaps": 0,  # gaps not filled by a resync
+            "lost": 0,  # ticks of these gaps
+            "connections": 0,
+            "errors": 0,  # connections ended by an error
+        }
+        self.latency_max = 0.0  # delay between tick time and reception (s)
+        self._resync = {}  # pair: last sequence when the resync was asked
+        self._stopped = False
+
+    async def open_connection(self) -> (asyncio.StreamReader, asyncio.StreamWriter):
+        """Method to open the connection to the feed"""
+        address = urlparse(self.uri)
+        return await asyncio.open_connection(address.hostname, address.port)
+
+    def subscription(self) -> dict:
+        """
+        Returns
+        -------
+        dict: subscription message, from the last ticks received
+        """
+        params = {"channel": "ticker", "symbol": list(self.markets)}
+        last = {pair: seq for pair, seq in self.seq.items() if seq is not None}
+        if len(last) > 0:
+            params["from"] = last
+        return {"method": "subscribe", "params": params}
+
+    def stop(self):
+        """Method to stop the feed after the current message"""
+        self._stopped = True
+
+    def _append(self, pair: str, tick: dict):
+        """Method to append a tick to the market of its pair"""
+        time = datetime.fromtimestamp(float(tick["time"]))
+        self.markets[pair].update(
+            {
+                "time": time,
+                "ask": float(tick["ask"]),
+                "bid": float(tick["bid"]),
+                "volume": float(tick["volume"]),
+            }
+        )
+        self.latency_max = max(
+            self.latency_max, (datetime.now() - time).total_seconds()
+        )
+        self.counters["ticks"] += 1
+        if self.on_tick is not None:
+            self.on_tick(pair, self.markets[pair])
+
+    def handle(self, message: dict) -> bool:
+        """
+        Method to handle a message of the feed
+
+        Parameters
+        ----------
+        message: dict
+            message received
+
+        Returns
+        -------
+        bool: True if a resync is needed (gap in the sequence of a pair)
+        """
+        self.counters["messages"] += 1
+        if message.get("channel") != "ticker":
+            return False
+        for tick in message.get("data", []):
+            pair = tick.get("symbol")
+            if pair not in self.markets:
+                continue
+            seq = int(tick["seq"])
+            last = self.seq[pair]
+            if last is not None and seq <= last:
+                self.counters["duplicates"] += 1
+                continue
+            if last is not None and seq > last + 1:
+                if self._resync.get(pair) != last:
+                    logging.warning(
+                        f"Feed: {pair} ticks {last + 1} to {seq - 1} missing, resync"
+                    )
+                    self._resync[pair] = last
+                    self.counters["resyncs"] += 1
+                    return True
+                logging.warning(f"Feed: {pair} ticks {last + 1} to {seq - 1} lost")
+                self.counters["gaps"] += 1
+                self.counters["lost"] += seq - last - 1
+            self._resync.pop(pair, None)
+            self.seq[pair] = seq
+            self._append(pair, tick)
+        return False
+
+    async def _listen(self, reader, writer, ticks: float) -> bool:
+        """
+        Method to read messages of one connection
+
+        Returns
+        -------
+        bool: True if the feed is over (stopped or total of ticks reached)
+        """
+        writer.write((json.dumps(self.subscription()) + "\n").encode())
+        await writer.drain()
+        while True:
+            line = await asyncio.wait_for(reader.readline(), self.timeout)
+            if len(line) == 0:
+                raise ConnectionResetError("feed closed the connection")
+            if self.handle(json.loads(line)):
+                return False
+            if self._stopped or self.counters["ticks"] >= ticks:
+                return True
+
+    async def run_async(self, ticks: float = np.inf):
+        """
+        Method to receive ticks until stop is called
+
+        Parameters
+        ----------
+        ticks: int
+            the feed stops after this number of ticks received
+
+        Raises
+        ------
+        OSError: connection failed retries times
+        """
+        self._stopped = False
+        ticks = self.counters["ticks"] + ticks
+        failures = 0  # consecutive connections without message
+        while not self._stopped and self.counters["ticks"] < ticks:
+            received = self.counters["messages"]
+            writer = None
+            try:
+                reader, writer = await asyncio.wait_for(
+                    self.open_connection(), self.timeout
+                )
+                self.counters["connections"] += 1
+                if await self._listen(reader, writer, ticks):
+                    return
+            except FEED_ERRORS as error:
+                self.counters["errors"] += 1
+                logging.warning(f"Feed: connection to {self.uri} lost: {error!r}")
+                if self.counters["messages"] == received:
+                    failures += 1
+                    if failures > self.retries:
+                        raise OSError(
+                            f"Feed: connection to {self.uri} failed {failures} times"
+                        ) from error
+                    await asyncio.sleep(self.policy.delay(failures - 1))
+                    continue
+            finally:
+                if writer is not None:
+                    writer.close()
+            failures = 0
+
+    def run(self, ticks: float = np.inf):
+        """Method to receive ticks until stop is called (see run_async)"""
+        asyncio.run(self.run_async(ticks))
+
+    @property
+    def metrics(self) -> dict:
+        """counters of the feed and maximum latency of ticks (s)"""
+        return {**self.counters, "latency_max": self.latency_max}
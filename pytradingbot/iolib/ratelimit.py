@@ -0,0 +1,219 @@
+"""
+Module containing the scheduler of private queries of the Kraken API
+"""
+
+# =================
+# Python IMPORTS
+# =================
+import threading
+import time
+
+# =================
+# Internal IMPORTS
+# =================
+
+# =================
+# Variables
+# =================
+COSTS = {
+    "default": 1,
+    "Ledgers": 2,
+    "QueryLedgers": 2,
+    "TradesHistory": 2,
+    "AddOrder": 0,
+    "CancelOrder": 0,
+}  # increase of the Kraken call counter by method (orders have their own limit)
+READS = [
+    "Balance",
+    "BalanceEx",
+    "TradeBalance",
+    "OpenOrders",
+    "ClosedOrders",
+    "QueryOrders",
+    "TradesHistory",
+    "Ledgers",
+    "QueryLedgers",
+    "TradeVolume",
+]  # methods without effect on the account
+
+
+class _Pending:
+    """Result of a query shared by coalesced calls"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class PrivateScheduler:
+    """
+    Scheduler of private queries, modelling the Kraken call counter as a token bucket:
+    the counter increases by the cost of each query (see COSTS), decreases by rate
+    per second, and cannot exceed capacity. Queries waiting for the counter are
+    queued and sent in order.
+    Reads (see READS) with the same parameters are coalesced while in flight: calls
+    during the query wait for its result, a call after its end queries again.
+    Reads are not kept between calls, values kept during a tick are in the cache
+    of the api (see TTLCache, BaseApi.new_tick).
+    """
+
+    def __init__(
+        self,
+        capacity: float = 15,
+        rate: float = 0.33,
+        costs: dict = None,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        """
+        Parameters
+        ----------
+        capacity: float
+            maximum of the call counter (15 for a starter Kraken account)
+        rate: float
+            decrease of the call counter by second (0.33 for a starter account)
+        costs: dict
+            increase of the counter by method, with a default key, COSTS if None
+        clock: callable
+            monotonic clock in seconds
+        sleep: callable
+            function to wait a time in seconds
+        """
+        if capacity <= 0 or rate <= 0:
+            raise ValueError(f"capacity {capacity} and rate {rate} should be positive")
+        self.capacity = capacity
+        self.rate = rate
+        self.costs = dict(COSTS if costs is None else costs)
+        self.clock = clock
+        self.sleep = sleep
+        self.counter = 0.0  # Kraken call counter
+        self._updated = clock()
+        self._inflight = {}  # reads in flight: _Pending by query
+        self._condition = threading.Condition()
+        self._next_ticket = 0  # order of queued queries
+        self._serving = 0
+        self.depth = 0  # number of queued queries
+        self.counters = {"calls": 0, "coalesced": 0, "queries": 0, "max_depth": 0}
+        self._wait = [0.0, 0.0]  # sum and max of waits for the counter (s)
+        self._latency = [0.0, 0.0]  # sum and max of latency of calls (s)
+
+    def cost(self, method: str) -> float:
+        """increase of the call counter by a method"""
+        return self.costs.get(method, self.costs.get("default", 1))
+
+    def _decay(self):
+        now = self.clock()
+        self.counter = max(self.counter - self.rate * (now - self._updated), 0.0)
+        self._updated = now
+
+    def acquire(self, method: str):
+        """
+        Method to wait until a query can be sent without exceeding the counter
+
+        Parameters
+        ----------
+        method: str
+            method of the query
+        """
+        cost = min(self.cost(method), self.capacity)
+        start = self.clock()
+        with self._condition:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            self.depth += 1
+            self.counters["max_depth"] = max(self.counters["max_depth"], self.depth)
+        while True:
+            with self._condition:
+                while ticket != self._serving:
+                    self._condition.wait()
+                self._decay()
+                delay = (self.counter + cost - self.capacity) / self.rate
+                if delay <= 0:
+                    self.counter += cost
+                    self._serving += 1
+                    self.depth -= 1
+                    self.counters["queries"] += 1
+                    wait = self.clock() - start
+                    self._wait = [self._wait[0] + wait, max(self._wait[1], wait)]
+                    self._condition.notify_all()
+                    return
+            # first in the queue: others wait for their turn
+            self.sleep(delay)
+
+    def call(self, method: str, data: dict, query):
+        """
+        Method to do a private query
+
+        Parameters
+        ----------
+        method: str
+            method of the query
+        data: dict
+            parameters of the query (without nonce)
+        query: callable
+            function sending the query, it should call acquire before each try
+
+        Returns
+        -------
+        result of the query
+        """
+        start = self.clock()
+        key = (method, tuple(sorted((k, str(v)) for k, v in data.items())))
+        owner = True
+        with self._condition:
+            self.counters["calls"] += 1
+            if method in READS:
+                if key in self._inflight:
+                    self.counters["coalesced"] += 1
+                    owner = False
+                else:
+                    self._inflight[key] = _Pending()
+                pending = self._inflight[key]
+        if method not in READS:
+            try:
+                return query()
+            finally:
+                self._measure(start)
+        if owner:
+            try:
+                pending.result = query()
+            except Exception as error:
+                pending.error = error
+                raise
+            finally:
+                with self._condition:
+                    del self._inflight[key]  # next calls query again
+                pending.done.set()
+                self._measure(start)
+            return pending.result
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _measure(self, start: float):
+        latency = self.clock() - start
+        with self._condition:
+            self._latency = [self._latency[0] + latency, max(self._latency[1], latency)]
+
+    @property
+    def metrics(self) -> dict:
+        """
+        Returns
+        -------
+        dict: calls, coalesced calls, queries sent, queue depth (current and max),
+            wait for the counter and latency of queries (mean and max in s), counter
+        """
+        with self._condition:
+            queries = max(self.counters["queries"], 1)
+            sent = max(self.counters["calls"] - self.counters["coalesced"], 1)
+            return {
+                **self.counters,
+                "depth": self.depth,
+                "wait_mean": self._wait[0] / queries,
+                "wait_max": self._wait[1],
+                "latency_mean": self._latency[0] / sent,
+                "latency_max": self._latency[1],
+                "counter": self.counter,
+            }
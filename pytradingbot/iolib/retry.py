@@ -0,0 +1,247 @@
+"""
+Module containing the retry policy of API queries
+"""
+
+# =================
+# Python IMPORTS
+# =================
+import logging
+import random
+import threading
+import time
+
+import requests.exceptions
+
+# =================
+# Internal IMPORTS
+# =================
+
+# =================
+# Variables
+# =================
+RETRY_EXCEPTIONS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.HTTPError,
+)  # errors of a query which can succeed later (see retryable)
+RETRY_STATUS = [429]  # HTTP errors retried, with server errors (5xx)
+
+
+def retryable(error: Exception) -> bool:
+    """
+    Function to check if a failed query can succeed later: an HTTP error is only
+    retried for a server error (5xx) or a status of RETRY_STATUS,
+    other client errors (ex: 403 for a wrong key) fail again
+
+    Parameters
+    ----------
+    error: Exception
+        error of the query, in RETRY_EXCEPTIONS
+
+    Returns
+    -------
+    Bool
+    """
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return status >= 500 or status in RETRY_STATUS
+    return True
+
+
+class CircuitOpenError(Exception):
+    """Query not sent: too many failures, the circuit breaker is open"""
+
+
+class RetryPolicy:
+    """
+    Retry of failed queries with an exponential backoff and a random jitter
+    (delay drawn between 0 and base * factor ** retry), during max_elapsed seconds.
+    A circuit breaker opens after max_failures consecutive failures: queries are
+    rejected (CircuitOpenError) during reset_timeout seconds, then one query is
+    sent (half-open): the circuit is closed if it succeeds, opened again otherwise.
+    """
+
+    def __init__(
+        self,
+        base: float = 0.5,
+        factor: float = 2,
+        max_delay: float = 30,
+        max_elapsed: float = 60,
+        max_failures: int = 5,
+        reset_timeout: float = 30,
+        exceptions: tuple = RETRY_EXCEPTIONS,
+        clock=time.monotonic,
+        sleep=time.sleep,
+        seed: int = None,
+    ):
+        """
+        Parameters
+        ----------
+        base: float
+            maximum delay before the first retry (s)
+        factor: float
+            multiplication of the maximum delay after each retry
+        max_delay: float
+            upper limit of the maximum delay (s)
+        max_elapsed: float
+            no retry after this time since the first attempt (s)
+        max_failures: int
+            number of consecutive failures opening the circuit
+        reset_timeout: float
+            time before a query is sent when the circuit is open (s)
+        exceptions: tuple
+            exceptions of failed queries, retried if retryable
+        clock: callable
+            monotonic clock in seconds
+        sleep: callable
+            function to wait a time in seconds
+        seed: int
+            seed of the jitter
+        """
+        self.base = base
+        self.factor = factor
+        self.max_delay = max_delay
+        self.max_elapsed = max_elapsed
+        self.max_failures = max_failures
+        self.reset_timeout = reset_timeout
+        self.exceptions = exceptions
+        self.clock = clock
+        self.sleep = sleep
+        self.state = "closed"  # closed, open or half-open
+        self.failures = 0  # consecutive failures
+        self.counters = {
+            "calls": 0,  # calls of the policy
+            "attempts": 0,  # queries sent
+            "retries": 0,
+            "failures": 0,  # failed queries
+            "giveups": 0,  # calls failed after all retries
+            "rejected": 0,  # calls rejected by the open circuit
+            "opened": 0,  # number of times the circuit opened
+        }
+        self._opened_at = None
+        self._probing = False  # a query is sent in half-open state
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self, retry: int) -> float:
+        """
+        Method to draw the delay before a retry
+
+        Parameters
+        ----------
+        retry: int
+            number of the retry, from 0
+
+        Returns
+        -------
+        float: delay (s)
+        """
+        return self._random.uniform(
+            0, min(self.max_delay, self.base * self.factor**retry)
+        )
+
+    @property
+    def metrics(self) -> dict:
+        """counters and state of the circuit"""
+        with self._lock:
+            return {**self.counters, "state": self.state}
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _allow(self):
+        """Method to check the circuit before a query"""
+        with self._lock:
+            if self.state == "open":
+                if self.clock() - self._opened_at < self.reset_timeout:
+                    self.counters["rejected"] += 1
+                    raise CircuitOpenError(
+                        f"circuit open after {self.failures} failures"
+                    )
+                self.state = "half-open"
+                self._probing = False
+            if self.state == "half-open":
+                if self._probing:
+                    self.counters["rejected"] += 1
+                    raise CircuitOpenError("circuit half-open, a query is pending")
+                self._probing = True
+            self.counters["attempts"] += 1
+
+    def _success(self):
+        with self._lock:
+            if self.state != "closed" or self.failures > 0:
+                logging.warning(f"Query succeeded after {self.failures} failure(s)")
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def _release(self):
+        """Method to end a query which is neither a success nor a failure"""
+        with self._lock:
+            self._probing = False
+
+    def _failure(self, error: Exception):
+        with self._lock:
+            self.counters["failures"] += 1
+            self.failures += 1
+            if self.failures == 1:
+                logging.warning(f"Query failed: {error!r}")
+            if self.state == "half-open" or (
+                self.state == "closed" and self.failures >= self.max_failures
+            ):
+                logging.warning(f"Circuit opened after {self.failures} failures")
+                self.state = "open"
+                self.counters["opened"] += 1
+                self._opened_at = self.clock()
+            self._probing = False
+
+    def call(self, func, *args, retry: bool = True, **kwargs):
+        """
+        Method to call a query with retries
+
+        Parameters
+        ----------
+        func: callable
+            query
+        args, kwargs:
+            arguments of the query
+        retry: bool
+            retry the query if it fails (False for a query which cannot be sent
+            twice, ex: a new order)
+
+        Returns
+        -------
+        result of the query
+
+        Raises
+        ------
+        CircuitOpenError: the circuit is open
+        exceptions: last error of the query, if retries are over
+        """
+        self._count("calls")
+        start = self.clock()
+        retries = 0
+        while True:
+            self._allow()
+            try:
+                result = func(*args, **kwargs)
+            except self.exceptions as error:
+                if not retryable(error):
+                    self._release()
+                    raise
+                self._failure(error)
+                delay = self.delay(retries)
+                elapsed = self.clock() - start + delay
+                if not retry or self.state == "open" or elapsed > self.max_elapsed:
+                    self._count("giveups")
+                    raise
+                self._count("retries")
+                retries += 1
+                self.sleep(delay)
+            except Exception:
+                self._release()
+                raise
+            else:
+                self._success()
+                return result
@@ -0,0 +1,174 @@
+"""
+Module containing the HTTP transport of the Kraken API
+"""
+
+# =================
+# Python IMPORTS
+# =================
+import threading
+import time
+
+import krakenex
+import requests
+from requests.adapters import HTTPAdapter
+
+# =================
+# Internal IMPORTS
+# =================
+from pytradingbot.iolib.ratelimit import PrivateScheduler
+from pytradingbot.iolib.retry import RetryPolicy
+
+# =================
+# Variables
+# =================
+TIMEOUTS = {
+    "default": 10,
+    "Ticker": 5,
+    "AddOrder": 15,
+    "CancelOrder": 15,
+}  # timeout (s) of a query by method of the API, default for other methods
+NOT_RETRIED = ["AddOrder", "CancelOrder"]  # could be done twice if retried
+
+
+def pooled_session(pool_size: int = 10, headers: dict = None) -> requests.Session:
+    """
+    Function to create a HTTP session keeping connections alive in a pool
+
+    Parameters
+    ----------
+    pool_size: int
+        maximum number of connections kept alive by host
+        (number of concurrent queries without a new connection)
+    headers: dict
+        headers of all requests
+
+    Returns
+    -------
+    requests.Session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if headers is not None:
+        session.headers.update(headers)
+    session.headers["Connection"] = "keep-alive"
+    return session
+
+
+class KrakenTransport(krakenex.API):
+    """
+    Kraken session with one pool of connections for public and private queries,
+    a timeout by method (see TIMEOUTS), a retry policy (see RetryPolicy)
+    and a scheduler of private queries (see PrivateScheduler).
+    Queries can be done from several threads: each query keeps its response,
+    and nonces of private queries always increase.
+    """
+
+    def __init__(
+        self,
+        key: str = "",
+        secret: str = "",
+        pool_size: int = 10,
+        timeouts: dict = None,
+        uri: str = None,
+        policy: RetryPolicy = None,
+        scheduler: PrivateScheduler = None,
+    ):
+        """
+        Parameters
+        ----------
+        key: str
+            API key
+        secret: str
+            API private key
+        pool_size: int
+            number of connections kept alive (see pooled_session)
+        timeouts: dict
+            timeout by method of the API, with a default key, TIMEOUTS if None
+        uri: str
+            URI of the API, Kraken if None
+        policy: RetryPolicy
+            retry policy of all queries, RetryPolicy() if None.
+            Methods of NOT_RETRIED are not retried
+        scheduler: PrivateScheduler
+            rate limiter of private queries, private queries are sent
+            without waiting if None
+        """
+        super().__init__(key=key, secret=secret)
+        self.session.close()
+        self.session = pooled_session(pool_size, headers=self.session.headers)
+        self.timeouts = dict(TIMEOUTS if timeouts is None else timeouts)
+        if uri is not None:
+            self.uri = uri
+        self.policy = RetryPolicy() if policy is None else policy
+        self.scheduler = scheduler
+        self._nonce_lock = threading.Lock()
+        self._last_nonce = 0
+
+    def query_public(self, method: str, data: dict = None, timeout: float = None):
+        """Public query of the API with the retry policy"""
+        return self.policy.call(
+            super().query_public,
+            method,
+            data,
+            timeout,
+            retry=method not in NOT_RETRIED,
+        )
+
+    def query_private(self, method: str, data: dict = None, timeout: float = None):
+        """
+        Private query of the API with the retry policy, nonce is new each try.
+        The query is scheduled by the scheduler if defined.
+        """
+        data = dict(data or {})
+
+        def query():
+            return self.policy.call(
+                self._send_private,
+                method,
+                data,
+                timeout,
+                retry=method not in NOT_RETRIED,
+            )
+
+        if self.scheduler is None:
+            return query()
+        return self.scheduler.call(method, data, query)
+
+    def _send_private(self, method: str, data: dict, timeout: float):
+        """One try of a private query, when the scheduler allows it"""
+        if self.scheduler is not None:
+            self.scheduler.acquire(method)
+        return super().query_private(method, dict(data), timeout)
+
+    def timeout(self, method: str) -> float:
+        """timeout of a method of the API"""
+        return self.timeouts.get(method, self.timeouts.get("default"))
+
+    def _nonce(self) -> int:
+        """Nonce in milliseconds, increased if several queries are in the same ms"""
+        with self._nonce_lock:
+            self._last_nonce = max(int(1000 * time.time()), self._last_nonce + 1)
+            return self._last_nonce
+
+    def _query(self, urlpath, data, headers=None, timeout=None):
+        """
+        Query of the API (see krakenex.API._query), with the timeout of the method
+        if timeout is None
+        """
+        if timeout is None:
+            timeout = self.timeout(urlpath.split("/")[-1])
+        url = self.uri + urlpath
+        if "/public/" in urlpath:
+            response = self.session.get(
+                url, params=data, headers=headers, timeout=timeout
+            )
+        else:
+            response = self.session.post(
+                url, data=data, headers=headers, timeout=timeout
+            )
+        self.response = response  # last response, as krakenex
+        if response.status_code not in (200, 201, 202):
+            response.raise_for_status()
+        return response.json(**self._json_options)
@@ -7,6 +7,7 @@ import os.path
 import sys
 
 from pytradingbot.iolib.crypto_api import KrakenApiDev
+from pytradingbot.iolib.engine import AsyncEngine
 
 # ============================
 # arguments
@@ -24,4 +25,7 @@ if args.ifile is None or not os.path.isfile(args.ifile):
 
 api = KrakenApiDev(input_path=args.ifile)
 api.connect()
-api.run()
+if len(api.pairs) > 1:
+    AsyncEngine(api, batch=True).run()
+else:
+    api.run()
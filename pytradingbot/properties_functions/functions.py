@@ -20,6 +20,53 @@ except ImportError:
 # =================
 # Variables
 # =================
+VECTORIZED = True  # use whole-array kernels instead of a rolling window apply
+
+
+def _rolling_sum(values: np.ndarray, k: int) -> np.ndarray:
+    """
+    sum of values on each window of size k, with cumulative sums differencing
+
+    Parameters
+    ----------
+    values: np.ndarray
+    k: int
+        window size (could be 0)
+
+    Returns
+    -------
+    np.ndarray: array of size len(values) - k + 1
+    """
+    csum = np.concatenate([[0], np.cumsum(values)])
+    return csum[k:] - csum[: csum.shape[0] - k]
+
+
+def _rolling_extremum(values: np.ndarray, k: int, ufunc: np.ufunc) -> np.ndarray:
+    """
+    maximum or minimum of values on each window of size k in O(n), with the
+    van Herk / Gil-Werman block decomposition: values are split in blocks of
+    size k, each window covers the end of one block and the start of the next one.
+
+    Parameters
+    ----------
+    values: np.ndarray
+    k: int
+        window size (> 0)
+    ufunc: np.ufunc
+        np.maximum or np.minimum
+
+    Returns
+    -------
+    np.ndarray: array of size len(values) - k + 1
+    """
+    size = values.shape[0]
+    nblocks = -(-size // k)
+    # padded values are never inside a complete window
+    padded = np.pad(values, (0, nblocks * k - size), mode="edge")
+    blocks = padded.reshape(nblocks, k)
+    prefix = ufunc.accumulate(blocks, axis=1).ravel()
+    suffix = ufunc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+    return ufunc(suffix[: size - k + 1], prefix[k - 1 : size])
 
 
 def derivative(data: pd.Series) -> pd.Series:
@@ -75,6 +122,49 @@ def moving_average(data: pd.Series, k: int) -> pd.Series:
         return pd.Series(index=data.index, data=odata, name=data.name)
 
 
+def exponential_weights(k: int) -> np.ndarray:
+    """
+    weights of the exponential moving average, from the oldest to the newest value.
+    The newest value has a weight of 1, the i-th previous one 2 / (i + 2)
+
+    Parameters
+    ----------
+    k: int
+        window size
+
+    Returns
+    -------
+    np.ndarray
+    """
+    return np.flipud(2 / (np.arange(1, k + 1) + 1))
+
+
+def exponential_moving_average_kernel(values: np.ndarray, k: int) -> np.ndarray:
+    """
+    Moving average weighted by exponential_weights, computed on the whole array
+    without the rolling apply: the weighted sum of each window is done by
+    np.correlate, so the result is the same as the rolling version.
+    Weights 2 / (i + 2) are not geometric, so there is no recursive update:
+    each window is summed again, in O(n * k) for n values.
+
+    Parameters
+    ----------
+    values: np.ndarray
+    k: int
+        window size
+
+    Returns
+    -------
+    np.ndarray: NaN for the k - 1 first values
+    """
+    values = np.asarray(values, dtype=float)
+    weights = exponential_weights(k)
+    odata = np.full(values.shape[0], np.nan)
+    if values.shape[0] >= k:
+        odata[k - 1 :] = np.correlate(values, weights, mode="valid") / np.sum(weights)
+    return odata
+
+
 def exponential_moving_average(data: pd.Series, k: int) -> pd.Series:
     """
     function to calculate Exponential Moving average of data
@@ -92,15 +182,16 @@ def exponential_moving_average(data: pd.Series, k: int) -> pd.Series:
     """
 
     def exp_data(value: np.array):
-        size = value.shape[0]
-        a = 2 / (np.arange(1, size + 1) + 1)
-        a = np.flipud(a)
+        a = exponential_weights(value.shape[0])
         exp_val = value * a
         mean = np.sum(exp_val) / np.sum(a)
         return mean
 
     if len(data) >= k:
-        if NP_ROLL:
+        if VECTORIZED:
+            odata = exponential_moving_average_kernel(data.values, k)
+            return pd.Series(index=data.index, data=odata, name=data.name)
+        elif NP_ROLL:
             odata = rolling_apply(exp_data, k, data.values)
             return pd.Series(index=data.index, data=odata, name=data.name)
         else:
@@ -134,6 +225,37 @@ def standard_deviation(data: pd.Series, k: int) -> pd.Series:
         return pd.Series(index=data.index, data=odata, name=data.name)
 
 
+def variation_kernel(values: np.ndarray, k: int) -> np.ndarray:
+    """
+    variation computed on the whole array with rolling maximum and minimum of
+    the k - 1 values following the first value of each window.
+
+    Parameters
+    ----------
+    values: np.ndarray
+    k: int
+        window size
+
+    Returns
+    -------
+    np.ndarray: NaN for the k - 1 first values, and for all values if k < 2
+    """
+    values = np.asarray(values, dtype=float)
+    odata = np.full(values.shape[0], np.nan)
+    if k < 2 or values.shape[0] < k:
+        return odata
+    first = values[: values.shape[0] - k + 1]
+    maximum = _rolling_extremum(values[1:], k - 1, np.maximum)
+    minimum = _rolling_extremum(values[1:], k - 1, np.minimum)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        max_prct = (maximum - first) * 100 / first
+        min_prct = (minimum - first) * 100 / first
+        odata[k - 1 :] = np.where(
+            np.abs(max_prct) > np.abs(min_prct), max_prct, min_prct
+        )
+    return odata
+
+
 def variation(data: pd.Series, k: int) -> pd.Series:
     """
     function to calculate variation of data on a window of size k
@@ -157,7 +279,10 @@ def variation(data: pd.Series, k: int) -> pd.Series:
             return min_prct
 
     if len(data) >= k:
-        if NP_ROLL:
+        if VECTORIZED:
+            odata = variation_kernel(data.values, k)
+            return pd.Series(index=data.index, data=odata, name=data.name)
+        elif NP_ROLL:
             odata = rolling_apply(var, k, data.values)
             return pd.Series(index=data.index, data=odata, name=data.name)
         else:
@@ -167,6 +292,41 @@ def variation(data: pd.Series, k: int) -> pd.Series:
         return pd.Series(index=data.index, data=odata, name=data.name)
 
 
+def rsi_kernel(values: np.ndarray, k: int) -> np.ndarray:
+    """
+    RSI computed on the whole array with rolling sums of positive and
+    negative differences. NaN differences are ignored, like in the rolling version.
+
+    Parameters
+    ----------
+    values: np.ndarray
+    k: int
+        window size
+
+    Returns
+    -------
+    np.ndarray: NaN for the k - 1 first values
+    """
+    values = np.asarray(values, dtype=float)
+    odata = np.full(values.shape[0], np.nan)
+    if values.shape[0] < k:
+        return odata
+    # a window of k values contains k - 1 differences
+    diff = np.diff(values)
+    with np.errstate(invalid="ignore"):
+        is_higher = diff > 0
+        is_lower = diff < 0
+    n_higher = _rolling_sum(is_higher.astype(np.int64), k - 1)
+    n_lower = _rolling_sum(is_lower.astype(np.int64), k - 1)
+    sum_higher = _rolling_sum(np.where(is_higher, diff, 0), k - 1)
+    sum_lower = _rolling_sum(np.where(is_lower, diff, 0), k - 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        higher = np.where(n_higher > 0, sum_higher / n_higher, 0)
+        lower = np.where(n_lower > 0, sum_lower / n_lower, 0)
+        odata[k - 1 :] = np.where(lower == higher, 100, 100 * higher / (higher - lower))
+    return odata
+
+
 def rsi(data: pd.Series, k: int) -> pd.Series:
     """
     Function to calculate RSI
@@ -202,7 +362,10 @@ def rsi(data: pd.Series, k: int) -> pd.Series:
             return 100 * higher / (higher - lower)
 
     if len(data) >= k:
-        if NP_ROLL:
+        if VECTORIZED:
+            odata = rsi_kernel(data.values, k)
+            return pd.Series(index=data.index, data=odata, name=data.name)
+        elif NP_ROLL:
             odata = rolling_apply(func, k, data.values)
             return pd.Series(index=data.index, data=odata, name=data.name)
         else:
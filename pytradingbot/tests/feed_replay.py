@@ -0,0 +1,126 @@
+"""Local server replaying ticks as a ticker feed, to test TickerFeed offline"""
+
+# =================
+# Python IMPORTS
+# =================
+import json
+import socketserver
+import threading
+import time
+
+# =================
+# Internal IMPORTS
+# =================
+
+# =================
+# Variables
+# =================
+
+
+class FeedReplay:
+    """
+    Ticker feed on localhost (see TickerFeed): ticks of all pairs are sent in time
+    order, with a sequence number by pair from 1, then heartbeats.
+    Faults can be injected: ticks dropped once, ticks lost, connection closed.
+    """
+
+    def __init__(self, ticks: dict, interval: float = 0):
+        """
+        Parameters
+        ----------
+        ticks: dict
+            list of (time, ask, bid, volume) by pair
+        interval: float
+            time between two messages (s)
+        """
+        self.ticks = sorted(
+            (tick[0], pair, seq + 1, tick)
+            for pair, values in ticks.items()
+            for seq, tick in enumerate(values)
+        )
+        self.interval = interval
+        self.dropped = set()  # (pair, seq) not sent the first time
+        self.lost = set()  # (pair, seq) never sent
+        self.disconnect_after = None  # ticks sent before closing a connection, once
+        self.replay_all = False  # ticks sent from the start, "from" ignored
+        self.subscriptions = []  # subscription messages received
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def uri(self) -> str:
+        return f"tcp://127.0.0.1:{self.server.server_address[1]}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._closed.set()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def messages(self, subscription: dict):
+        """Generator of the messages of the feed for a subscription"""
+        params = subscription.get("params", {})
+        pairs = params.get("symbol", [])
+        start = {} if self.replay_all else params.get("from", {})
+        sent = 0
+        for _, pair, seq, tick in self.ticks:
+            if pair not in pairs or seq <= start.get(pair, 0):
+                continue
+            with self._lock:
+                if (pair, seq) in self.lost:
+                    continue
+                if (pair, seq) in self.dropped:
+                    self.dropped.remove((pair, seq))
+                    continue
+                if self.disconnect_after is not None and sent >= self.disconnect_after:
+                    self.disconnect_after = None
+                    return
+            yield {
+                "channel": "ticker",
+                "data": [
+                    {
+                        "symbol": pair,
+                        "seq": seq,
+                        "time": tick[0],
+                        "ask": tick[1],
+                        "bid": tick[2],
+                        "volume": tick[3],
+                    }
+                ],
+            }
+            sent += 1
+        while not self._closed.is_set():
+            time.sleep(0.01)
+            yield {"channel": "heartbeat"}
+
+    def _handler(self):
+        replay = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            """Connection of a client: one subscription, then messages"""
+
+            def handle(self):
+                with replay._lock:
+                    replay.connections += 1
+                line = self.rfile.readline()
+                if len(line) == 0:
+                    return
+                subscription = json.loads(line)
+                with replay._lock:
+                    replay.subscriptions.append(subscription)
+                try:
+                    for message in replay.messages(subscription):
+                        self.wfile.write((json.dumps(message) + "\n").encode())
+                        self.wfile.flush()
+                        time.sleep(replay.interval)
+                except OSError:
+                    pass  # connection closed by the client
+
+        return Handler
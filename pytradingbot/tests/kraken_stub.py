@@ -0,0 +1,119 @@
+"""Local HTTP server answering like the Kraken API, to test the api offline"""
+
+# =================
+# Python IMPORTS
+# =================
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# =================
+# Internal IMPORTS
+# =================
+
+# =================
+# Variables
+# =================
+
+
+class KrakenStub:
+    """
+    Kraken API on localhost: public Ticker from tickers, private methods from private.
+    Use the uri as uri of a krakenex session. All requests are recorded.
+    """
+
+    def __init__(self, tickers: dict = None, private: dict = None):
+        """
+        Parameters
+        ----------
+        tickers: dict
+            (ask, bid, volume) by pair
+        private: dict
+            result by private method
+        """
+        self.tickers = {} if tickers is None else tickers
+        self.private = {} if private is None else private
+        self.requests = []  # (method, parameters)
+        self.connections = 0  # number of TCP connections opened by clients
+        self.delays = {}  # time to answer by method (s)
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def uri(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def count(self, method: str) -> int:
+        """number of requests of a method"""
+        return len([request for request in self.requests if request[0] == method])
+
+    def answer(self, method: str, parameters: dict) -> dict:
+        """Kraken answer of a request"""
+        with self._lock:
+            self.requests.append((method, parameters))
+        time.sleep(self.delays.get(method, 0))
+        if method == "Ticker":
+            pairs = parameters.get("pair", "").split(",")
+            unknown = [pair for pair in pairs if pair not in self.tickers]
+            if len(unknown) > 0:
+                return {"error": ["EQuery:Unknown asset pair"]}
+            return {
+                "error": [],
+                "result": {
+                    pair: {
+                        "a": [str(self.tickers[pair][0]), "1", "1.000"],
+                        "b": [str(self.tickers[pair][1]), "1", "1.000"],
+                        "v": [str(self.tickers[pair][2]), str(self.tickers[pair][2])],
+                    }
+                    for pair in pairs
+                },
+            }
+        if method in self.private:
+            return {"error": [], "result": self.private[method]}
+        return {"error": ["EGeneral:Unknown method"]}
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """Request handler of the stub, connections are kept alive"""
+
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def _send(self, parameters: dict):
+                method = urlparse(self.path).path.split("/")[-1]
+                parameters = {key: value[-1] for key, value in parameters.items()}
+                body = json.dumps(stub.answer(method, parameters)).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                self._send(parse_qs(urlparse(self.path).query))
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self._send(parse_qs(self.rfile.read(length).decode()))
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,142 @@
+"""Module to test backtest functions"""
+
+# =================
+# Python IMPORTS
+# =================
+import numpy as np
+import pandas as pd
+import pytest
+from lxml import etree
+
+# =================
+# Internal IMPORTS
+# =================
+from pytradingbot.utils.backtest import (
+    arrays_to_market,
+    backtest_from_file,
+    backtest_markets,
+    backtest_stream,
+    market_to_arrays,
+    warmup_rows,
+)
+from pytradingbot.utils.market_tools import market_from_file
+
+# =================
+# Variables
+# =================
+TRADING_CONFIG = """<pytradingbot>
+    <analysis>
+        <properties format="name">deriv_EMA_k-20_ask</properties>
+    </analysis>
+    <order>
+        <action type="buy">
+            <condition function="+=" value="0">deriv_EMA_k-20_ask</condition>
+        </action>
+        <action type="sell">
+            <condition function="-=5" value="0">deriv_macd_k-5_long_MA_k-13_ask_short_MA_k-7_ask</condition>
+        </action>
+    </order>
+</pytradingbot>
+"""
+
+
+@pytest.mark.run(order=50)
+def test_market_arrays(market_one_day_path):
+    market = market_from_file(market_one_day_path, fmt="csv")[0]
+    arrays = market_to_arrays(market)
+    assert arrays["time"].dtype == np.int64
+    market_new = arrays_to_market(arrays)
+    for prop in ["ask", "bid", "volume"]:
+        np.testing.assert_array_equal(
+            market_new.find_property_by_name(prop).data.values,
+            market.find_property_by_name(prop).data.values,
+        )
+    assert (market_new.ask.data.index == market.ask.data.index).all()
+
+
+@pytest.mark.run(order=50)
+def test_backtest_markets(inputs_config_path, market_two_days_missingdata_path):
+    markets = market_from_file(market_two_days_missingdata_path, fmt="csv")
+    assert len(markets) == 2
+
+    # reference: each segment simulated in this process, one after the other
+    expected = []
+    for market in markets:
+        market.generate_property_from_xml_config(inputs_config_path)
+        market.generate_order_from_xml_config(inputs_config_path)
+        market.analyse(verbose=False)
+        expected.append(market.order.simulate_trading(imoney=100, fees=0.1, verbose=0))
+
+    for workers in [1, 2]:
+        segments, total = backtest_markets(
+            markets, inputs_config_path, workers=workers, imoney=100, fees=0.1
+        )
+        assert len(segments) == 2
+        assert list(segments["nrows"]) == [len(m.ask.data) for m in markets]
+        for i, (money, win, loose) in enumerate(expected):
+            assert segments["money"].iloc[i] == pytest.approx(money)
+            assert segments["win"].iloc[i] == win
+            assert segments["loose"].iloc[i] == loose
+        assert total["money"] == pytest.approx(
+            100 + sum(result[0] - 100 for result in expected)
+        )
+        assert total["win"] == sum(result[1] for result in expected)
+        assert total["loose"] == sum(result[2] for result in expected)
+
+
+@pytest.mark.run(order=50)
+def test_backtest_from_file(inputs_config_path, market_one_day_path):
+    segments, total = backtest_from_file(
+        market_one_day_path, inputs_config_path, fmt="csv", workers=1
+    )
+    assert isinstance(segments, pd.DataFrame)
+    assert len(segments) == 1
+    assert total["nrows"] == segments["nrows"].iloc[0]
+
+    assert backtest_from_file("wrong_path", inputs_config_path) == (None, None)
+
+
+@pytest.mark.run(order=50)
+def test_warmup_rows(tmp_path, market_one_day_path):
+    config = tmp_path / "config.xml"
+    config.write_text(TRADING_CONFIG)
+    market = market_from_file(market_one_day_path, fmt="csv")[0]
+    market.generate_property_from_xml_config(str(config))
+    market.generate_order_from_xml_config(str(config))
+    # derivative of EMA(20): 19 + 1 rows, macd(5) of MA(13) and its derivative:
+    # 12 + 4 + 1 rows, cross down in the last 5 rows: 6 rows
+    assert warmup_rows(market) == 20 + 6
+
+
+@pytest.mark.run(order=50)
+def test_backtest_stream(tmp_path, monkeypatch, market_two_days_missingdata_path):
+    config = tmp_path / "config.xml"
+    config.write_text(TRADING_CONFIG)
+    expected, expected_total = backtest_from_file(
+        market_two_days_missingdata_path, str(config), workers=1
+    )
+    assert expected_total["win"] + expected_total["loose"] > 0
+    for chunksize in [50, 998, 5000]:
+        segments, total = backtest_stream(
+            market_two_days_missingdata_path, str(config), chunksize=chunksize
+        )
+        assert len(segments) == 2
+        assert list(segments["nrows"]) == list(expected["nrows"])
+        assert (segments["start"] == expected["start"]).all()
+        assert (segments["end"] == expected["end"]).all()
+        np.testing.assert_allclose(segments["money"], expected["money"], rtol=1e-12)
+        assert list(segments["win"]) == list(expected["win"])
+        assert list(segments["loose"]) == list(expected["loose"])
+        assert total["money"] == pytest.approx(expected_total["money"])
+
+    # config read once, not for each chunk
+    calls = []
+    parse = etree.parse
+
+    def counted_parse(*args, **kwargs):
+        calls.append(args[0])
+        return parse(*args, **kwargs)
+
+    monkeypatch.setattr(etree, "parse", counted_parse)
+    backtest_stream(market_two_days_missingdata_path, str(config), chunksize=50)
+    assert len(calls) == 2
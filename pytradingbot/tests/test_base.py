@@ -10,6 +10,8 @@ import pytest
 # Internal IMPORTS
 # =================
 from pytradingbot.iolib.base import BaseApi, APILoadData
+from pytradingbot.utils.read_file import read_csv_market
+from pytradingbot.tests.test_scheduler import FakeClock
 
 # =================
 # Variables
@@ -58,3 +60,67 @@ def test_APILoadData(market_one_day_path):
     api = APILoadData(market_one_day_path, fmt="csv")
     assert len(api.market) == 1
     assert api.market[0].parents["api"] == api
+
+
+class TickApi(BaseApi):
+    """API returning ticks of a file, without order"""
+
+    def __init__(self, input_path: str, data_path: str):
+        super().__init__(input_path=input_path)
+        self.rows = read_csv_market(data_path).iterrows()
+        self.clock = FakeClock()
+        self.sleep = self.clock.sleep
+        self.starts = []  # clock time of queries
+
+    def get_market(self, pair: str = None) -> dict:
+        index, row = next(self.rows)
+        self.starts.append(self.clock.now)
+        self.clock.now += 0.02  # query and analysis time
+        return {"time": index, **row.to_dict()}
+
+
+@pytest.mark.run(order=6)
+def test_run_scheduler(tmp_path, market_one_day_path, caplog):
+    config = tmp_path / "config.xml"
+    config.write_text(
+        "<pytradingbot><trading>"
+        '<refresh overrun="catchup">0.1</refresh>'
+        f'</trading><market><odir format="numpy">{tmp_path}</odir></market>'
+        "</pytradingbot>"
+    )
+    api = TickApi(str(config), market_one_day_path)
+    assert api.overrun == "catchup"
+    api.run(times=6)
+    # refresh is the period, whatever the duration of an iteration
+    assert api.starts == pytest.approx([100 + 0.1 * i for i in range(6)])
+    assert api.clock.now == pytest.approx(100.52)
+    assert api.market.size == 6
+    assert api.scheduler.metrics["ticks"] == 6
+    assert api.scheduler.metrics["overruns"] == 0
+
+    config.write_text(
+        '<pytradingbot><trading><refresh overrun="wrong">1</refresh></trading>'
+        "</pytradingbot>"
+    )
+    api = TickApi(str(config), market_one_day_path)
+    assert api.overrun == "skip"
+    assert "wrong is not an overrun policy" in caplog.text
+
+
+@pytest.mark.run(order=6)
+def test_numpy_chunk_config(tmp_path, caplog):
+    config = tmp_path / "config.xml"
+    odir = f'<odir format="numpy" chunk="{{chunk}}">{tmp_path}</odir>'
+    for chunk, journal, warned in [
+        (100, "", True),
+        (1, "", False),
+        (100, f"<journal>{tmp_path / 'journal.bin'}</journal>", False),
+    ]:
+        caplog.clear()
+        config.write_text(
+            f"<pytradingbot><market>{odir.format(chunk=chunk)}{journal}</market>"
+            "</pytradingbot>"
+        )
+        api = BaseApi(input_path=str(config))
+        assert api.save_chunk == chunk
+        assert ("numpy format without journal" in caplog.text) == warned
@@ -0,0 +1,161 @@
+"""Module to test the cache of balance and open orders"""
+
+# =================
+# Python IMPORTS
+# =================
+import shutil
+
+import pandas as pd
+import pytest
+
+# =================
+# Internal IMPORTS
+# =================
+from pytradingbot.iolib.crypto_api import KrakenApi, KrakenApiDev
+from pytradingbot.tests.kraken_stub import KrakenStub
+from pytradingbot.tests.test_retry import FakeClock
+from pytradingbot.utils.cache import TTLCache
+
+# =================
+# Variables
+# =================
+OPEN_ORDERS = {
+    "open": {
+        "ID1": {"descr": {"type": "buy", "pair": "XXBTZEUR"}},
+        "ID2": {"descr": {"type": "sell", "pair": "XXBTZEUR"}},
+        "ID3": {"descr": {"type": "buy", "pair": "XETHZEUR"}},
+    }
+}
+
+
+@pytest.mark.run(order=2)
+def test_ttl_cache():
+    clock = FakeClock()
+    cache = TTLCache(ttl=5, clock=clock)
+    loads = []
+
+    def load():
+        loads.append(clock.now)
+        return len(loads)
+
+    assert [cache.get("key", load) for _ in range(3)] == [1, 1, 1]
+    clock.now += 4.9
+    assert cache.get("key", load) == 1
+    clock.now += 0.1
+    assert cache.get("key", load) == 2
+    assert cache.get("other", load) == 3
+    cache.invalidate("key")
+    assert cache.get("key", load) == 4
+    assert cache.get("other", load) == 3
+    cache.invalidate()
+    assert cache.get("other", load) == 5
+    assert cache.metrics == {"hits": 4, "misses": 5}
+
+    # a load invalidated before its end is not kept
+    def invalidated():
+        cache.invalidate()
+        return "old"
+
+    assert cache.get("key", invalidated) == "old"
+    assert cache.get("key", load) == 6
+
+    # failed load
+    with pytest.raises(ValueError):
+        cache.get("failed", lambda: int("a"))
+    assert cache.get("failed", lambda: 1) == 1
+
+    # no cache
+    cache = TTLCache(ttl=0, clock=clock)
+    assert cache.get("key", load) == 7
+    assert cache.get("key", load) == 8
+
+
+@pytest.mark.run(order=2)
+def test_cache_kraken_queries(tmp_path):
+    private = {
+        "Balance": {"ZEUR": "10", "XXBT": "1"},
+        "OpenOrders": OPEN_ORDERS,
+        "AddOrder": {"txid": ["ID4"], "descr": {"order": "buy"}},
+        "CancelOrder": {"count": 1},
+    }
+    with KrakenStub(private=private) as stub:
+        config = tmp_path / "config.xml"
+        config.write_text(
+            f'<pytradingbot><trading><cache ttl="60"/></trading>'
+            f'<connection uri="{stub.uri}"/></pytradingbot>'
+        )
+        api = KrakenApi(input_path=str(config))
+        assert api.cache.ttl == 60
+        api.connect()
+        api.session.key, api.session.secret = "key", "c2VjcmV0"
+
+        # one balance and one open orders query by tick
+        assert api.mymoney == 10
+        assert api.balance == {"ZEUR": 10, "XXBT": 1}
+        api.balance["ZEUR"] = 0  # a copy
+        assert api.mymoney == 10
+        assert api.open_orders(type="buy") == ["ID1", "ID3"]
+        assert api.open_orders(pair="XXBTZEUR") == ["ID1", "ID2"]
+        assert api.open_orders() == ["ID1", "ID3", "ID2"]
+        assert stub.count("Balance") == 1 and stub.count("OpenOrders") == 1
+        api.new_tick()
+        assert api.mymoney == 10 and api.open_orders() == ["ID1", "ID3", "ID2"]
+        assert stub.count("Balance") == 2 and stub.count("OpenOrders") == 2
+
+        # orders invalidate the cache
+        for action in [
+            lambda: api.buy(1, 10, pair="XXBTZEUR"),
+            lambda: api.sell(1, 10, pair="XXBTZEUR"),
+            lambda: api.cancel_order_by_id("ID1"),
+        ]:
+            count = stub.count("Balance")
+            action()
+            assert api.mymoney == 10 and len(api.open_orders()) == 3
+            assert stub.count("Balance") == count + 1
+        assert stub.count("OpenOrders") == 5
+        # reads kept by the cache only, the scheduler sends each query of the cache
+        metrics = api.session.scheduler.metrics
+        assert metrics["coalesced"] == 0
+        assert metrics["calls"] == stub.count("Balance") + stub.count("OpenOrders") + 3
+
+
+@pytest.mark.run(order=2)
+def test_cache_dev_balance(tmp_path, monkeypatch, inputs_config_path, balance_path):
+    path = tmp_path / "balance.csv"
+    shutil.copy(balance_path, path)
+    reads = []
+    read_csv = pd.read_csv
+
+    def counted_read_csv(*args, **kwargs):
+        reads.append(args[0])
+        return read_csv(*args, **kwargs)
+
+    monkeypatch.setattr(pd, "read_csv", counted_read_csv)
+    api = KrakenApiDev(input_path=inputs_config_path, balance_path=str(path))
+    money = api.mymoney
+    for _ in range(5):
+        assert api.mymoney == money
+    assert len(reads) == 1
+    api.buy(0.1, 10, pair="XXBTZEUR")
+    assert api.mymoney == pytest.approx(money - 1)
+    assert len(reads) == 2  # buy uses the cache, read after the buy
+    api.sell(0.1, 10, pair="XXBTZEUR")
+    assert api.mymoney == pytest.approx(money)
+    api.new_tick()
+    assert api.mymoney == pytest.approx(money)
+    assert len(reads) == 4
+    # balance file changed by an other process
+    pd.DataFrame(columns=["name", "quantity"], data=[["ZEUR", 1]]).to_csv(
+        path, sep=";", index=False
+    )
+    assert api.mymoney == 1
+    assert len(reads) == 5
+
+    # balance in memory
+    api = KrakenApiDev(input_path=inputs_config_path, imoney=100)
+    assert api.mymoney == 100
+    api.buy(1, 10, pair="XXBTZEUR")
+    assert api.mymoney == 90
+    assert api.balance["XXBTZEUR"] == 1
+    api.balance_dict["ZEUR"] = 0
+    assert api.mymoney == 0
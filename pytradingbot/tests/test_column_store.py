@@ -0,0 +1,73 @@
+"""Module to test columnar storage"""
+
+# =================
+# Python IMPORTS
+# =================
+import numpy as np
+import pandas as pd
+import pytest
+
+# =================
+# Internal IMPORTS
+# =================
+from pytradingbot.utils.column_store import ColumnStore
+
+# =================
+# Variables
+# =================
+
+
+@pytest.mark.run(order=1)
+def test_set_column():
+    index = pd.date_range("2023-01-14", periods=5, freq="min")
+    store = ColumnStore(index, ncolumns=2)
+    assert len(store) == 5
+    assert not store.set_column("a", np.arange(5))
+    assert not store.set_column("b", np.arange(5) * 2)
+    assert "a" in store
+    view = store.series("a")
+    assert view.name == "a"
+    assert (view.index == index).all()
+    np.testing.assert_array_equal(view.values, np.arange(5))
+
+    # overwrite an existing column: views see the new values
+    assert not store.set_column("a", np.arange(5) + 1)
+    np.testing.assert_array_equal(view.values, np.arange(5) + 1)
+
+    # the array grows when a column is added to a full store
+    assert store.set_column("c", np.ones(5))
+    assert store.columns == ["a", "b", "c"]
+    np.testing.assert_array_equal(store.series("b").values, np.arange(5) * 2)
+
+
+@pytest.mark.run(order=1)
+def test_dataframe():
+    index = pd.date_range("2023-01-14", periods=5, freq="min")
+    store = ColumnStore(index)
+    for name in ["a", "b", "c"]:
+        store.set_column(name, np.random.random(5))
+    data = store.dataframe()
+    assert list(data.columns) == ["a", "b", "c"]
+    assert (data.index == index).all()
+    for name in store.columns:
+        assert np.shares_memory(data[name].values, store.series(name).values)
+
+    assert store.is_aligned(data["a"])
+    assert not store.is_aligned(data["a"].iloc[1:])
+    assert not store.is_aligned(data["a"].shift(1, freq="min"))
+
+
+@pytest.mark.run(order=1)
+def test_delete_column():
+    index = pd.date_range("2023-01-14", periods=5, freq="min")
+    store = ColumnStore(index, ncolumns=3)
+    for i, name in enumerate(["a", "b", "c"]):
+        store.set_column(name, np.arange(5) * i)
+    assert not store.delete_column("d")
+    assert not store.delete_column("c")
+    assert store.delete_column("a")
+    assert store.columns == ["b"] and "a" not in store
+    np.testing.assert_array_equal(store.series("b").values, np.arange(5))
+    assert not store.set_column("a", np.ones(5))
+    assert store.columns == ["b", "a"]
+    np.testing.assert_array_equal(store.dataframe()["a"].values, np.ones(5))
@@ -5,15 +5,19 @@ import time
 # =================
 # Python IMPORTS
 # =================
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import pandas as pd
 import pytest
 import krakenex
+import requests
 
 # =================
 # Internal IMPORTS
 # =================
 from pytradingbot.iolib.crypto_api import KrakenApi, KrakenApiDev
+from pytradingbot.iolib.transport import KrakenTransport
+from pytradingbot.tests.kraken_stub import KrakenStub
 
 # =================
 # Variables
@@ -42,6 +46,102 @@ def test_get_market(inputs_config_path):
         assert isinstance(values[key], float)
 
 
+@pytest.mark.run(order=6)
+def test_ticker_batch(inputs_config_path, caplog):
+    tickers = {
+        "XXBTZEUR": (20000.5, 20000.1, 12.5),
+        "XETHZEUR": (1500.2, 1500.0, 300),
+        "XLTCZEUR": (80.3, 80.1, 1000),
+    }
+    with KrakenStub(tickers=tickers) as stub:
+        api = KrakenApi(input_path=inputs_config_path)
+        api.connect()
+        api.session.uri = stub.uri
+
+        values = api.get_market()
+        assert values["ask"] == 20000.5 and values["bid"] == 20000.1
+        assert stub.requests[-1] == ("Ticker", {"pair": "XXBTZEUR"})
+
+        # all pairs in one request
+        values = api.get_markets(list(tickers))
+        assert stub.count("Ticker") == 2
+        assert stub.requests[-1] == ("Ticker", {"pair": "XXBTZEUR,XETHZEUR,XLTCZEUR"})
+        assert list(values) == list(tickers)
+        for pair, (ask, bid, volume) in tickers.items():
+            assert values[pair]["ask"] == ask
+            assert values[pair]["bid"] == bid
+            assert values[pair]["volume"] == volume
+        assert len({value["time"] for value in values.values()}) == 1
+
+        # unknown pair: valid pairs are queried one by one, then without it
+        count = stub.count("Ticker")
+        values = api.get_markets(["XXBTZEUR", "WRONG", "XETHZEUR"])
+        assert list(values) == ["XXBTZEUR", "XETHZEUR"]
+        assert values["XETHZEUR"]["ask"] == 1500.2
+        assert "Unknown asset pair" in caplog.text
+        assert api.unknown_pairs == {"WRONG"}
+        assert stub.count("Ticker") == count + 4
+        values = api.get_markets(["XXBTZEUR", "WRONG", "XETHZEUR"])
+        assert list(values) == ["XXBTZEUR", "XETHZEUR"]
+        assert stub.requests[-1] == ("Ticker", {"pair": "XXBTZEUR,XETHZEUR"})
+        assert stub.count("Ticker") == count + 5
+
+
+@pytest.mark.run(order=6)
+def test_transport_pool(tmp_path):
+    tickers = {f"PAIR{i}": (100 + i, 99 + i, i) for i in range(8)}
+    with KrakenStub(tickers=tickers, private={"Balance": {"ZEUR": "10"}}) as stub:
+        config = tmp_path / "config.xml"
+        config.write_text(
+            f'<pytradingbot><connection uri="{stub.uri}" pool="8">'
+            '<timeout method="Ticker">0.2</timeout><timeout>3</timeout><retry max_elapsed="0"/>'
+            '<ratelimit capacity="100"/>'
+            "</connection></pytradingbot>"
+        )
+        api = KrakenApi(input_path=str(config))
+        assert api.pool_size == 8
+        assert api.timeouts["Ticker"] == 0.2 and api.timeouts["default"] == 3
+        api.connect()
+        session = api.session
+        assert isinstance(session, KrakenTransport)
+        assert isinstance(session, krakenex.API)
+        assert session.timeout("Ticker") == 0.2 and session.timeout("Balance") == 3
+        api.connect()
+        assert api.session is session
+
+        # public and private queries in one kept-alive connection
+        session.key, session.secret = "key", "c2VjcmV0"
+        for _ in range(10):
+            assert api.get_market(pair="PAIR1")["ask"] == 101
+        assert api.balance == {"ZEUR": 10}
+        assert stub.connections == 1
+
+        # concurrent queries: each one gets its own answer
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for _ in range(5):
+                values = list(
+                    executor.map(lambda p: api._query_market(pair=p), tickers)
+                )
+                assert [value["ask"] for value in values] == [100 + i for i in range(8)]
+            balances = list(executor.map(lambda _: api.balance, range(20)))
+            assert balances == [{"ZEUR": 10}] * 20
+            # nonces of private queries are unique, even in the same millisecond
+            list(
+                executor.map(
+                    lambda i: session.query_private("Balance", {"asset": i}), range(20)
+                )
+            )
+        assert stub.connections <= 8
+        nonces = [params["nonce"] for _, params in stub.requests if "nonce" in params]
+        assert len(nonces) == len(set(nonces))
+        assert len(nonces) == stub.count("Balance") >= 21
+
+        # timeout of the Ticker method
+        stub.delays["Ticker"] = 0.5
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            api._query_market(pair="PAIR1")
+
+
 @pytest.mark.run(order=6)
 def test_balance(inputs_config_path, balance_path):
     api = KrakenApi(inputs_config_path)
@@ -92,6 +192,17 @@ def test_calculate_quantity(inputs_config_path):  # Should be in test_base
     assert api.calculate_quantity_buy(10) == 10
     assert api.calculate_quantity_buy(8) == 12.5
 
+    # money of a tick split between pairs
+    api.npairs = 2
+    api.new_tick()
+    assert api.calculate_quantity_buy(10) == 5
+    api.buy(5, 10, pair="XXBTZEUR")
+    assert api.calculate_quantity_buy(10) == 5
+    api.buy(5, 10, pair="XETHZEUR")
+    assert api.mymoney == 0
+    api.new_tick()
+    assert api.calculate_quantity_buy(10) == 0
+
 
 @pytest.mark.run(order=6)
 def test_buy(inputs_config_path, balance_path):
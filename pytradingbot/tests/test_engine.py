@@ -0,0 +1,205 @@
+"""Module to test the asynchronous engine"""
+
+# =================
+# Python IMPORTS
+# =================
+import threading
+import pytest
+
+# =================
+# Internal IMPORTS
+# =================
+from pytradingbot.iolib.base import BaseApi
+from pytradingbot.iolib.crypto_api import KrakenApi
+from pytradingbot.iolib.engine import AsyncEngine
+from pytradingbot.utils.read_file import read_csv_market
+from pytradingbot.tests.kraken_stub import KrakenStub
+from pytradingbot.tests.test_scheduler import FakeClock
+
+# =================
+# Variables
+# =================
+CONFIG = """<pytradingbot>
+    <trading>
+        <symbol>XXBT</symbol>
+        <pair>XXBTZEUR</pair>
+        <pair symbol="XETH">XETHZEUR</pair>
+        <pair>XLTCZEUR</pair>
+        <pair>FAILING</pair>
+        <refresh>0.01</refresh>
+    </trading>
+    <market>
+        <odir format="numpy">{odir}</odir>
+    </market>
+    <analysis>
+        <properties format="name">MA_k-5_ask</properties>
+    </analysis>
+    <order>
+        <action type="buy">
+            <condition function="+=" value="0">deriv_MA_k-5_ask</condition>
+        </action>
+        <action type="sell">
+            <condition function="-=" value="0">deriv_MA_k-5_ask</condition>
+        </action>
+    </order>
+</pytradingbot>
+"""
+
+
+class AsyncClock(FakeClock):
+    """Clock moved by the sleep of the engine"""
+
+    async def sleep(self, delay: float):
+        self.now += delay
+
+
+class PairsApi(BaseApi):
+    """
+    API returning ticks of a file for all pairs. With a barrier, queries of an
+    iteration wait for each other (so they are concurrent) then take delay
+    on the clock.
+    """
+
+    delay = 0.005
+
+    def __init__(self, input_path: str, data_path: str, clock: AsyncClock = None):
+        super().__init__(input_path=input_path)
+        data = read_csv_market(data_path)
+        self.rows = {pair: data.iterrows() for pair in self.pairs}
+        self.calls = []
+        self.clock = clock
+        self.barrier = None
+
+    def get_market(self, pair: str = None) -> dict:
+        if self.barrier is not None and self.barrier.wait(timeout=5) == 0:
+            self.clock.now += self.delay
+        if pair == "FAILING":
+            raise ConnectionError("no market")
+        index, row = next(self.rows[pair])
+        return {"time": index, **row.to_dict()}
+
+    def _get_balance(self) -> dict:
+        return {"ZEUR": 100, "XXBT": 1, "XETH": 2}
+
+    def buy(self, quantity, price, pair: str = None):
+        self.calls.append(("buy", pair))
+
+    def sell(self, quantity, price, pair: str = None):
+        self.calls.append(("sell", pair))
+
+    def open_orders(self, type: str = None, pair: str = None):
+        self.calls.append(("none", pair))
+        return []
+
+
+@pytest.mark.run(order=7)
+def test_engine_pairs(tmp_path, market_one_day_path):
+    config = tmp_path / "config.xml"
+    config.write_text(CONFIG.format(odir=tmp_path / "market"))
+    clock = AsyncClock()
+    api = PairsApi(str(config), market_one_day_path, clock=clock)
+    assert api.pairs == ["XXBTZEUR", "XETHZEUR", "XLTCZEUR", "FAILING"]
+    assert api.symbols["XETHZEUR"] == "XETH"
+    assert api.symbols["XXBTZEUR"] == "XXBT"
+
+    # pairs are queried concurrently: the barrier is broken otherwise
+    api.barrier = threading.Barrier(len(api.pairs))
+    engine = AsyncEngine(api, clock=clock, sleep=clock.sleep)
+    engine.run(times=40)
+    for pair in ["XXBTZEUR", "XETHZEUR", "XLTCZEUR"]:
+        assert engine.markets[pair].size == 40
+        assert engine.errors[pair] == 0
+        assert [call[1] for call in api.calls].count(pair) == 40
+        assert engine.latency[pair] == pytest.approx(api.delay)
+        assert (tmp_path / "market" / pair).is_dir()
+    # iterations on the deadlines of refresh
+    assert clock.now == pytest.approx(100 + 39 * api.refresh + api.delay)
+    assert engine.scheduler.metrics["ticks"] == 40
+    assert engine.scheduler.metrics["overruns"] == 0
+    assert engine.scheduler.metrics["jitter_max"] == 0
+    # a failing pair does not stop other pairs
+    assert engine.errors["FAILING"] == 40
+    assert engine.markets["FAILING"].size == 0
+    assert {call[0] for call in api.calls} == {"buy", "sell", "none"}
+
+    api.barrier = None
+    engine = AsyncEngine(api, pairs=["XETHZEUR"])
+    engine.run(times=1)
+    assert engine.markets["XETHZEUR"].size == 1
+
+
+@pytest.mark.run(order=7)
+def test_engine_analysis(tmp_path, market_one_day_path):
+    config = tmp_path / "config.xml"
+    config.write_text(CONFIG.format(odir=tmp_path / "market"))
+    api = PairsApi(str(config), market_one_day_path)
+    engine = AsyncEngine(api, pairs=["XXBTZEUR", "XETHZEUR"])
+    engine.open()
+
+    # analysis in the pool of threads: a slow pair does not stop other pairs
+    released = threading.Event()
+    waited = []
+    engine.markets["XXBTZEUR"].analyse = lambda: waited.append(released.wait(5))
+    trade = api.trade
+
+    def trade_and_release(market, pair: str = None):
+        trade(market, pair)
+        if pair == "XETHZEUR":
+            released.set()
+
+    api.trade = trade_and_release
+    engine.run(times=1)
+    assert waited == [True]
+
+    # an error of analysis is logged, other pairs go on, markets are saved
+    def failing():
+        raise ValueError("analysis failed")
+
+    persisted = []
+    persist = engine._persist
+    engine._persist = lambda pair, count: persisted.append(pair) or persist(pair, count)
+    engine.markets["XXBTZEUR"].analyse = failing
+    engine.run(times=3)
+    assert engine.errors == {"XXBTZEUR": 3, "XETHZEUR": 0}
+    assert engine.markets["XETHZEUR"].size == 4
+    assert persisted.count("XXBTZEUR") == 3 and persisted.count("XETHZEUR") == 3
+
+    # an unexpected error stops the engine
+    def wrong():
+        raise TypeError("bug in analysis")
+
+    engine.markets["XXBTZEUR"].analyse = wrong
+    with pytest.raises(TypeError):
+        engine.run(times=1)
+
+
+@pytest.mark.run(order=7)
+def test_engine_batch(tmp_path, inputs_config_path):
+    tickers = {"XXBTZEUR": (20000.5, 20000.1, 12.5), "XETHZEUR": (1500.2, 1500, 300)}
+    private = {
+        "Balance": {"ZEUR": "100", "XXBT": "0"},
+        "OpenOrders": {"open": {}},
+        "AddOrder": {"txid": ["ID"], "descr": {"order": "buy"}},
+    }
+    with KrakenStub(tickers=tickers, private=private) as stub:
+        api = KrakenApi(input_path=inputs_config_path)
+        api.connect()
+        api.session.uri = stub.uri
+        api.session.key, api.session.secret = "key", "c2VjcmV0"
+        api.odir = str(tmp_path)
+        api.refresh = 0
+
+        engine = AsyncEngine(api, pairs=list(tickers), batch=True)
+        engine.run(times=3)
+        # one request by iteration for all pairs
+        assert stub.count("Ticker") == 3
+        for pair in tickers:
+            assert engine.errors[pair] == 0
+            assert engine.markets[pair].size == 3
+            assert engine.markets[pair].ask.data.iloc[-1] == tickers[pair][0]
+
+        # an unknown pair does not stop other pairs
+        engine = AsyncEngine(api, pairs=["XXBTZEUR", "WRONG"], batch=True)
+        engine.run(times=2)
+        assert engine.errors == {"XXBTZEUR": 0, "WRONG": 2}
+        assert engine.markets["XXBTZEUR"].size == 2
@@ -0,0 +1,129 @@
+"""Module to test the push feed of market values"""
+
+# =================
+# Python IMPORTS
+# =================
+import socket
+
+import pytest
+
+# =================
+# Internal IMPORTS
+# =================
+from pytradingbot.cores.markets import Market
+from pytradingbot.iolib.feed import TickerFeed
+from pytradingbot.iolib.retry import RetryPolicy
+from pytradingbot.tests.feed_replay import FeedReplay
+
+# =================
+# Variables
+# =================
+START = 1700000000.0  # time of the first tick
+TICKS = {
+    "PAIR1": [(START + i, 100 + i, 99 + i, i) for i in range(20)],
+    "PAIR2": [(START + i + 0.5, 200 + i, 199 + i, i) for i in range(20)],
+}
+
+
+def create_feed(uri: str, pairs: list = None, **kwargs) -> TickerFeed:
+    pairs = list(TICKS) if pairs is None else pairs
+    return TickerFeed(
+        uri,
+        {pair: Market() for pair in pairs},
+        timeout=2,
+        policy=RetryPolicy(base=0.01, max_delay=0.05),
+        **kwargs,
+    )
+
+
+def asks(feed: TickerFeed, pair: str) -> list:
+    return list(feed.markets[pair].ask.data.values)
+
+
+@pytest.mark.run(order=2)
+def test_feed_replay():
+    with FeedReplay(TICKS) as replay:
+        received = []
+        feed = create_feed(
+            replay.uri, on_tick=lambda pair, market: received.append(pair)
+        )
+        feed.run(ticks=40)
+        for pair, ticks in TICKS.items():
+            assert asks(feed, pair) == [tick[1] for tick in ticks]
+            assert feed.markets[pair].size == 20
+            assert feed.seq[pair] == 20
+        assert received == ["PAIR1", "PAIR2"] * 20
+        assert feed.metrics["ticks"] == 40
+        assert feed.metrics["connections"] == 1
+        assert replay.subscriptions == [
+            {
+                "method": "subscribe",
+                "params": {"channel": "ticker", "symbol": list(TICKS)},
+            }
+        ]
+
+        # only subscribed pairs, until stop
+        feed = create_feed(replay.uri, pairs=["PAIR2"])
+        feed.on_tick = lambda pair, market: market.size == 5 and feed.stop()
+        feed.run()
+        assert asks(feed, "PAIR2") == [200, 201, 202, 203, 204]
+
+
+@pytest.mark.run(order=2)
+def test_feed_reconnect():
+    with FeedReplay(TICKS) as replay:
+        replay.disconnect_after = 15
+        feed = create_feed(replay.uri)
+        feed.run(ticks=40)
+        for pair, ticks in TICKS.items():
+            assert asks(feed, pair) == [tick[1] for tick in ticks]
+        assert feed.metrics["connections"] == 2
+        assert feed.metrics["errors"] == 1
+        # subscription again from the last ticks received
+        assert replay.subscriptions[1]["params"]["from"] == {"PAIR1": 8, "PAIR2": 7}
+
+        # ticks sent again are dropped
+        replay.disconnect_after = 10
+        replay.replay_all = True
+        feed = create_feed(replay.uri)
+        feed.run(ticks=40)
+        for pair, ticks in TICKS.items():
+            assert asks(feed, pair) == [tick[1] for tick in ticks]
+        assert feed.metrics["duplicates"] == 10
+
+
+@pytest.mark.run(order=2)
+def test_feed_gaps():
+    with FeedReplay(TICKS) as replay:
+        # tick missing once: filled by a resync
+        replay.dropped = {("PAIR1", 3), ("PAIR2", 10)}
+        feed = create_feed(replay.uri)
+        feed.run(ticks=40)
+        for pair, ticks in TICKS.items():
+            assert asks(feed, pair) == [tick[1] for tick in ticks]
+        assert feed.metrics["resyncs"] == 2
+        assert feed.metrics["gaps"] == 0
+        assert len(replay.subscriptions) == 3
+
+        # ticks never sent: lost after the resync
+        replay.lost = {("PAIR1", 5), ("PAIR1", 6)}
+        feed = create_feed(replay.uri)
+        feed.run(ticks=38)
+        assert asks(feed, "PAIR1") == [
+            tick[1] for seq, tick in enumerate(TICKS["PAIR1"]) if seq + 1 not in [5, 6]
+        ]
+        assert feed.metrics["resyncs"] == 1
+        assert feed.metrics["gaps"] == 1
+        assert feed.metrics["lost"] == 2
+
+
+@pytest.mark.run(order=2)
+def test_feed_unreachable():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    feed = create_feed(f"tcp://127.0.0.1:{port}", retries=2)
+    with pytest.raises(OSError):
+        feed.run(ticks=1)
+    assert feed.metrics["errors"] == 3
+    assert feed.metrics["connections"] == 0
@@ -0,0 +1,57 @@
+"""Module to test the journal of ticks"""
+
+# =================
+# Python IMPORTS
+# =================
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+# =================
+# Internal IMPORTS
+# =================
+from pytradingbot.utils.journal import RECORD, TickJournal
+
+# =================
+# Variables
+# =================
+
+
+@pytest.mark.run(order=1)
+def test_append_and_read(tmp_path):
+    path = str(tmp_path / "journal" / "ticks.bin")
+    times = pd.date_range("2023-01-14", periods=5, freq="min")
+    for fsync in [0, 1, 2]:
+        journal = TickJournal(path, fsync=fsync)
+        for i, time in enumerate(times):
+            journal.append(time.to_pydatetime(), 100.0 + i, 99.0 + i, 1.0)
+        assert len(journal) == 5
+        assert os.path.getsize(path) == 5 * RECORD.itemsize
+        data = journal.dataframe()
+        assert (data.index == times).all()
+        np.testing.assert_array_equal(data["ask"], 100.0 + np.arange(5))
+        np.testing.assert_array_equal(data["bid"], 99.0 + np.arange(5))
+        journal.clear()
+        assert len(journal) == 0
+        journal.close()
+
+
+@pytest.mark.run(order=1)
+def test_recovery(tmp_path):
+    path = str(tmp_path / "ticks.bin")
+    journal = TickJournal(path)
+    journal.append(pd.Timestamp("2023-01-14"), 1.0, 2.0, 3.0)
+    journal.append(pd.Timestamp("2023-01-15"), 4.0, 5.0, 6.0)
+    journal.close()
+    # process stopped while writing a record
+    with open(path, "ab") as ofile:
+        ofile.write(b"\x00" * 10)
+
+    journal = TickJournal(path)
+    assert len(journal) == 2
+    records = journal.read()
+    assert list(records["ask"]) == [1.0, 4.0]
+    journal.append(pd.Timestamp("2023-01-16"), 7.0, 8.0, 9.0)
+    assert list(journal.read()["volume"]) == [3.0, 6.0, 9.0]
+    journal.close()
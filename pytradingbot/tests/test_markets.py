@@ -6,6 +6,7 @@
 from datetime import datetime
 import os
 import shutil
+import numpy as np
 import pandas as pd
 import pytest
 
@@ -14,8 +15,17 @@ import pytest
 # =================
 from pytradingbot.iolib.crypto_api import KrakenApiDev
 from pytradingbot.cores import markets
-from pytradingbot.utils.market_tools import market_from_file
+from pytradingbot.utils.market_tools import (
+    market_from_file,
+    market_from_memmap,
+    split_time_bounds,
+    split_time_df,
+    time_gap_threshold,
+)
 from pytradingbot.cores import properties, orders
+from pytradingbot.utils import read_file
+from pytradingbot.utils.journal import TickJournal
+from pytradingbot.utils.ring_buffer import RingBuffer
 
 # =================
 # Variables
@@ -104,6 +114,148 @@ def test_save_market(inputs_config_path):
         assert len(tmp) == i + 1
 
 
+@pytest.mark.run(order=10)
+def test_numpy_save(tmp_path):
+    times = pd.date_range("2023-01-14 23:50", periods=40, freq="min")
+    market = markets.Market(odir=str(tmp_path), oformat="numpy")
+    market.save_chunk = 8
+    properties.generate_property_by_name("EMA_k-3_ask", market)
+    for i, time in enumerate(times[:30]):
+        market.ask.add_value(index=[time], value=[100.0 + i])
+        market.bid.add_value(index=[time], value=[99.0 + i])
+        market.volume.add_value(index=[time], value=[1.0])
+        market.analyse()
+        if i % 3 == 0:
+            market.save()
+    market.save()
+    market.save()  # nothing new
+    # rows written by chunks of save_chunk rows, and at the end of a day
+    chunks = {
+        day: sorted(os.listdir(tmp_path / day)) for day in ["2023-01-14", "2023-01-15"]
+    }
+    assert len(chunks["2023-01-14"]) == 1
+    assert len(chunks["2023-01-15"]) == 2
+    assert chunks["2023-01-14"][0] == (
+        f"{times[0].value:019d}_{times[9].value:019d}.npy"
+    )
+    assert read_file.read_npy_market(str(tmp_path)).index[-1] < times[29]
+    market.flush()
+    assert len(os.listdir(tmp_path / "2023-01-15")) == 3
+    data = read_file.read_npy_market(str(tmp_path))
+    assert data.index.is_monotonic_increasing
+    pd.testing.assert_frame_equal(
+        data, market.dataframe(), check_freq=False, check_names=False
+    )
+
+    # restart: rows already saved are not saved again
+    market = markets.Market(odir=str(tmp_path), oformat="numpy")
+    for i, time in enumerate(times[25:]):
+        market.ask.add_value(index=[time], value=[125.0 + i])
+        market.bid.add_value(index=[time], value=[124.0 + i])
+        market.volume.add_value(index=[time], value=[1.0])
+    market.save()
+    market.flush()
+    data = read_file.read_npy_market(str(tmp_path / "2023-01-15"))
+    assert len(data) == len(times) - 10
+    assert not data.index.duplicated().any()
+    # chunks with different columns
+    assert data["EMA_k-3_ask"].notnull().sum() == 30 - 10
+    market = market_from_file(str(tmp_path), fmt="numpy")[0]
+    assert len(market.ask.data) == len(times)
+
+    assert read_file.read_npy_market(str(tmp_path / "wrong")) is None
+
+
+class FakeApi:
+    """API returning ticks of a DataFrame, one by call"""
+
+    def __init__(self, data: pd.DataFrame):
+        self.rows = data.iterrows()
+
+    def get_market(self) -> dict:
+        time, row = next(self.rows)
+        return {"time": time, **row.to_dict()}
+
+
+@pytest.mark.run(order=10)
+def test_journal_compact_and_recover(tmp_path, market_one_day_path):
+    data = read_file.read_csv_market(market_one_day_path).iloc[:50]
+    for oformat in ["pandas", "numpy"]:
+        odir = str(tmp_path / oformat)
+        journal = TickJournal(f"{odir}/journal.bin", fsync=0)
+        market = markets.Market(
+            parent=FakeApi(data), odir=odir, oformat=oformat, journal=journal
+        )
+        for i in range(30):
+            market.update()
+            if i == 19:
+                market.compact()
+                assert len(journal) == 0
+        assert len(journal) == 10
+        journal.close()
+
+        # restart: last ticks are restored from the journal
+        journal = TickJournal(f"{odir}/journal.bin")
+        market = markets.Market(
+            parent=FakeApi(data.iloc[30:]), odir=odir, oformat=oformat, journal=journal
+        )
+        assert market.recover() == 10
+        assert market.ask.data.index[0] == data.index[20]
+        market.update()
+        assert len(market.ask.data) == 11
+        market.compact()
+        journal.close()
+
+        if oformat == "pandas":
+            saved = read_file.read_csv_market(f"{odir}/{data.index[0].date()}.dat")
+        else:
+            saved = read_file.read_npy_market(odir)
+        pd.testing.assert_frame_equal(
+            saved, data.iloc[:31], check_freq=False, check_names=False
+        )
+
+
+@pytest.mark.run(order=10)
+def test_journal_compact_properties(tmp_path, market_one_day_path):
+    data = read_file.read_csv_market(market_one_day_path).iloc[:40]
+    for oformat in ["pandas", "numpy"]:
+        odir = str(tmp_path / oformat)
+        journal = TickJournal(f"{odir}/journal.bin", fsync=0)
+        market = markets.Market(
+            parent=FakeApi(data), odir=odir, oformat=oformat, journal=journal
+        )
+        market.set_maximum_rows(10)
+        properties.generate_property_by_name("EMA_k-3_ask", market)
+        for i in range(25):
+            market.update()
+            market.analyse()
+            market.clean()
+        expected = market.dataframe()
+        market.compact()
+        journal.close()
+
+        if oformat == "pandas":
+            saved = read_file.read_csv_market(f"{odir}/{data.index[0].date()}.dat")
+        else:
+            saved = read_file.read_npy_market(odir)
+        # same columns as save, all ticks of the journal
+        assert list(saved.columns) == list(expected.columns)
+        assert (saved.index == data.index[:25]).all()
+        pd.testing.assert_frame_equal(
+            saved[["ask", "bid", "volume"]],
+            data.iloc[:25],
+            check_freq=False,
+            check_names=False,
+        )
+        # ticks removed by clean: raw values only
+        in_market = saved.index.isin(expected.index)
+        assert saved.loc[~in_market, "EMA_k-3_ask"].isnull().all()
+        np.testing.assert_allclose(
+            saved.loc[in_market, "EMA_k-3_ask"].values.astype(float),
+            expected["EMA_k-3_ask"].values.astype(float),
+        )
+
+
 @pytest.mark.run(order=11)
 def test_clean_market(inputs_config_path):
     nsteps = 5
@@ -132,6 +284,30 @@ def test_clean_market(inputs_config_path):
     assert api.market.dataframe().index[-1] == last
 
 
+@pytest.mark.run(order=11)
+def test_market_buffer(market_one_day_path):
+    data = market_from_file(market_one_day_path, fmt="csv")[0].dataframe()
+    market = markets.Market()
+    assert market.ask.buffer.capacity == market.nclean + 1
+
+    # Check memory is bounded by the maximum number of rows
+    for time, row in data.iloc[:400].iterrows():
+        market.ask.add_value(index=[time], value=[row["ask"]])
+        market.bid.add_value(index=[time], value=[row["bid"]])
+        market.volume.add_value(index=[time], value=[row["volume"]])
+    assert len(market.dataframe()) == market.nclean + 1
+    assert market.ask.data.index[-1] == data.index[399]
+    assert market.bid.data.iloc[0] == data["bid"].iloc[400 - market.nclean - 1]
+
+    # Check maximum number of rows is only reduced by clean
+    market.set_maximum_rows(2)
+    assert len(market.dataframe()) == 301
+    market.clean()
+    assert len(market.dataframe()) == 2
+    assert market.ask.buffer.capacity == 3
+    assert market.ask.data.index[-1] == data.index[399]
+
+
 @pytest.mark.run(order=12)
 def test_load_data(
     market_one_day_path,
@@ -198,6 +374,43 @@ def test_split_data(market_two_days_missingdata_path):
         delta = market.dataframe().index.to_series().diff().dt.total_seconds().fillna(0)
         assert delta.max() < 120
 
+    # threshold from the median interval (60s)
+    df_market = market_from_file(market_two_days_missingdata_path, delta="auto")
+    assert [len(market.ask.data) for market in df_market] == [998, 1680]
+
+
+@pytest.mark.run(order=13)
+def test_split_time_df():
+    index = pd.DatetimeIndex(
+        pd.Timestamp("2023-01-01") + pd.to_timedelta([0, 60, 120, 500, 560, 2000], "s")
+    )
+    data = pd.DataFrame({"ask": np.arange(6.0), "bid": np.arange(6.0)}, index=index)
+    np.testing.assert_array_equal(
+        split_time_bounds(index, delta=120), [[0, 3], [3, 5], [5, 6]]
+    )
+    np.testing.assert_array_equal(
+        split_time_bounds(index.asi8, delta=1000), [[0, 5], [5, 6]]
+    )
+    assert time_gap_threshold(index) == 2 * 60
+    assert time_gap_threshold(index, factor=10) == 600
+    assert time_gap_threshold(index[:1]) == np.inf
+    # times with a time zone
+    index_tz = index.tz_localize("Europe/Paris")
+    np.testing.assert_array_equal(
+        split_time_bounds(index_tz, delta=120), [[0, 3], [3, 5], [5, 6]]
+    )
+    assert time_gap_threshold(index_tz) == 2 * 60
+    odata = split_time_df(data.tz_localize("UTC"), delta=120)
+    assert [len(segment) for segment in odata] == [3, 2, 1]
+
+    odata = split_time_df(data, delta=120)
+    assert list(data.columns) == ["ask", "bid"]  # data not modified
+    assert [len(segment) for segment in odata] == [3, 2, 1]
+    assert odata[1].index[0] == index[3]
+    assert np.shares_memory(odata[1]["ask"].values, data["ask"].values)
+    assert [len(segment) for segment in split_time_df(data, delta="auto")] == [3, 2, 1]
+    assert len(split_time_df(data.iloc[:0])) == 1
+
 
 @pytest.mark.run(order=31)
 def test_get_all_child(market_one_day_path):
@@ -217,6 +430,85 @@ def test_get_all_child(market_one_day_path):
     assert isinstance(child[2], properties.VolumeLoad)
 
 
+@pytest.mark.run(order=31)
+def test_properties_graph(inputs_config_path, market_one_day_path):
+    market = market_from_file(market_one_day_path, fmt="csv")[0]
+    market.generate_property_from_xml_config(inputs_config_path)
+
+    # Graph is cached until a property is added
+    graph = market._get_graph()
+    assert market._get_graph() is graph
+    prop = properties.generate_property_by_name("rsi_k-7_ask", market)
+    assert market._get_graph() is not graph
+    assert market.find_property_by_name("rsi_k-7_ask") is prop
+
+    # Each property is after its parents
+    child = market._get_all_child()
+    assert len(child) == len(set(child))
+    for i, prop in enumerate(child):
+        for key, parent in prop.parents.items():
+            if key != "market":
+                assert child.index(parent) < i
+
+    # analyse updates each property once
+    calls = []
+    for prop in child:
+        prop.update = lambda parents=True, prop=prop, update=prop.update: (
+            calls.append(prop) or update(parents=parents)
+        )
+    market.analyse(verbose=False)
+    assert calls == child
+    for prop in child:
+        assert len(prop.data) == len(market.ask.data)
+
+    # Graph is reset when a property is deleted
+    market.delete_properties(child[-1])
+    assert not market.is_property(child[-1])
+    assert len(market._get_all_child()) == len(child) - 1
+
+
+@pytest.mark.run(order=31)
+def test_columnar_market(inputs_config_path, market_one_day_path):
+    market = market_from_file(market_one_day_path, fmt="csv")[0]
+    market_col = market_from_file(market_one_day_path, fmt="csv", columnar=True)[0]
+    for mkt in [market, market_col]:
+        mkt.generate_property_from_xml_config(inputs_config_path)
+        mkt.generate_order_from_xml_config(inputs_config_path)
+        mkt.analyse(verbose=False)
+    assert market_col.size == len(market_col.ask.data)
+
+    data = market.dataframe()
+    data_col = market_col.dataframe()
+    pd.testing.assert_frame_equal(data, data_col)
+    # properties and dataframe are views on the same array
+    assert len(market_col.frame.columns) == len(market_col._get_all_child())
+    for prop in market_col._get_all_child():
+        assert np.shares_memory(prop.data.values, data_col.values)
+    pd.testing.assert_series_equal(market.order.data, market_col.order.data)
+
+    # a property added after is stored at its first update
+    prop = properties.generate_property_by_name("rsi_k-7_ask", market_col)
+    market_col.analyse(verbose=False)
+    assert "rsi_k-7_ask" in market_col.frame
+    assert "rsi_k-7_ask" in market_col.dataframe().columns
+
+    # deleted properties are removed from the storage, dataframe is still a view
+    deleted = market_col.find_property_by_name("EMA_k-20_ask")
+    assert len(deleted.child) > 0
+    market_col.delete_properties(deleted)
+    assert "EMA_k-20_ask" not in market_col.frame
+    assert "deriv_EMA_k-20_ask" not in market_col.frame
+    assert len(market_col.frame.columns) == len(market_col._get_all_child())
+    data_col = market_col.dataframe()
+    assert np.shares_memory(market_col.ask.data.values, data_col.values)
+    market.delete_properties(market.find_property_by_name("EMA_k-20_ask"))
+    market.analyse(verbose=False)
+    market_col.analyse(verbose=False)
+    pd.testing.assert_frame_equal(
+        market.dataframe(), data_col.drop(columns="rsi_k-7_ask"), check_like=True
+    )
+
+
 @pytest.mark.run(order=32)
 def test_analyse(market_one_day_path):
     market = market_from_file(market_one_day_path, fmt="csv")[0]
@@ -328,3 +620,92 @@ def test_generate_order_from_xml_config(inputs_config_path, market_one_day_path)
     assert len(market.order.child) == 1
     assert isinstance(market.order.child[0], orders.ActionBuy)
     assert len(market.order.child[0].child) == 2
+
+
+@pytest.mark.run(order=30)
+def test_market_from_memmap(tmp_path, market_two_days_missingdata_path):
+    store_dir = str(tmp_path / "store")
+    list_market = market_from_memmap(
+        market_two_days_missingdata_path, fmt="csv", store_dir=store_dir
+    )
+    expected = market_from_file(market_two_days_missingdata_path, fmt="csv")
+    assert len(list_market) == len(expected) == 2
+    for market, market_ref in zip(list_market, expected):
+        for prop in ["ask", "bid", "volume"]:
+            data = market.find_property_by_name(prop).data
+            assert isinstance(data.values, np.memmap)
+            pd.testing.assert_series_equal(
+                data,
+                market_ref.find_property_by_name(prop).data,
+                check_names=False,
+                check_freq=False,
+            )
+        market.analyse(verbose=False)
+
+    # the store is not converted again
+    mtime = os.path.getmtime(f"{store_dir}/time.npy")
+    list_market = market_from_memmap(
+        market_two_days_missingdata_path, fmt="csv", store_dir=store_dir
+    )
+    assert os.path.getmtime(f"{store_dir}/time.npy") == mtime
+    assert len(list_market) == 2
+
+    assert market_from_memmap("wrong_path") is None
+
+
+@pytest.mark.run(order=30)
+def test_market_data_not_aliased():
+    market = markets.Market()
+    market.set_maximum_rows(5)
+    moving_average = properties.MovingAverage(
+        market=market, parent={"data": market.ask}, param={"k": 3}
+    )
+    market.add_child(moving_average)
+    times = pd.date_range("2023-01-01", periods=12, freq="min")
+    for i, time in enumerate(times[:6]):
+        market.update({"time": time, "ask": float(i), "bid": float(i), "volume": 1.0})
+    market.analyse()
+    data = market.dataframe()
+    ask = market.ask.data
+    average = moving_average.data
+    # more rows than the capacity of buffers
+    for i, time in enumerate(times[6:]):
+        market.update({"time": time, "ask": 10.0 + i, "bid": 0.0, "volume": 1.0})
+    for held in [data, ask, average]:
+        assert (held.index == times[:6]).all()
+        assert held.index.is_monotonic_increasing
+    np.testing.assert_array_equal(data["ask"].values, np.arange(6))
+    np.testing.assert_array_equal(ask.values, np.arange(6))
+    np.testing.assert_array_equal(average.values[2:], np.arange(1, 5))
+
+
+@pytest.mark.run(order=30)
+def test_market_buffer_copies(monkeypatch):
+    market = markets.Market()
+    market.set_maximum_rows(100)
+    moving_average = properties.MovingAverage(
+        market=market, parent={"data": market.ask}, param={"k": 3}
+    )
+    market.add_child(moving_average)
+    copies = []
+    series = RingBuffer.series
+
+    def counted_series(self, name: str = None):
+        copies.append(name)
+        return series(self, name=name)
+
+    monkeypatch.setattr(RingBuffer, "series", counted_series)
+    times = pd.date_range("2023-01-01", periods=10, freq="min")
+    for i, time in enumerate(times):
+        market.update({"time": time, "ask": float(i), "bid": float(i), "volume": 1.0})
+        copies.clear()
+        # rows, times and last value are read without a copy
+        assert market.size == i + 1
+        assert market.ask.index[-1] == time
+        assert market.ask.last == i
+        market.clean()
+        assert copies == []
+        # the copy of data is built once after a row is written
+        market.analyse()
+        assert market.ask.data is market.ask.data
+        assert copies.count("ask") == 1
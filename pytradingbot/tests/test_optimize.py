@@ -0,0 +1,100 @@
+"""Module to test optimization of orders"""
+
+# =================
+# Python IMPORTS
+# =================
+import copy
+import numpy as np
+import pytest
+
+# =================
+# Internal IMPORTS
+# =================
+from pytradingbot.cores import orders
+from pytradingbot.utils.market_tools import market_from_file
+from pytradingbot.utils.optimize import replace_k, sweep_orders
+
+# =================
+# Variables
+# =================
+
+ACTIONS = [
+    {
+        "type": "buy",
+        "conditions": [
+            {"function": "+=", "value": 0.0, "property": "deriv_EMA_k-7_ask"}
+        ],
+    },
+    {
+        "type": "sell",
+        "conditions": [
+            {"function": "-=", "value": 0.0, "property": "deriv_EMA_k-7_ask"},
+            {"function": ">", "value": 0.0, "property": "rsi_k-14_ask"},
+        ],
+    },
+]
+
+
+@pytest.mark.run(order=50)
+def test_replace_k():
+    assert replace_k("EMA_k-7_ask", 12) == "EMA_k-12_ask"
+    assert replace_k("deriv_EMA_k-7_ask", 5) == "deriv_EMA_k-5_ask"
+    assert (
+        replace_k("macd_k-5_long_MA_k-13_ask_short_MA_k-7_ask", 9)
+        == "macd_k-9_long_MA_k-13_ask_short_MA_k-7_ask"
+    )
+
+
+@pytest.mark.run(order=50)
+def test_sweep_orders(market_one_day_path):
+    market = market_from_file(market_one_day_path, fmt="csv")[0]
+    table = sweep_orders(
+        market,
+        ACTIONS,
+        values={(0, 0): [-1.0, 0.0], (1, 1): [30.0, 50.0]},
+        k={(0, 0): [5, 7]},
+        batch_size=3,
+    )
+    assert len(table) == 8
+    assert list(table.columns) == [
+        "value_0_0",
+        "value_1_1",
+        "property_0_0",
+        "money",
+        "win",
+        "loose",
+    ]
+    assert (np.diff(table["money"]) <= 0).all()
+    assert (table["win"] + table["loose"] > 0).any()
+
+    # same results than a simulation of each combination
+    for _, row in table.iterrows():
+        market_ref = market_from_file(market_one_day_path, fmt="csv")[0]
+        actions = copy.deepcopy(ACTIONS)
+        actions[0]["conditions"][0]["value"] = row["value_0_0"]
+        actions[0]["conditions"][0]["property"] = row["property_0_0"]
+        actions[1]["conditions"][1]["value"] = row["value_1_1"]
+        for action in actions:
+            market_ref.order.add_child(
+                orders.generate_action_from_dict(action, market=market_ref)
+            )
+        market_ref.analyse(verbose=False)
+        money, win, loose = market_ref.order.simulate_trading(verbose=0)
+        assert row["money"] == pytest.approx(money)
+        assert (row["win"], row["loose"]) == (win, loose)
+
+    # random combinations
+    table = sweep_orders(
+        market, ACTIONS, values={(1, 1): [10.0, 30.0, 50.0, 70.0]}, nsamples=2, seed=0
+    )
+    assert len(table) == 2
+    assert table["value_1_1"].nunique() == 2
+
+
+@pytest.mark.run(order=50)
+def test_sweep_orders_from_file(inputs_config_path, market_one_day_path):
+    market = market_from_file(market_one_day_path, fmt="csv")[0]
+    table = sweep_orders(market, inputs_config_path, values={(0, 0): [0.0, 1.0]})
+    assert len(table) == 2
+    # no sell action in the config file: no trade
+    assert (table["money"] == 0).all()
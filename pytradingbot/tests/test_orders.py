@@ -11,6 +11,7 @@ import pandas as pd
 # Internal IMPORTS
 # =================
 from pytradingbot.utils.market_tools import market_from_file
+from pytradingbot.cores import orders
 from pytradingbot.cores.orders import (
     ConditionUpper,
     ConditionLower,
@@ -20,11 +21,18 @@ from pytradingbot.cores.orders import (
     ConditionCrossDown,
     ConditionCrossDown5,
     ConditionCrossDown10,
+    ConditionCrossUpN,
+    ConditionCrossDownN,
     ActionBuy,
     ActionSell,
     Order,
     generate_condition_from_dict,
     generate_action_from_dict,
+    cross_up_last_n,
+    cross_down_last_n,
+    trade_positions,
+    simulate_orders,
+    TradingSimulation,
 )
 
 
@@ -160,6 +168,37 @@ def test_condition_cross_down_last_ten(market_one_day_path):
     assert condition.data.sum() == 10 - 1
 
 
+@pytest.mark.run(order=42)
+def test_cross_last_n():
+    rng = np.random.default_rng(0)
+    data = pd.Series(rng.normal(size=500).cumsum())
+    for function, cross in [(cross_up_last_n, "up"), (cross_down_last_n, "down")]:
+        mask = (data >= 0) & (data.shift(1) < 0)
+        if cross == "down":
+            mask = (data <= 0) & (data.shift(1) > 0)
+        for n in [0, 1, 7, 1000]:
+            expected = np.zeros(len(data), dtype=bool)
+            for i in np.flatnonzero(mask.values):
+                expected[i : i + n + 1] = True
+            odata = function(data, 0, n=n)
+            assert (odata.index == data.index).all()
+            np.testing.assert_array_equal(odata.values, expected)
+    assert len(cross_up_last_n(data.iloc[:1], 0)) == 1
+
+
+@pytest.mark.run(order=42)
+def test_condition_cross_last_n(market_one_day_path):
+    market = market_from_file(market_one_day_path, fmt="csv")[0]
+    index = market.ask.data.index
+    market.ask.data = pd.Series(data=np.arange(len(index)), index=index)
+    condition = ConditionCrossUpN(market.ask, 10, n=3)
+    condition.update()
+    assert condition.data.sum() == 3 + 1
+    condition = ConditionCrossDownN(market.ask, 10, n=3)
+    condition.update()
+    assert condition.data.sum() == 0
+
+
 @pytest.mark.run(order=43)
 def test_action_add_child(market_one_day_path, caplog):
     market = market_from_file(market_one_day_path, fmt="csv")[0]
@@ -312,6 +351,13 @@ def test_generate_condition(market_one_day_path, caplog):
     assert isinstance(condition, ConditionCrossDown5)
     assert condition.value == 0
     assert condition.parent.name == "EMA_k-12_ask"
+    # test ConditionCrossUpN and ConditionCrossDownN
+    for function, cls in [("+=3", ConditionCrossUpN), ("-=20", ConditionCrossDownN)]:
+        condition_dict = {"value": 0, "function": function, "property": "EMA_k-12_ask"}
+        condition = generate_condition_from_dict(condition_dict, market=market)
+        assert isinstance(condition, cls)
+        assert condition.n == int(function[2:])
+        assert condition.parent.name == "EMA_k-12_ask"
 
 
 @pytest.mark.run(order=47)
@@ -363,3 +409,58 @@ def test_simulate_trading(market_one_day_path):
     gain, win, loose = result
     assert gain != 0 and -100 < gain < 100
     assert win + loose in range(int(len(index) / 4) - 1, int(len(index) / 4) + 2)
+
+
+@pytest.mark.run(order=49)
+def test_trade_positions():
+    buy, sell = trade_positions(np.array([1, -1, 1, 1, 0, -1, -1, 1, 0]))
+    np.testing.assert_array_equal(buy, [2, 7])
+    np.testing.assert_array_equal(sell, [5])
+    buy, sell = trade_positions(np.array([0, -1, 0, 1, -1]))
+    np.testing.assert_array_equal(buy, [3])
+    np.testing.assert_array_equal(sell, [4])
+    buy, sell = trade_positions(np.zeros(5, dtype=int))
+    assert len(buy) == 0 and len(sell) == 0
+
+
+@pytest.mark.run(order=49)
+def test_simulate_trading_parity(market_one_day_path):
+    market = market_from_file(market_one_day_path, fmt="csv")[0]
+    market.analyse()
+    rng = np.random.default_rng(0)
+    for imoney, min_order_per_day in [(100, 0), (100, 500), (1000, 0), (-1, 0)]:
+        market.order.data[:] = rng.choice([-1, 0, 0, 0, 1], len(market.order.data))
+        results = []
+        for vectorized in [True, False]:
+            orders.VECTORIZED = vectorized
+            results.append(
+                market.order.simulate_trading(
+                    imoney=imoney,
+                    fees=0.1,
+                    cost_no_action=100,
+                    min_order_per_day=min_order_per_day,
+                    verbose=0,
+                )
+            )
+        orders.VECTORIZED = True
+        assert results[0][0] == pytest.approx(results[1][0], rel=1e-12)
+        assert results[0][1:] == results[1][1:]
+
+
+@pytest.mark.run(order=49)
+def test_trading_simulation_chunks():
+    rng = np.random.default_rng(1)
+    nrows = 500
+    ask = 100 + rng.normal(0, 1, nrows).cumsum()
+    bid = ask - rng.uniform(0, 0.5, nrows)
+    for _ in range(20):
+        order = rng.choice([-1, 0, 0, 0, 1], nrows)
+        money, win, loose = simulate_orders(order[None, :], ask, bid, 100, 0.1, 100)
+        simulation = TradingSimulation(imoney=100, fees=0.1)
+        bounds = np.sort(rng.choice(np.arange(1, nrows), 5, replace=False))
+        for start, stop in zip(np.r_[0, bounds], np.r_[bounds, nrows]):
+            simulation.feed(order[start:stop], ask[start:stop], bid[start:stop])
+        result = simulation.result(cost_no_action=100)
+        assert simulation.nrows == nrows
+        assert result[0] == pytest.approx(money[0], rel=1e-12)
+        assert result[1:] == (win[0], loose[0])
@@ -3,13 +3,14 @@
 # =================
 # Python IMPORTS
 # =================
+import numpy as np
 import pandas as pd
 import pytest
 
 # =================
 # Internal IMPORTS
 # =================
-from pytradingbot.cores import properties
+from pytradingbot.cores import properties, markets
 from pytradingbot.properties_functions import functions
 from pytradingbot.utils.market_tools import market_from_file
 
@@ -175,6 +176,30 @@ def test_exponential_moving_average(market_one_day_path):
     assert len(data.data) == 0
 
 
+@pytest.mark.run(order=16)
+def test_exponential_moving_average_kernel(market_one_day_path):
+    market = market_from_file(market_one_day_path, fmt="csv")[0]
+    deriv = functions.derivative(market.ask.data)  # first value is NaN
+    np_roll = functions.NP_ROLL
+
+    # Check parity between the vectorized kernel and the rolling function
+    for values in [market.ask.data, deriv]:
+        for k in [1, 7, 50]:
+            functions.VECTORIZED = True
+            data_vec = functions.exponential_moving_average(values, k)
+            functions.VECTORIZED = False
+            functions.NP_ROLL = True
+            data_roll = functions.exponential_moving_average(values, k)
+            pd.testing.assert_series_equal(data_vec, data_roll, rtol=1e-9)
+    functions.VECTORIZED = True
+    functions.NP_ROLL = np_roll
+
+    # Check window larger than data
+    odata = functions.exponential_moving_average_kernel(market.ask.data.values[:5], 7)
+    assert len(odata) == 5
+    assert pd.isnull(odata).all()
+
+
 @pytest.mark.run(order=17)
 def test_standard_deviation(market_one_day_path):
     # Init
@@ -277,6 +302,31 @@ def test_variation(market_one_day_path):
     assert len(data.data) == 0
 
 
+@pytest.mark.run(order=18)
+def test_variation_kernel(market_one_day_path):
+    market = market_from_file(market_one_day_path, fmt="csv")[0]
+    deriv = functions.derivative(market.ask.data)  # first value is NaN
+    np_roll = functions.NP_ROLL
+
+    # Check parity between the vectorized kernel and the rolling function
+    for values in [market.ask.data, deriv]:
+        for k in [2, 3, 7, 50]:
+            functions.VECTORIZED = True
+            data_vec = functions.variation(values, k)
+            functions.VECTORIZED = False
+            functions.NP_ROLL = True
+            data_roll = functions.variation(values, k)
+            pd.testing.assert_series_equal(data_vec, data_roll, rtol=1e-9)
+    functions.VECTORIZED = True
+    functions.NP_ROLL = np_roll
+
+    # Check maximum and minimum selection
+    odata = functions.variation_kernel([10, 12, 9, 10, 5, 11, 11], 3)
+    assert pd.isnull(odata[:2]).all()
+    np.testing.assert_allclose(odata[2:], [20, -25, -400 / 9, -50, 120])
+    assert pd.isnull(functions.variation_kernel([10, 12, 9], 1)).all()
+
+
 @pytest.mark.run(order=19)
 def test_rsi(market_one_day_path):
     # Init
@@ -326,6 +376,34 @@ def test_rsi(market_one_day_path):
     assert len(data.data) == 0
 
 
+@pytest.mark.run(order=19)
+def test_rsi_kernel(market_one_day_path):
+    market = market_from_file(market_one_day_path, fmt="csv")[0]
+    deriv = functions.derivative(market.ask.data)  # first value is NaN
+    np_roll = functions.NP_ROLL
+
+    # Check parity between the vectorized kernel and the rolling function
+    for values in [market.ask.data, deriv]:
+        for k in [1, 2, 7, 50]:
+            functions.VECTORIZED = True
+            data_vec = functions.rsi(values, k)
+            functions.VECTORIZED = False
+            functions.NP_ROLL = True
+            data_roll = functions.rsi(values, k)
+            pd.testing.assert_series_equal(data_vec, data_roll, rtol=1e-9)
+    functions.VECTORIZED = True
+    functions.NP_ROLL = np_roll
+
+    # Check constant values: no higher nor lower differences
+    odata = functions.rsi_kernel([1.0] * 10, 7)
+    assert pd.isnull(odata[:6]).all()
+    assert (odata[6:] == 100).all()
+
+    # Check only lower differences
+    odata = functions.rsi_kernel(list(range(10, 0, -1)), 7)
+    assert (odata[6:] == 0).all()
+
+
 @pytest.mark.run(order=20)
 def test_macd(market_one_day_path):
     # Init
@@ -454,6 +532,90 @@ def test_bollinger(market_one_day_path):
     assert len(data.data) == 0
 
 
+@pytest.mark.run(order=21)
+def test_incremental_update(market_one_day_path):
+    names = [
+        "deriv_EMA_k-20_ask",
+        "std_k-10_ask",
+        "variation_k-7_ask",
+        "rsi_k-7_ask",
+        "macd_k-5_long_MA_k-13_ask_short_MA_k-7_ask",
+        "bollinger_k-2_data_ask_mean_MA_k-10_ask_std_std_k-10_ask",
+    ]
+    # Reference: all rows calculated at once
+    market_load = market_from_file(market_one_day_path, fmt="csv")[0]
+    for name in names + ["EMA_k-7_ask"]:
+        properties.generate_property_by_name(name, market_load)
+    market_load.analyse(verbose=False)
+    data = market_load.dataframe()
+
+    # Market updated row by row, then by chunks of rows
+    market = markets.Market()
+    market.set_maximum_rows(len(data))
+    for name in names:
+        properties.generate_property_by_name(name, market)
+    full = properties.generate_property_by_name("EMA_k-7_ask", market)
+    full.incremental = False
+    calls = []
+    ema = market.find_property_by_name("EMA_k-20_ask")
+    function = ema._function
+    ema._function = lambda nrows=None: calls.append(nrows) or function(nrows=nrows)
+    istart = 0
+    for iend in list(range(1, 40)) + list(range(40, len(data), 100)) + [len(data)]:
+        chunk = data.iloc[istart:iend]
+        market.ask.add_value(index=chunk.index, value=chunk["ask"].values)
+        market.bid.add_value(index=chunk.index, value=chunk["bid"].values)
+        market.volume.add_value(index=chunk.index, value=chunk["volume"].values)
+        market.analyse()
+        istart = iend
+
+    # Only the new rows (and the window before) are calculated
+    assert calls[:20] == [None] * 20
+    assert calls[20:40] == [1 + 19] * 20
+    assert calls[40] == 100 + 19
+    for name in names + ["EMA_k-20_ask", "EMA_k-7_ask", "MA_k-10_ask"]:
+        prop = market.find_property_by_name(name)
+        assert len(prop.data) == len(data)
+        np.testing.assert_allclose(
+            prop.data.values.astype(float),
+            market_load.find_property_by_name(name).data.values.astype(float),
+            rtol=1e-6,
+        )
+
+
+@pytest.mark.run(order=21)
+def test_incremental_update_clean(market_one_day_path, inputs_config_path):
+    data = market_from_file(market_one_day_path, fmt="csv")[0].dataframe()
+    market = markets.Market()
+    market.set_maximum_rows(50)
+    market.generate_property_from_xml_config(inputs_config_path)
+    for i in range(160):  # 3 cleans
+        market.update(
+            {
+                "time": data.index[i],
+                "ask": data["ask"].iloc[i],
+                "bid": data["bid"].iloc[i],
+                "volume": data["volume"].iloc[i],
+            }
+        )
+        market.analyse()
+        # Reference: all rows of the market calculated at once
+        market_load = markets.MarketLoad(
+            market.ask.data, market.bid.data, market.volume.data
+        )
+        market_load.generate_property_from_xml_config(inputs_config_path)
+        market_load.analyse(verbose=False)
+        for prop in market._get_all_child():
+            expected = market_load.find_property_by_name(prop.name).data
+            np.testing.assert_allclose(
+                pd.to_numeric(prop.data, errors="coerce").values.astype(float),
+                pd.to_numeric(expected, errors="coerce").values.astype(float),
+                rtol=1e-6,
+                err_msg=f"{prop.name} at row {i}",
+            )
+        market.clean()
+
+
 @pytest.mark.run(order=22)
 def test_generate_derivative_by_name(market_one_day_path):
     market = market_from_file(market_one_day_path, fmt="csv")[0]
@@ -0,0 +1,173 @@
+"""Module to test the scheduler of private queries"""
+
+# =================
+# Python IMPORTS
+# =================
+import threading
+import time
+
+import pytest
+
+# =================
+# Internal IMPORTS
+# =================
+from pytradingbot.iolib.crypto_api import KrakenApi
+from pytradingbot.iolib.ratelimit import PrivateScheduler
+from pytradingbot.iolib.retry import RetryPolicy
+from pytradingbot.iolib.transport import KrakenTransport
+from pytradingbot.tests.kraken_stub import KrakenStub
+from pytradingbot.tests.test_retry import FakeClock
+
+# =================
+# Variables
+# =================
+
+
+@pytest.mark.run(order=2)
+def test_ratelimit_bucket():
+    clock = FakeClock()
+    scheduler = PrivateScheduler(capacity=3, rate=1, clock=clock, sleep=clock.sleep)
+    for _ in range(5):
+        scheduler.acquire("Balance")
+    assert clock.sleeps == pytest.approx([1, 1])
+    assert scheduler.counter == pytest.approx(3)
+    # the counter decreases with time
+    clock.now += 2
+    scheduler.acquire("Ledgers")
+    assert clock.sleeps == pytest.approx([1, 1])
+    scheduler.acquire("Ledgers")
+    assert clock.sleeps == pytest.approx([1, 1, 2])
+    # orders do not increase the counter
+    scheduler.acquire("AddOrder")
+    assert clock.sleeps == pytest.approx([1, 1, 2])
+    metrics = scheduler.metrics
+    assert metrics["queries"] == 8
+    assert metrics["wait_max"] == pytest.approx(2)
+    assert metrics["wait_mean"] == pytest.approx(4 / 8)
+
+    for capacity, rate in [(0, 1), (3, 0), (3, -1)]:
+        with pytest.raises(ValueError):
+            PrivateScheduler(capacity=capacity, rate=rate)
+
+
+@pytest.mark.run(order=2)
+def test_ratelimit_coalesce():
+    clock = FakeClock()
+    scheduler = PrivateScheduler(clock=clock, sleep=clock.sleep)
+    sent = []
+
+    def send():
+        sent.append(1)
+        return len(sent)
+
+    def query(method, data=None):
+        return scheduler.call(method, data or {}, send)
+
+    # reads in flight are coalesced
+    started, release = threading.Event(), threading.Event()
+
+    def blocked():
+        started.set()
+        release.wait(5)
+        return send()
+
+    results = []
+    owner = threading.Thread(
+        target=lambda: results.append(scheduler.call("Balance", {}, blocked))
+    )
+    owner.start()
+    started.wait(5)
+    threads = [
+        threading.Thread(target=lambda: results.append(query("Balance")))
+        for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    while scheduler.metrics["coalesced"] < 2:
+        time.sleep(0.001)
+    release.set()
+    for thread in [owner, *threads]:
+        thread.join()
+    assert results == [1, 1, 1]
+
+    # results are not kept after the query
+    assert [query("Balance") for _ in range(2)] == [2, 3]
+    assert query("OpenOrders", {"trades": True}) == 4
+    query("AddOrder")
+    assert scheduler.metrics["calls"] == 7
+    assert scheduler.metrics["coalesced"] == 2
+
+    # a failed read is done again
+    def failing():
+        raise ValueError("failed")
+
+    with pytest.raises(ValueError):
+        scheduler.call("TradeBalance", {}, failing)
+    assert scheduler.call("TradeBalance", {}, lambda: "ok") == "ok"
+
+
+@pytest.mark.run(order=2)
+def test_ratelimit_kraken_queries(tmp_path):
+    with KrakenStub(private={"Balance": {"ZEUR": "10"}, "AddOrder": {}}) as stub:
+        stub.delays["Balance"] = 0.5
+        transport = KrakenTransport(
+            key="key",
+            secret="c2VjcmV0",
+            uri=stub.uri,
+            policy=RetryPolicy(max_elapsed=0),
+            scheduler=PrivateScheduler(),
+        )
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(transport.query_private("Balance"))
+            )
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(results) == 4
+        assert all(result["result"] == {"ZEUR": "10"} for result in results)
+        assert stub.count("Balance") == 1
+        assert transport.scheduler.metrics["coalesced"] == 3
+
+        transport.query_private("AddOrder", {"pair": "XXBTZEUR"})
+        transport.query_private("Balance")
+        assert stub.count("Balance") == 2
+
+        # queue of queries waiting for the counter
+        stub.delays["Balance"] = 0
+        transport.scheduler = PrivateScheduler(capacity=1, rate=20)
+        threads = [
+            threading.Thread(
+                target=transport.query_private, args=("Balance", {"asset": str(i)})
+            )
+            for i in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert stub.count("Balance") == 6
+        assert transport.scheduler.metrics["max_depth"] > 1
+        assert transport.scheduler.metrics["depth"] == 0
+
+    # rate limit from config
+    config = tmp_path / "config.xml"
+    config.write_text(
+        '<pytradingbot><connection><ratelimit capacity="20" rate="0.5" wrong="1"/>'
+        "</connection></pytradingbot>"
+    )
+    api = KrakenApi(input_path=str(config))
+    assert api.ratelimit == {"capacity": 20, "rate": 0.5}
+    api.connect()
+    assert api.session.scheduler.capacity == 20
+    assert api.session.scheduler.rate == 0.5
+    # a rate which is not positive is not used
+    config.write_text(
+        '<pytradingbot><connection><ratelimit capacity="20" rate="0"/>'
+        "</connection></pytradingbot>"
+    )
+    assert KrakenApi(input_path=str(config)).ratelimit == {"capacity": 20}
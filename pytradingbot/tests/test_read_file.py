@@ -3,6 +3,8 @@
 # =================
 # Python IMPORTS
 # =================
+import logging
+import os
 import pytest
 import pandas as pd
 
@@ -50,6 +52,24 @@ def test_read_action_config(inputs_config_path, caplog):
         assert isinstance(condition["property"], str)
 
 
+@pytest.mark.run(order=3)
+def test_read_action_config_cross_last_n(tmp_path, caplog):
+    path = tmp_path / "config.xml"
+    path.write_text(
+        "<pytradingbot><order><action type='buy'>"
+        "<condition function='+=3' value='0'>EMA_k-7_ask</condition>"
+        "<condition function='-=12' value='0'>EMA_k-7_ask</condition>"
+        "<condition function='=3' value='0'>EMA_k-7_ask</condition>"
+        "</action></order></pytradingbot>"
+    )
+    actions = read_file.read_input_order_config(str(path))
+    assert [condition["function"] for condition in actions[0]["conditions"]] == [
+        "+=3",
+        "-=12",
+    ]
+    assert "Unknown function" in caplog.text
+
+
 @pytest.mark.run(order=3)
 def test_read_csv_market(market_one_day_path, caplog):
     df = read_file.read_csv_market(market_one_day_path)
@@ -85,3 +105,21 @@ def test_read_list_market(
     df = read_file.read_list_market("toto")
     assert df is None
     assert "market is not loaded" in caplog.text
+
+
+@pytest.mark.run(order=4)
+def test_read_list_market_parallel(tmp_path, market_two_days_path, caplog):
+    directory = os.path.dirname(market_two_days_path)
+    path = tmp_path / "market.list"
+    # files in reverse order, with duplicated rows
+    path.write_text(
+        f"DIR = {directory}\nXXBTZEUR_2days.dat\nXXBTZEUR_1day.dat\n"
+        f"XXBTZEUR_2days.dat\n"
+    )
+    with caplog.at_level(logging.INFO):
+        df = read_file.read_list_market(str(path), workers=3)
+    assert caplog.text.count(" read in ") == 3
+    assert df.index.is_monotonic_increasing
+    assert not df.index.duplicated().any()
+    df_ref = read_file.read_csv_market(market_two_days_path)
+    pd.testing.assert_frame_equal(df, df_ref)
@@ -0,0 +1,212 @@
+"""Module to test the retry policy of API queries"""
+
+# =================
+# Python IMPORTS
+# =================
+import pytest
+import requests
+
+# =================
+# Internal IMPORTS
+# =================
+from pytradingbot.iolib.crypto_api import KrakenApi
+from pytradingbot.iolib.retry import CircuitOpenError, RetryPolicy
+from pytradingbot.iolib.transport import KrakenTransport
+
+# =================
+# Variables
+# =================
+
+
+class FakeClock:
+    """Clock moved by sleep"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, delay: float):
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+class FailingQuery:
+    """Query failing a number of times, then returning ok"""
+
+    def __init__(self, failures: float):
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self) -> str:
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise requests.exceptions.ConnectionError("connection refused")
+        return "ok"
+
+
+class FakeResponse:
+    def __init__(self, result: dict, status_code: int = 200):
+        self.result = result
+        self.status_code = status_code
+
+    def json(self, **kwargs) -> dict:
+        return {"error": [], "result": self.result}
+
+    def raise_for_status(self):
+        raise requests.exceptions.HTTPError(f"{self.status_code} error", response=self)
+
+
+class FakeSession:
+    """HTTP session failing a number of times by method, then answering result"""
+
+    def __init__(self, failures: dict, result: dict, status: dict = None):
+        self.failures = failures
+        self.result = result
+        self.status = {} if status is None else status  # HTTP status by method
+        self.requests = []  # (method, data)
+
+    def _answer(self, url: str, data: dict) -> FakeResponse:
+        method = url.split("/")[-1]
+        self.requests.append((method, dict(data)))
+        if self.failures.get(method, 0) > 0:
+            self.failures[method] -= 1
+            if method in self.status:
+                return FakeResponse(self.result, status_code=self.status[method])
+            raise requests.exceptions.ReadTimeout("read timeout")
+        return FakeResponse(self.result)
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        return self._answer(url, params)
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        return self._answer(url, data)
+
+
+def fake_policy(**kwargs) -> (RetryPolicy, FakeClock):
+    clock = FakeClock()
+    return RetryPolicy(clock=clock, sleep=clock.sleep, seed=0, **kwargs), clock
+
+
+@pytest.mark.run(order=2)
+def test_retry_backoff():
+    policy, clock = fake_policy(base=1, factor=2, max_delay=5, max_failures=10)
+    query = FailingQuery(5)
+    assert policy.call(query) == "ok"
+    assert query.calls == 6
+    assert len(clock.sleeps) == 5
+    for retry, delay in enumerate(clock.sleeps):
+        assert 0 <= delay <= min(5, 2**retry)
+    assert len(set(clock.sleeps)) == 5  # jitter
+    assert policy.metrics == {
+        "calls": 1,
+        "attempts": 6,
+        "retries": 5,
+        "failures": 5,
+        "giveups": 0,
+        "rejected": 0,
+        "opened": 0,
+        "state": "closed",
+    }
+
+    # no retry after max_elapsed
+    policy, clock = fake_policy(base=1, max_elapsed=10, max_failures=100)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        policy.call(FailingQuery(float("inf")))
+    assert clock.now <= 10
+    assert policy.counters["giveups"] == 1
+
+    # query without retry
+    policy, clock = fake_policy()
+    query = FailingQuery(1)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        policy.call(query, retry=False)
+    assert query.calls == 1
+    assert policy.call(query, retry=False) == "ok"
+
+    # other errors are not retried
+    policy, clock = fake_policy()
+    with pytest.raises(KeyError):
+        policy.call({}.__getitem__, "key")
+    assert policy.counters["attempts"] == 1 and policy.counters["failures"] == 0
+
+
+@pytest.mark.run(order=2)
+def test_retry_circuit_breaker():
+    policy, clock = fake_policy(max_failures=3, reset_timeout=30)
+    query = FailingQuery(4)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        policy.call(query)
+    assert query.calls == 3
+    assert policy.state == "open"
+
+    # open: query not sent
+    with pytest.raises(CircuitOpenError):
+        policy.call(query)
+    assert query.calls == 3
+    assert policy.counters["rejected"] == 1
+
+    # half-open: one query, circuit opened again if it fails
+    clock.now += 30
+    with pytest.raises(requests.exceptions.ConnectionError):
+        policy.call(query)
+    assert query.calls == 4
+    assert policy.state == "open"
+    with pytest.raises(CircuitOpenError):
+        policy.call(query)
+
+    # half-open: circuit closed if it succeeds
+    clock.now += 30
+    assert policy.call(query) == "ok"
+    assert policy.state == "closed"
+    assert policy.metrics["opened"] == 2
+    assert policy.metrics["rejected"] == 2
+
+
+@pytest.mark.run(order=2)
+def test_retry_kraken_queries(tmp_path):
+    policy, clock = fake_policy(max_failures=10)
+    transport = KrakenTransport(key="key", secret="c2VjcmV0", policy=policy)
+    transport.session = FakeSession(
+        failures={"Ticker": 2, "Balance": 2, "AddOrder": 1}, result={"ZEUR": "1"}
+    )
+
+    assert transport.query_public("Ticker", {"pair": "XXBTZEUR"})["result"]
+    assert transport.query_private("Balance")["result"] == {"ZEUR": "1"}
+    nonces = [data["nonce"] for method, data in transport.session.requests[3:]]
+    assert len(nonces) == 3 and len(set(nonces)) == 3  # new nonce by try
+    # a new order is not sent twice
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        transport.query_private("AddOrder", {"pair": "XXBTZEUR"})
+    assert [request[0] for request in transport.session.requests].count("AddOrder") == 1
+    assert policy.counters["retries"] == 4
+
+    # HTTP errors: client errors are not retried, nor counted by the circuit
+    policy, clock = fake_policy(max_failures=3)
+    transport = KrakenTransport(key="key", secret="c2VjcmV0", policy=policy)
+    transport.session = FakeSession(
+        failures={"Balance": 3, "Ticker": 2},
+        result={"ZEUR": "1"},
+        status={"Balance": 403, "Ticker": 429},
+    )
+    for _ in range(3):
+        with pytest.raises(requests.exceptions.HTTPError, match="403"):
+            transport.query_private("Balance")
+    assert clock.sleeps == [] and policy.state == "closed"
+    assert policy.counters["failures"] == 0
+    assert transport.query_public("Ticker", {"pair": "XXBTZEUR"})["result"]
+    assert len(clock.sleeps) == 2 and policy.counters["retries"] == 2
+
+    # retry parameters from config
+    config = tmp_path / "config.xml"
+    config.write_text(
+        '<pytradingbot><connection><retry max_failures="2" base="0.1" wrong="1"/>'
+        "</connection></pytradingbot>"
+    )
+    api = KrakenApi(input_path=str(config))
+    assert api.retry == {"max_failures": 2, "base": 0.1}
+    api.connect()
+    assert api.session.policy.max_failures == 2
+    assert api.session.policy.base == 0.1
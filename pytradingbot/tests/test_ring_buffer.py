@@ -0,0 +1,89 @@
+"""Module to test ring buffer"""
+
+# =================
+# Python IMPORTS
+# =================
+import numpy as np
+import pandas as pd
+import pytest
+
+# =================
+# Internal IMPORTS
+# =================
+from pytradingbot.utils.ring_buffer import RingBuffer
+
+# =================
+# Variables
+# =================
+
+
+@pytest.mark.run(order=1)
+def test_append():
+    buffer = RingBuffer(3)
+    assert len(buffer) == 0
+    assert len(buffer.series()) == 0
+
+    for i in range(5):
+        buffer.append(i, i * 10)
+        assert len(buffer) == min(i + 1, 3)
+        assert buffer.times[-1] == i
+        assert buffer.values[-1] == i * 10
+    np.testing.assert_array_equal(buffer.times, [2, 3, 4])
+    np.testing.assert_array_equal(buffer.values, [20, 30, 40])
+
+    with pytest.raises(ValueError):
+        RingBuffer(0)
+
+
+@pytest.mark.run(order=1)
+def test_extend():
+    buffer = RingBuffer(4)
+    buffer.extend([0, 1, 2], [0.0, 1.0, 2.0])
+    np.testing.assert_array_equal(buffer.values, [0, 1, 2])
+    buffer.extend([3, 4, 5], [3.0, 4.0, 5.0])
+    np.testing.assert_array_equal(buffer.times, [2, 3, 4, 5])
+    np.testing.assert_array_equal(buffer.values, [2, 3, 4, 5])
+
+    # more rows than capacity
+    buffer.extend(np.arange(10), np.arange(10) * 2)
+    np.testing.assert_array_equal(buffer.times, [6, 7, 8, 9])
+    np.testing.assert_array_equal(buffer.values, [12, 14, 16, 18])
+
+
+@pytest.mark.run(order=1)
+def test_keep_and_resize():
+    buffer = RingBuffer(4)
+    buffer.extend(np.arange(6), np.arange(6))
+    buffer.keep(2)
+    np.testing.assert_array_equal(buffer.values, [4, 5])
+    buffer.append(6, 6)
+    np.testing.assert_array_equal(buffer.values, [4, 5, 6])
+
+    buffer.resize(10)
+    assert buffer.capacity == 10
+    np.testing.assert_array_equal(buffer.values, [4, 5, 6])
+    buffer.resize(2)
+    np.testing.assert_array_equal(buffer.values, [5, 6])
+
+    buffer.clear()
+    assert len(buffer) == 0
+
+
+@pytest.mark.run(order=1)
+def test_series():
+    buffer = RingBuffer(3)
+    times = pd.date_range("2023-01-14", periods=5, freq="min")
+    for time, value in zip(times, range(5)):
+        buffer.append(time.value, value)
+    data = buffer.series(name="ask")
+    assert data.name == "ask"
+    assert isinstance(data.index, pd.DatetimeIndex)
+    assert (data.index == times[-3:]).all()
+    np.testing.assert_array_equal(data.values, [2, 3, 4])
+    # the series is a copy: not changed by the next rows
+    assert not np.shares_memory(data.values, buffer.values)
+    for time in pd.date_range(times[-1], periods=5, freq="min")[1:]:
+        buffer.append(time.value, -1)
+    assert (data.index == times[-3:]).all()
+    assert data.index.is_monotonic_increasing
+    np.testing.assert_array_equal(data.values, [2, 3, 4])
@@ -0,0 +1,85 @@
+"""Module to test the tick scheduler"""
+
+# =================
+# Python IMPORTS
+# =================
+import pytest
+
+# =================
+# Internal IMPORTS
+# =================
+from pytradingbot.utils.scheduler import TickScheduler
+
+# =================
+# Variables
+# =================
+
+
+class FakeClock:
+    """Clock moved by sleep and by the work of ticks"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, delay: float):
+        self.now += delay
+
+
+def run_ticks(scheduler: TickScheduler, clock: FakeClock, works: list) -> list:
+    """Run ticks with a work duration each, return start time of ticks"""
+    starts = []
+    for work in works:
+        scheduler.tick()
+        starts.append(clock.now)
+        clock.now += work
+        scheduler.wait()
+    return starts
+
+
+@pytest.mark.run(order=1)
+def test_scheduler_without_drift():
+    clock = FakeClock()
+    scheduler = TickScheduler(5, clock=clock, sleep=clock.sleep)
+    starts = run_ticks(scheduler, clock, [1.3] * 100)
+    # ticks are on deadlines whatever the work duration
+    assert starts == pytest.approx([100 + 5 * i for i in range(100)])
+    assert scheduler.metrics == {
+        "ticks": 100,
+        "overruns": 0,
+        "skipped": 0,
+        "jitter_mean": 0.0,
+        "jitter_max": 0.0,
+    }
+
+
+@pytest.mark.run(order=1)
+def test_scheduler_overrun():
+    works = [1, 12, 1, 1, 1]
+    clock = FakeClock()
+    scheduler = TickScheduler(5, policy="skip", clock=clock, sleep=clock.sleep)
+    starts = run_ticks(scheduler, clock, works)
+    # the tick at 105 ends at 117: deadlines 110 and 115 are skipped, phase is kept
+    assert starts == [100, 105, 120, 125, 130]
+    assert scheduler.overruns == 1
+    assert scheduler.skipped == 2
+
+    clock = FakeClock()
+    scheduler = TickScheduler(5, policy="catchup", clock=clock, sleep=clock.sleep)
+    starts = run_ticks(scheduler, clock, works)
+    # late ticks are done without waiting until the scheduler is on time
+    assert starts == [100, 105, 117, 118, 120]
+    assert scheduler.overruns == 2
+    assert scheduler.skipped == 0
+    assert scheduler.metrics["jitter_max"] == 7
+    assert scheduler.metrics["jitter_mean"] == pytest.approx((7 + 3) / 5)
+
+    clock = FakeClock()
+    scheduler = TickScheduler(0, clock=clock, sleep=clock.sleep)
+    assert run_ticks(scheduler, clock, works) == [100, 101, 113, 114, 115]
+    assert scheduler.overruns == 0
+
+    with pytest.raises(ValueError):
+        TickScheduler(5, policy="wrong")
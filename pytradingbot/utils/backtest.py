@@ -0,0 +1,335 @@
+"""
+Module to backtest a configuration on loaded markets
+"""
+
+# =================
+# Python IMPORTS
+# =================
+from concurrent.futures import ProcessPoolExecutor
+import logging
+import numpy as np
+import pandas as pd
+
+# =================
+# Internal IMPORTS
+# =================
+from pytradingbot.cores.markets import MarketLoad
+from pytradingbot.cores.orders import TradingSimulation
+from pytradingbot.utils.market_tools import market_from_file, time_gap_threshold
+from pytradingbot.utils.read_file import (
+    read_input_analysis_config,
+    read_input_order_config,
+    read_market_chunks,
+)
+
+# =================
+# Variables
+# =================
+
+
+def market_to_arrays(market: MarketLoad) -> dict:
+    """
+    Function to get the values of a market as NumPy arrays (cheap to send to a process)
+
+    Parameters
+    ----------
+    market: MarketLoad
+
+    Returns
+    -------
+    dict: with keys time (int64 nanoseconds), ask, bid and volume
+    """
+    return {
+        "time": pd.DatetimeIndex(market.ask.data.index).asi8,
+        "ask": np.asarray(market.ask.data.values, dtype=float),
+        "bid": np.asarray(market.bid.data.values, dtype=float),
+        "volume": np.asarray(market.volume.data.values, dtype=float),
+    }
+
+
+def arrays_to_market(arrays: dict, columnar: bool = False) -> MarketLoad:
+    """
+    Function to create a market from arrays of market_to_arrays
+
+    Parameters
+    ----------
+    arrays: dict
+        with keys time (int64 nanoseconds), ask, bid and volume
+    columnar: bool
+        store properties of the market in one array (see MarketLoad)
+
+    Returns
+    -------
+    MarketLoad
+    """
+    index = pd.DatetimeIndex(arrays["time"].view("datetime64[ns]"), name="time")
+    return MarketLoad(
+        pd.Series(arrays["ask"], index=index, name="ask"),
+        pd.Series(arrays["bid"], index=index, name="bid"),
+        pd.Series(arrays["volume"], index=index, name="volume"),
+        columnar=columnar,
+    )
+
+
+def backtest_segment(arrays: dict, config: str, **kwargs) -> dict:
+    """
+    Function to backtest a configuration on one market segment:
+    properties and order are generated from the config, the market is analysed
+    and the trading is simulated
+
+    Parameters
+    ----------
+    arrays: dict
+        market values, see market_to_arrays
+    config: str
+        path of the xml input file
+    kwargs:
+        arguments of Order.simulate_trading
+
+    Returns
+    -------
+    dict: with keys start, end, nrows, money, win, loose
+    """
+    market = arrays_to_market(arrays, columnar=True)
+    market.generate_property_from_xml_config(config)
+    market.generate_order_from_xml_config(config)
+    market.analyse(verbose=False)
+    kwargs.setdefault("verbose", 0)
+    money, win, loose = market.order.simulate_trading(**kwargs)
+    index = market.ask.data.index
+    return {
+        "start": index[0],
+        "end": index[-1],
+        "nrows": len(index),
+        "money": money,
+        "win": win,
+        "loose": loose,
+    }
+
+
+def backtest_markets(
+    markets: list, config: str, workers: int = None, imoney: float = 100, **kwargs
+) -> (pd.DataFrame, dict):
+    """
+    Function to backtest a configuration on several market segments in parallel.
+    Each segment is simulated independently with the initial money.
+
+    Parameters
+    ----------
+    markets: list
+        list of MarketLoad objects
+    config: str
+        path of the xml input file
+    workers: int
+        number of processes, segments are backtested in this process if 1.
+        If None, number of processors
+    imoney: float
+        initial money of each segment
+    kwargs:
+        other arguments of Order.simulate_trading
+
+    Returns
+    -------
+    pd.DataFrame: results by segment, columns start, end, nrows, money, win, loose
+    dict: overall results, money is imoney plus the gain of all segments
+    """
+    kwargs["imoney"] = imoney
+    arrays = [market_to_arrays(market) for market in markets]
+    if workers == 1 or len(arrays) <= 1:
+        results = [backtest_segment(array, config, **kwargs) for array in arrays]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(backtest_segment, array, config, **kwargs)
+                for array in arrays
+            ]
+            results = [future.result() for future in futures]
+
+    columns = ["start", "end", "nrows", "money", "win", "loose"]
+    segments = pd.DataFrame(results, columns=columns)
+    total = {
+        "nrows": int(segments["nrows"].sum()),
+        "money": imoney + float((segments["money"] - imoney).sum()),
+        "win": int(segments["win"].sum()),
+        "loose": int(segments["loose"].sum()),
+    }
+    return segments, total
+
+
+def backtest_from_file(
+    ifile: str, config: str, fmt: str = "csv", workers: int = None, **kwargs
+) -> (pd.DataFrame, dict):
+    """
+    Function to backtest a configuration on all segments of a market file
+
+    Parameters
+    ----------
+    ifile: str
+        path of the market file
+    config: str
+        path of the xml input file
+    fmt: str
+        format of ifile: should be in ['csv', 'list']
+    workers: int
+        number of processes, see backtest_markets
+    kwargs:
+        arguments of Order.simulate_trading
+
+    Returns
+    -------
+    pd.DataFrame: results by segment
+    dict: overall results
+    """
+    markets = market_from_file(ifile, fmt=fmt)
+    if markets is None:
+        logging.warning(f"market is not loaded from {ifile}, no backtest")
+        return None, None
+    return backtest_markets(markets, config, workers=workers, **kwargs)
+
+
+def warmup_rows(market: MarketLoad) -> int:
+    """
+    Function to get the number of previous rows needed to calculate
+    properties and conditions of the order of a market on one row
+
+    Parameters
+    ----------
+    market: MarketLoad
+        market with properties and order
+
+    Returns
+    -------
+    int: number of rows
+    """
+    # rows needed by a property, including rows needed by its parents
+    lookback = {}
+    for prop in market._get_all_child():  # each property is after its parents
+        parents = [value for key, value in prop.parents.items() if key != "market"]
+        lookback[prop] = (
+            prop.window
+            - 1
+            + max([lookback.get(parent, 0) for parent in parents], default=0)
+        )
+    # conditions compare a row to previous rows (cross up, cross down)
+    condition_rows = [
+        getattr(condition, "n", 0) + 1
+        for action in market.order.child
+        for condition in action.child
+    ]
+    return max(lookback.values(), default=0) + max(condition_rows, default=1)
+
+
+def backtest_stream(
+    ifile: str,
+    config: str,
+    fmt: str = "csv",
+    chunksize: int = 10000,
+    delta: [float, str] = 120,
+    imoney: float = 100,
+    fees: float = 0.1,
+    cost_no_action: float = 100,
+    min_order_per_day: float = 0,
+) -> (pd.DataFrame, dict):
+    """
+    Function to backtest a configuration on a market file read by chunks,
+    memory is proportional to the chunk size and not to the file size.
+    The market is split in segments as in market_from_file, properties of a chunk
+    are calculated with the last rows of the previous chunk (see warmup_rows),
+    then the trading is simulated on rows of the chunk.
+
+    Parameters
+    ----------
+    ifile: str
+        path of the market file
+    config: str
+        path of the xml input file
+    fmt: str
+        format of ifile: should be in ['csv', 'list']
+    chunksize: int
+        number of rows read at once
+    delta: float or str
+        maximum second between two points of a segment (see split_time_df),
+        with "auto" it is defined from the first chunk
+    imoney, fees, cost_no_action, min_order_per_day:
+        arguments of Order.simulate_trading
+
+    Returns
+    -------
+    pd.DataFrame: results by segment, columns start, end, nrows, money, win, loose
+    dict: overall results, money is imoney plus the gain of all segments
+    """
+    results = []
+    segment = None  # current segment: simulation, first and last time, tail
+    nwarmup = None
+    # config read once, properties and order are generated for each chunk
+    analysis = read_input_analysis_config(config)
+    actions = read_input_order_config(config)
+
+    def close(segment: dict):
+        money, win, loose = segment["simulation"].result(cost_no_action)
+        ndays = (segment["end"] - segment["start"]).total_seconds() / 3600 / 24
+        if win + loose <= min_order_per_day * ndays:
+            money += (win + loose) - (min_order_per_day * ndays)
+        results.append(
+            {
+                "start": segment["start"],
+                "end": segment["end"],
+                "nrows": segment["simulation"].nrows,
+                "money": money,
+                "win": win,
+                "loose": loose,
+            }
+        )
+
+    for chunk in read_market_chunks(ifile, fmt=fmt, chunksize=chunksize):
+        chunk = chunk[["ask", "bid", "volume"]]
+        times = chunk.index.asi8
+        if delta == "auto":
+            delta = time_gap_threshold(times)
+        # split the chunk when timedelta is too high, also with the previous chunk
+        gaps = np.flatnonzero(np.diff(times) > delta * 10**9) + 1
+        if segment is not None and times[0] - segment["end"].value > delta * 10**9:
+            gaps = np.concatenate([[0], gaps])
+        bounds = np.concatenate([[0], gaps, [len(times)]])
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            if start == stop:
+                close(segment)
+                segment = None
+                continue
+            if start > 0:
+                close(segment)
+                segment = None
+            part = chunk.iloc[start:stop]
+            if segment is None:
+                segment = {
+                    "simulation": TradingSimulation(imoney=imoney, fees=fees),
+                    "start": part.index[0],
+                    "tail": part.iloc[:0],
+                }
+            data = pd.concat([segment["tail"], part], axis=0)
+            market = MarketLoad(data["ask"], data["bid"], data["volume"])
+            market.generate_property_from_config(analysis)
+            market.generate_order_from_config(actions)
+            market.analyse(verbose=False)
+            if nwarmup is None:
+                nwarmup = warmup_rows(market)
+            nrows = len(part)
+            segment["simulation"].feed(
+                market.order.data.values[-nrows:],
+                np.asarray(part["ask"].values, dtype=float),
+                np.asarray(part["bid"].values, dtype=float),
+            )
+            segment["end"] = part.index[-1]
+            segment["tail"] = data.iloc[len(data) - min(nwarmup, len(data)) :]
+    if segment is not None:
+        close(segment)
+
+    columns = ["start", "end", "nrows", "money", "win", "loose"]
+    segments = pd.DataFrame(results, columns=columns)
+    total = {
+        "nrows": int(segments["nrows"].sum()),
+        "money": imoney + float((segments["money"] - imoney).sum()),
+        "win": int(segments["win"].sum()),
+        "loose": int(segments["loose"].sum()),
+    }
+    return segments, total
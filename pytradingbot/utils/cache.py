@@ -0,0 +1,94 @@
+"""module with a cache of values expiring after a time to live"""
+
+# =================
+# Python IMPORTS
+# =================
+import threading
+import time
+
+# =================
+# Internal IMPORTS
+# =================
+
+# =================
+# Variables
+# =================
+
+
+class TTLCache:
+    """
+    Cache of values by key, loaded at the first get and kept during ttl seconds.
+    Values should be invalidated when they change (ex: balance after an order).
+    A failed load is not kept, nor a load invalidated before its end.
+    Private reads of KrakenApi are kept only here: its PrivateScheduler coalesces
+    queries in flight, without keeping results.
+    """
+
+    def __init__(self, ttl: float = 5, clock=time.monotonic):
+        """
+        Parameters
+        ----------
+        ttl: float
+            time to live of values (s), values are not kept if 0
+        clock: callable
+            monotonic clock in seconds
+        """
+        self.ttl = ttl
+        self.clock = clock
+        self._values = {}  # (value, time of load) by key
+        self._lock = threading.Lock()
+        self._generation = 0  # increased by each invalidation
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, load):
+        """
+        Method to get a value, loaded if not in cache or expired
+
+        Parameters
+        ----------
+        key: hashable
+            key of the value
+        load: callable
+            function without argument returning the value
+
+        Returns
+        -------
+        value of the key
+        """
+        with self._lock:
+            if key in self._values:
+                value, loaded = self._values[key]
+                if self.clock() - loaded < self.ttl:
+                    self.hits += 1
+                    return value
+            self.misses += 1
+            generation = self._generation
+        loaded = self.clock()
+        value = load()
+        with self._lock:
+            if generation == self._generation:
+                self._values[key] = (value, loaded)
+        return value
+
+    def invalidate(self, key=None):
+        """
+        Method to remove a value from the cache
+
+        Parameters
+        ----------
+        key: hashable
+            key of the value, all values if None
+        """
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._values = {}
+            else:
+                self._values.pop(key, None)
+
+    @property
+    def metrics(self) -> dict:
+        """hits and misses of the cache"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
@@ -0,0 +1,151 @@
+"""module with a columnar storage of time series sharing one index"""
+
+# =================
+# Python IMPORTS
+# =================
+import numpy as np
+import pandas as pd
+
+# =================
+# Internal IMPORTS
+# =================
+
+# =================
+# Variables
+# =================
+
+
+class ColumnStore:
+    """
+    Columns of float64 values sharing one index, stored in a single
+    preallocated 2D array (Fortran order, so each column is contiguous).
+    Columns and the DataFrame of all columns are returned as views.
+    """
+
+    def __init__(self, index: pd.Index, ncolumns: int = 16):
+        """
+        Parameters
+        ----------
+        index: pd.Index
+            index shared by all columns
+        ncolumns: int
+            number of columns preallocated, doubled when it is not enough
+        """
+        self.index = index
+        self.columns: list = []
+        self._position: dict = {}
+        self._values = np.full((len(index), max(ncolumns, 1)), np.nan, order="F")
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._position
+
+    def is_aligned(self, data: pd.Series) -> bool:
+        """
+        Check if a series has the index of the store (first and last rows only)
+
+        Parameters
+        ----------
+        data: pd.Series
+
+        Returns
+        -------
+        Bool
+        """
+        if len(data) != len(self.index):
+            return False
+        if len(data) == 0:
+            return True
+        return data.index[0] == self.index[0] and data.index[-1] == self.index[-1]
+
+    def set_column(self, name: str, values: np.ndarray) -> bool:
+        """
+        Write values in a column, the column is added if it does not exist
+
+        Parameters
+        ----------
+        name: str
+            column name
+        values: np.ndarray
+            values, same size as the index
+
+        Returns
+        -------
+        Bool: True if the array was reallocated (previous views are not valid anymore)
+        """
+        grown = False
+        if name not in self._position:
+            if len(self.columns) == self._values.shape[1]:
+                values_new = np.full(
+                    (len(self.index), 2 * self._values.shape[1]), np.nan, order="F"
+                )
+                values_new[:, : self._values.shape[1]] = self._values
+                self._values = values_new
+                grown = True
+            self._position[name] = len(self.columns)
+            self.columns.append(name)
+        self._values[:, self._position[name]] = values
+        return grown
+
+    def delete_column(self, name: str) -> bool:
+        """
+        Remove a column, next columns are moved to keep columns contiguous
+
+        Parameters
+        ----------
+        name: str
+            column name
+
+        Returns
+        -------
+        Bool: True if columns were moved (previous views are not valid anymore)
+        """
+        if name not in self._position:
+            return False
+        position = self._position.pop(name)
+        self.columns.remove(name)
+        ncolumns = len(self.columns)
+        self._values[:, position:ncolumns] = self._values[
+            :, position + 1 : ncolumns + 1
+        ]
+        self._values[:, ncolumns] = np.nan
+        for i, column in enumerate(self.columns[position:]):
+            self._position[column] = position + i
+        return position < ncolumns
+
+    def series(self, name: str) -> pd.Series:
+        """
+        Column as a pd.Series sharing the memory of the store
+
+        Parameters
+        ----------
+        name: str
+            column name
+
+        Returns
+        -------
+        pd.Series
+        """
+        return pd.Series(
+            data=self._values[:, self._position[name]],
+            index=self.index,
+            name=name,
+            copy=False,
+        )
+
+    def dataframe(self) -> pd.DataFrame:
+        """
+        All columns as a pd.DataFrame sharing the memory of the store
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        return pd.DataFrame(
+            data=self._values[:, : len(self.columns)],
+            index=self.index,
+            columns=self.columns,
+            copy=False,
+        )
@@ -0,0 +1,113 @@
+"""module with an append-only binary journal of market ticks"""
+
+# =================
+# Python IMPORTS
+# =================
+import os
+import numpy as np
+import pandas as pd
+
+# =================
+# Internal IMPORTS
+# =================
+
+# =================
+# Variables
+# =================
+RECORD = np.dtype(
+    [("time", "<i8"), ("ask", "<f8"), ("bid", "<f8"), ("volume", "<f8")]
+)  # one tick: time in nanoseconds, ask, bid and volume
+
+
+class TickJournal:
+    """
+    Append-only file of fixed-size tick records (see RECORD).
+    A tick is written to disk as soon as it is appended, and synchronised
+    (os.fsync) every fsync ticks, so that it survives a crash of the process
+    (or of the system, up to fsync ticks).
+    """
+
+    def __init__(self, path: str, fsync: int = 1):
+        """
+        Parameters
+        ----------
+        path: str
+            path of the journal file
+        fsync: int
+            number of ticks between two synchronisations of the file on disk,
+            never synchronised if 0
+        """
+        self.path = path
+        self.fsync = fsync
+        self._nsync = 0  # ticks appended since the last synchronisation
+        directory = os.path.dirname(path)
+        if directory != "" and not os.path.isdir(directory):
+            os.makedirs(directory)
+        self._repair()
+        self._file = open(path, "ab", buffering=0)
+
+    def __len__(self) -> int:
+        return os.path.getsize(self.path) // RECORD.itemsize
+
+    def _repair(self):
+        """Remove an incomplete last record (process stopped while writing)"""
+        if os.path.isfile(self.path):
+            size = os.path.getsize(self.path)
+            if size % RECORD.itemsize != 0:
+                with open(self.path, "r+b") as ifile:
+                    ifile.truncate(size - size % RECORD.itemsize)
+
+    def append(self, time, ask: float, bid: float, volume: float):
+        """
+        Add one tick
+
+        Parameters
+        ----------
+        time: datetime like
+        ask: float
+        bid: float
+        volume: float
+        """
+        record = np.array([(pd.Timestamp(time).value, ask, bid, volume)], dtype=RECORD)
+        self._file.write(record.tobytes())
+        self._nsync += 1
+        if self.fsync > 0 and self._nsync >= self.fsync:
+            os.fsync(self._file.fileno())
+            self._nsync = 0
+
+    def read(self) -> np.ndarray:
+        """
+        Read all ticks
+
+        Returns
+        -------
+        np.ndarray: records with fields time, ask, bid and volume
+        """
+        return np.fromfile(self.path, dtype=RECORD, count=len(self))
+
+    def dataframe(self) -> pd.DataFrame:
+        """
+        Read all ticks as a DataFrame
+
+        Returns
+        -------
+        pd.DataFrame: columns ask, bid and volume, index time
+        """
+        records = self.read()
+        index = pd.DatetimeIndex(records["time"].view("datetime64[ns]"), name="time")
+        return pd.DataFrame(
+            {name: records[name] for name in ["ask", "bid", "volume"]}, index=index
+        )
+
+    def clear(self):
+        """Remove all ticks, after a compaction"""
+        self._file.truncate(0)
+        os.fsync(self._file.fileno())
+        self._nsync = 0
+
+    def close(self):
+        """Close the journal file"""
+        if not self._file.closed:
+            if self.fsync > 0:
+                os.fsync(self._file.fileno())
+            self._file.close()
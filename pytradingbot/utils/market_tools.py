@@ -7,63 +7,107 @@ Module containing usefull function for market
 # =================
 import logging
 import os.path
+import numpy as np
 import pandas as pd
 
 # =================
 # Internal IMPORTS
 # =================
-from pytradingbot.utils.read_file import read_csv_market, read_list_market
+from pytradingbot.utils.read_file import (
+    read_csv_market,
+    read_list_market,
+    read_npy_market,
+)
+from pytradingbot.utils.memmap_store import (
+    build_memmap_store,
+    open_memmap_store,
+    memmap_segment,
+)
 from pytradingbot.cores.markets import MarketLoad
 
 # =================
 # Variables
 # =================
+AUTO_DELTA_FACTOR = 2  # gap threshold in median sampling intervals (delta="auto")
+
+
+def time_gap_threshold(times, factor: float = AUTO_DELTA_FACTOR) -> float:
+    """
+    Function to define the maximum time between two points of a market
+    from the median sampling interval
+
+    Parameters
+    ----------
+    times: pd.DatetimeIndex or np.ndarray
+        times (with or without time zone), or int64 nanoseconds
+    factor: float
+        threshold in number of median intervals
+
+    Returns
+    -------
+    float: threshold in seconds, infinite if there is less than two points
+    """
+    times = pd.DatetimeIndex(times).asi8
+    if len(times) < 2:
+        return np.inf
+    return factor * float(np.median(np.diff(times))) / 10**9
+
+
+def split_time_bounds(times, delta: [float, str] = 60) -> np.ndarray:
+    """
+    Function to find segments of consecutive times without a gap upper than delta
+
+    Parameters
+    ----------
+    times: pd.DatetimeIndex or np.ndarray
+        times (with or without time zone), or int64 nanoseconds
+    delta: float or str
+        maximum second between two points,
+        "auto" to define it from the data (see time_gap_threshold)
+
+    Returns
+    -------
+    np.ndarray: shape (number of segments, 2), first and last (excluded) row
+        of each segment
+    """
+    times = pd.DatetimeIndex(times).asi8
+    if delta == "auto":
+        delta = time_gap_threshold(times)
+    gaps = np.flatnonzero(np.diff(times) > delta * 10**9) + 1
+    bounds = np.concatenate([[0], gaps, [len(times)]])
+    return np.stack([bounds[:-1], bounds[1:]], axis=1)
 
 
 def split_time_df(data, delta=60):
     """
-    Function to split dataframe if time delta is upper than delta
+    Function to split dataframe if time delta is upper than delta.
+    data is not modified, output dataframes are views on data
     Parameters
     ----------
     data: pd.DataFrame
         data to split
-    delta: int
-        maximum second between two points
+    delta: int or str
+        maximum second between two points, "auto" to define it from the data
+        (see time_gap_threshold)
 
     Returns
     -------
     list: list of dataframe
 
     """
-    # create timestep between two rows
-    data["delta"] = data.index.to_series().diff().dt.total_seconds().fillna(0)
-    # where timestep is higher than user defined limit
-    idx = data.index[data["delta"] > delta]
-    # create output list
-    odata = []
-    last_value = 0
-    if len(idx) == 0:
-        odata.append(data.drop(columns=["delta"]))
-        last_value = 0
-    for i, value in enumerate(idx):
-        if i == 0:
-            odata.append(data[:value].drop(columns=["delta"]).iloc[:-1])
-        if i == len(idx) - 1:
-            if i != 0:
-                odata.append(data[last_value:value].drop(columns=["delta"]).iloc[:-1])
-            odata.append(data[value:].drop(columns=["delta"]))
-        elif i != 0:
-            odata.append(data[last_value:value].drop(columns=["delta"]).iloc[:-1])
-        last_value = value
-    return odata
-
-
-def df2market(data_df: pd.DataFrame):
+    return [
+        data.iloc[start:stop] for start, stop in split_time_bounds(data.index, delta)
+    ]
+
+
+def df2market(data_df: pd.DataFrame, columnar: bool = False):
     """
     Function to transform dataframe to market object
     Parameters
     ----------
     data_df: pd.DataFrame
+    columnar: bool
+        store properties of the market in one array (see MarketLoad)
 
     Returns
     -------
@@ -75,12 +119,16 @@ def df2market(data_df: pd.DataFrame):
         if prop not in data_df.columns:
             test = False
     if test:
-        return MarketLoad(data_df["ask"], data_df["bid"], data_df["volume"])
+        return MarketLoad(
+            data_df["ask"], data_df["bid"], data_df["volume"], columnar=columnar
+        )
     else:
         return None
 
 
-def market_from_file(ifile: str, fmt="csv"):
+def market_from_file(
+    ifile: str, fmt: str = "csv", columnar: bool = False, delta: [float, str] = 120
+):
     """
     function to read market from file
     Parameters
@@ -88,17 +136,26 @@ def market_from_file(ifile: str, fmt="csv"):
     ifile: str
         path of file
     fmt: str
-        format of ifile: should be in ['csv', 'list']
+        format of ifile: should be in ['csv', 'list', 'numpy'].
+        With numpy, ifile is a directory (see read_npy_market)
+    columnar: bool
+        store properties of markets in one array (see MarketLoad)
+    delta: float or str
+        maximum second between two points of a market (see split_time_df)
 
     Returns
     -------
     list: list of market objects
     """
-    fmt_choices = ["csv", "list"]
-    if not os.path.isfile(ifile):
+    fmt_choices = ["csv", "list", "numpy"]
+    if fmt == "numpy" and os.path.isdir(ifile):
+        data_df = read_npy_market(ifile)
+        if data_df is None:
+            return None
+    elif not os.path.isfile(ifile):
         logging.warning(f"{ifile} is not a file, market is not loaded")
         return None
-    if fmt == "csv":
+    elif fmt == "csv":
         data_df = read_csv_market(ifile)
     elif fmt == "list":
         data_df = read_list_market(ifile)
@@ -110,14 +167,12 @@ def market_from_file(ifile: str, fmt="csv"):
         return None
 
     # split dataframe if timedelta is too high
-    list_df = split_time_df(
-        data_df, delta=120
-    )  # Todo: auto defined the delta time from the data
+    list_df = split_time_df(data_df, delta=delta)
 
     # Create market class
     list_market = []
     for i, data in enumerate(list_df):
-        df_tmp = df2market(data)
+        df_tmp = df2market(data, columnar=columnar)
         if df_tmp is not None:
             list_market.append(df_tmp)
         else:
@@ -129,3 +184,46 @@ def market_from_file(ifile: str, fmt="csv"):
     # TODO: add option to add other properties than bid / ask in the market
 
     return list_market
+
+
+def market_from_memmap(
+    ifile: str,
+    fmt: str = "csv",
+    store_dir: str = None,
+    delta: [float, str] = 120,
+    rebuild: bool = False,
+):
+    """
+    function to read market from file through a store of memory-mapped columns.
+    The file is converted once (see build_memmap_store), then values of markets
+    are read-only views on the memory maps: they are loaded from disk when used.
+
+    Parameters
+    ----------
+    ifile: str
+        path of file
+    fmt: str
+        format of ifile: should be in ['csv', 'list']
+    store_dir: str
+        directory of the store, ifile.mmap by default
+    delta: float or str
+        maximum second between two points of a market (see split_time_df)
+    rebuild: bool
+        convert the file even if the store is up-to-date
+
+    Returns
+    -------
+    list: list of market objects
+    """
+    store_dir = build_memmap_store(ifile, fmt=fmt, store_dir=store_dir, rebuild=rebuild)
+    if store_dir is None:
+        return None
+    columns = open_memmap_store(store_dir)
+
+    # split markets if timedelta is too high
+    list_market = []
+    for start, stop in split_time_bounds(columns["time"], delta=delta):
+        if stop > start:
+            data = memmap_segment(columns, start, stop)
+            list_market.append(MarketLoad(data["ask"], data["bid"], data["volume"]))
+    return list_market
@@ -0,0 +1,145 @@
+"""
+Module to store a market history as memory-mapped columns
+"""
+
+# =================
+# Python IMPORTS
+# =================
+import json
+import logging
+import os
+import numpy as np
+import pandas as pd
+
+# =================
+# Internal IMPORTS
+# =================
+from pytradingbot.utils.read_file import read_csv_market, read_list_market
+
+# =================
+# Variables
+# =================
+COLUMNS = ["time", "ask", "bid", "volume"]  # one .npy file by column
+
+
+def _source_stamp(ifile: str, fmt: str) -> dict:
+    """
+    Function to identify a version of the source file of a store
+
+    Returns
+    -------
+    dict: with keys path, format, size and mtime
+    """
+    stat = os.stat(ifile)
+    return {
+        "path": os.path.abspath(ifile),
+        "format": fmt,
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+    }
+
+
+def build_memmap_store(
+    ifile: str, fmt: str = "csv", store_dir: str = None, rebuild: bool = False
+) -> [str, None]:
+    """
+    Function to convert a market file into a directory of .npy columns,
+    sorted by time and without duplicated time.
+    The conversion is skipped if the store is up-to-date with the source file.
+
+    Parameters
+    ----------
+    ifile: str
+        path of the market file
+    fmt: str
+        format of ifile: should be in ['csv', 'list']
+    store_dir: str
+        directory of the store, ifile.mmap by default
+    rebuild: bool
+        convert even if the store is up-to-date
+        (a list file is not modified when its files are)
+
+    Returns
+    -------
+    str: directory of the store, None if the market cannot be read
+    """
+    if not os.path.isfile(ifile):
+        logging.warning(f"{ifile} is not a file, market is not loaded")
+        return None
+    if store_dir is None:
+        store_dir = f"{ifile}.mmap"
+    stamp = _source_stamp(ifile, fmt)
+    stamp_path = f"{store_dir}/source.json"
+    if not rebuild and os.path.isfile(stamp_path):
+        with open(stamp_path, encoding="utf-8") as ifile_stamp:
+            if json.load(ifile_stamp) == stamp:
+                return store_dir
+
+    if fmt == "csv":
+        data_df = read_csv_market(ifile)
+    elif fmt == "list":
+        data_df = read_list_market(ifile)
+    else:
+        logging.warning(
+            f"{fmt} is not an accepted format, market is not loaded. "
+            f"Possible choices: ['csv', 'list']"
+        )
+        return None
+    missing = [col for col in COLUMNS[1:] if col not in data_df.columns]
+    if len(missing) > 0:
+        logging.warning(f"{missing} missing in {ifile}, market is not loaded")
+        return None
+    data_df = data_df.sort_index(kind="stable")
+    data_df = data_df[~data_df.index.duplicated(keep="last")]
+
+    os.makedirs(store_dir, exist_ok=True)
+    if os.path.isfile(stamp_path):
+        os.remove(stamp_path)  # store is not valid while it is written
+    np.save(f"{store_dir}/time.npy", pd.DatetimeIndex(data_df.index).asi8)
+    for col in COLUMNS[1:]:
+        np.save(f"{store_dir}/{col}.npy", data_df[col].to_numpy(dtype=float))
+    with open(stamp_path, "w", encoding="utf-8") as ofile:
+        json.dump(stamp, ofile)
+    return store_dir
+
+
+def open_memmap_store(store_dir: str) -> dict:
+    """
+    Function to open the columns of a store as read-only memory maps
+
+    Parameters
+    ----------
+    store_dir: str
+        directory of the store, see build_memmap_store
+
+    Returns
+    -------
+    dict: np.memmap by column (time in int64 nanoseconds)
+    """
+    return {col: np.load(f"{store_dir}/{col}.npy", mmap_mode="r") for col in COLUMNS}
+
+
+def memmap_segment(columns: dict, start: int, stop: int) -> dict:
+    """
+    Function to get rows of a store as series, without copy
+
+    Parameters
+    ----------
+    columns: dict
+        np.memmap by column, see open_memmap_store
+    start: int
+        first row
+    stop: int
+        last row (excluded)
+
+    Returns
+    -------
+    dict: pd.Series sharing the memory map for ask, bid and volume
+    """
+    index = pd.DatetimeIndex(
+        columns["time"][start:stop].view("datetime64[ns]"), name="time", copy=False
+    )
+    return {
+        col: pd.Series(columns[col][start:stop], index=index, name=col, copy=False)
+        for col in COLUMNS[1:]
+    }
@@ -0,0 +1,229 @@
+"""
+Module to optimize parameters of orders on a loaded market
+"""
+
+# =================
+# Python IMPORTS
+# =================
+import copy
+import itertools
+import logging
+import re
+import numpy as np
+import pandas as pd
+
+# =================
+# Internal IMPORTS
+# =================
+from pytradingbot.cores.markets import MarketLoad
+from pytradingbot.cores.orders import generate_condition_from_dict, simulate_orders
+from pytradingbot.cores.properties import generate_property_by_name
+from pytradingbot.utils.read_file import read_input_order_config
+
+# =================
+# Variables
+# =================
+
+
+def replace_k(name: str, k: int) -> str:
+    """
+    Function to change the first k parameter in a property name
+
+    Parameters
+    ----------
+    name: str
+        property name, ex: EMA_k-7_ask
+    k: int
+        new value of k
+
+    Returns
+    -------
+    str: property name, ex: EMA_k-12_ask for k=12
+    """
+    return re.sub(r"k-\d+", f"k-{k}", name, count=1)
+
+
+def _parameters(actions: list, values: dict, names: dict, k: dict) -> list:
+    """
+    Function to list swept parameters
+
+    Returns
+    -------
+    list of tuple: (label, (action, condition), field, choices)
+    """
+    names = dict(names)
+    for key, choices in k.items():
+        if key in names:
+            logging.warning(f"property and k are both swept for {key}, k skipped")
+            continue
+        action, condition = key
+        name = actions[action]["conditions"][condition]["property"]
+        names[key] = [replace_k(name, value) for value in choices]
+    parameters = []
+    for field, sweep in [("value", values), ("property", names)]:
+        for (action, condition), choices in sweep.items():
+            parameters.append(
+                (f"{field}_{action}_{condition}", (action, condition), field, choices)
+            )
+    return parameters
+
+
+def _combinations(parameters: list, nsamples: int = None, seed: int = None) -> list:
+    """
+    Function to list combinations of parameters: the full grid, or nsamples
+    combinations drawn at random in the grid
+
+    Returns
+    -------
+    list of tuple: choice of each parameter
+    """
+    choices = [parameter[3] for parameter in parameters]
+    size = int(np.prod([len(choice) for choice in choices]))
+    if nsamples is None or nsamples >= size:
+        return list(itertools.product(*choices))
+    rng = np.random.default_rng(seed)
+    samples = rng.choice(size, size=nsamples, replace=False)
+    positions = np.unravel_index(samples, [len(choice) for choice in choices])
+    return [
+        tuple(choice[position[i]] for choice, position in zip(choices, positions))
+        for i in range(nsamples)
+    ]
+
+
+def sweep_orders(
+    market: MarketLoad,
+    actions: [list, str],
+    values: dict = None,
+    properties: dict = None,
+    k: dict = None,
+    nsamples: int = None,
+    seed: int = None,
+    batch_size: int = 256,
+    imoney: float = 100,
+    fees: float = 0.1,
+    cost_no_action: float = 100,
+    min_order_per_day: float = 0,
+) -> pd.DataFrame:
+    """
+    Function to simulate trading for combinations of order parameters.
+    Each distinct property and each distinct condition is calculated once,
+    then actions of all combinations are evaluated together as boolean matrices.
+
+    Parameters
+    ----------
+    market: MarketLoad
+        market to simulate
+    actions: list or str
+        actions to optimize (see read_input_order_config), or path of the xml input file
+    values: dict
+        (action index, condition index): list of condition values
+    properties: dict
+        (action index, condition index): list of condition property names
+    k: dict
+        (action index, condition index): list of k for the condition property,
+        the first k of the property name is replaced (see replace_k)
+    nsamples: int
+        number of combinations drawn at random, all combinations if None
+    seed: int
+        seed of the random drawing
+    batch_size: int
+        number of combinations evaluated together
+    imoney, fees, cost_no_action, min_order_per_day:
+        arguments of Order.simulate_trading
+
+    Returns
+    -------
+    pd.DataFrame: one row by combination, sorted by money.
+        Columns: value_i_j / property_i_j for each swept parameter, money, win, loose
+    """
+    if isinstance(actions, str):
+        actions = read_input_order_config(actions)
+    actions = [action for action in actions if action.get("type") in ["buy", "sell"]]
+    parameters = _parameters(actions, values or {}, properties or {}, k or {})
+    combinations = _combinations(parameters, nsamples=nsamples, seed=seed)
+
+    # actions of each combination, conditions are stored by key
+    conditions = {}  # (function, value, property): row in matrix
+    combination_actions = []
+    for combination in combinations:
+        actions_tmp = copy.deepcopy(actions)
+        for (_, (action, condition), field, _), choice in zip(parameters, combination):
+            actions_tmp[action]["conditions"][condition][field] = choice
+        for action in actions_tmp:
+            action["keys"] = [
+                conditions.setdefault(
+                    (cond["function"], cond["value"], cond["property"]),
+                    len(conditions),
+                )
+                for cond in action["conditions"]
+            ]
+        combination_actions.append(actions_tmp)
+
+    # properties and conditions are calculated once
+    for name in {key[2] for key in conditions}:
+        if generate_property_by_name(name, market) is None:
+            logging.warning(f"Cannot generate property {name}")
+    market.analyse(verbose=False)
+    nrows = len(market.ask.data)
+    matrix = np.zeros((len(conditions), nrows), dtype=np.int32)
+    for (function, value, name), row in conditions.items():
+        if not market.is_property_by_name(name):
+            continue  # condition is never true
+        cond_dict = {"function": function, "value": value, "property": name}
+        condition = generate_condition_from_dict(cond_dict, market=market)
+        if condition is None:
+            logging.warning(f"Cannot generate condition : {cond_dict}")
+            continue
+        condition.update()
+        matrix[row] = condition.data.to_numpy(dtype=bool, na_value=False)
+
+    # orders of all combinations, by batch
+    ask = np.asarray(market.ask.data.values, dtype=float)
+    bid = np.asarray(market.bid.data.values, dtype=float)
+    money, win, loose = [], [], []
+    for start in range(0, len(combinations), batch_size):
+        batch = combination_actions[start : start + batch_size]
+        # incidence of conditions in actions, and of actions in combinations
+        rows = [action for actions_tmp in batch for action in actions_tmp]
+        incidence = np.zeros((len(rows), len(conditions)), dtype=np.int32)
+        for i, action in enumerate(rows):
+            incidence[i, action["keys"]] = 1
+        counts = incidence.sum(axis=1)
+        # an action is true if all its conditions are true
+        actions_data = (incidence @ matrix == counts[:, None]) & (counts[:, None] > 0)
+        orders = np.zeros((len(batch), nrows), dtype=int)
+        for atype, sign in [("buy", 1), ("sell", -1)]:
+            owner = np.zeros((len(batch), len(rows)), dtype=np.int32)
+            i = 0
+            for j, actions_tmp in enumerate(batch):
+                for action in actions_tmp:
+                    owner[j, i] = action["type"] == atype
+                    i += 1
+            orders += sign * ((owner @ actions_data) > 0)
+        results = simulate_orders(orders, ask, bid, imoney, fees, cost_no_action)
+        money.append(results[0])
+        win.append(results[1])
+        loose.append(results[2])
+
+    money = np.concatenate(money) if len(money) > 0 else np.zeros(0)
+    win = np.concatenate(win) if len(win) > 0 else np.zeros(0, dtype=int)
+    loose = np.concatenate(loose) if len(loose) > 0 else np.zeros(0, dtype=int)
+    # penalty if not enough trades, see Order.simulate_trading
+    ndays = (market.ask.data.index[-1] - market.ask.data.index[0]).total_seconds()
+    ndays = ndays / 3600 / 24
+    trades = win + loose
+    money = np.where(
+        trades > min_order_per_day * ndays,
+        money,
+        money + trades - min_order_per_day * ndays,
+    )
+
+    table = pd.DataFrame(
+        combinations, columns=[parameter[0] for parameter in parameters]
+    )
+    table["money"] = money
+    table["win"] = win
+    table["loose"] = loose
+    return table.sort_values("money", ascending=False, kind="stable").reset_index(
+        drop=True
+    )
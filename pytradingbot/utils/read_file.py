@@ -6,11 +6,15 @@ Module containing function to read file
 # Python IMPORTS
 # =================
 import os.path
+import glob
 import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 from lxml import etree
 
-
 # =================
 # Internal IMPORTS
 # =================
@@ -44,18 +48,66 @@ def read_csv_market(path: str):
     return df_market
 
 
-def read_list_market(path: str):
+def read_npy_market(path: str):
     """
-    function to read market from a list of file
+    function to read market saved with the numpy format (see Market.save):
+    a directory of chunks (.npy files of records) of one day,
+    or a directory of directories of days
+
     Parameters
     ----------
     path: str
-        path of input file
+        path of input directory
 
     Returns
     -------
-    pd.DataFrame
+    pd.Dataframe
 
+    """
+    if not os.path.isdir(path):
+        logging.warning(f"{path} is not a directory, market is not loaded")
+        return None
+    # chunks are named by their first and last times: sorted by name is sorted by time
+    files = sorted(glob.glob(f"{path}/*.npy")) + sorted(glob.glob(f"{path}/*/*.npy"))
+    if len(files) == 0:
+        logging.warning(f"no chunk in {path}, market is not loaded")
+        return None
+
+    # consecutive chunks with the same columns are concatenated at once
+    chunks = [np.load(ifile) for ifile in files]
+    groups = [[chunks[0]]]
+    for chunk in chunks[1:]:
+        if chunk.dtype == groups[-1][-1].dtype:
+            groups[-1].append(chunk)
+        else:
+            groups.append([chunk])
+    frames = []
+    for group in groups:
+        records = np.concatenate(group)
+        index = pd.DatetimeIndex(records["time"].view("datetime64[ns]"), name="time")
+        frames.append(
+            pd.DataFrame(
+                {name: records[name] for name in records.dtype.names[1:]}, index=index
+            )
+        )
+    df_market = frames[0] if len(frames) == 1 else pd.concat(frames, axis=0)
+    if not df_market.index.is_monotonic_increasing:
+        df_market = df_market.sort_index(kind="stable")
+    return df_market[~df_market.index.duplicated(keep="last")]
+
+
+def read_list_files(path: str) -> [list, None]:
+    """
+    function to get files of a list of market files
+
+    Parameters
+    ----------
+    path: str
+        path of input file
+
+    Returns
+    -------
+    list: path of existing files
     """
     if not os.path.isfile(path):
         logging.warning(f"{path} is not a file, market is not loaded")
@@ -63,7 +115,7 @@ def read_list_market(path: str):
     root_dir = os.path.abspath(
         os.path.join(os.path.dirname(__file__), "..")
     )  # get the directory of the module
-    data_df = pd.DataFrame()
+    list_files = []
     with open(path, encoding="utf-8") as files:
         directory = root_dir
         for line in files:
@@ -85,11 +137,85 @@ def read_list_market(path: str):
             elif len(line) > 0:
                 ifile = f"{directory}/{line.rstrip()}"
                 if os.path.isfile(ifile):
-                    data_df = pd.concat([data_df, read_csv_market(ifile)], axis=0)
+                    list_files.append(ifile)
                 else:
                     logging.warning(f"{ifile} is not a file, file skipped")
-    data_df.sort_index(axis=0)
-    return data_df
+    return list_files
+
+
+def read_list_market(path: str, workers: int = None):
+    """
+    function to read market from a list of file.
+    Files are read in parallel threads, then sorted by time without duplicated time.
+
+    Parameters
+    ----------
+    path: str
+        path of input file
+    workers: int
+        number of threads, see concurrent.futures.ThreadPoolExecutor
+
+    Returns
+    -------
+    pd.DataFrame
+
+    """
+    list_files = read_list_files(path)
+    if list_files is None:
+        return None
+    if len(list_files) == 0:
+        return pd.DataFrame()
+
+    def read_timed(ifile: str):
+        tstart = time.perf_counter()
+        data = read_csv_market(ifile)
+        logging.info(f"{ifile} read in {time.perf_counter() - tstart:.3f}s")
+        return data
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list_df = list(executor.map(read_timed, list_files))
+    data_df = pd.concat(list_df, axis=0)
+    if not data_df.index.is_monotonic_increasing:
+        data_df = data_df.sort_index(axis=0, kind="stable")
+    return data_df[~data_df.index.duplicated(keep="last")]
+
+
+def read_market_chunks(path: str, fmt: str = "csv", chunksize: int = 10000):
+    """
+    generator of market DataFrames read by chunks of rows.
+    Files of a list are read one after the other, they should be sorted by time.
+
+    Parameters
+    ----------
+    path: str
+        path of input file
+    fmt: str
+        format of file: should be in ['csv', 'list']
+    chunksize: int
+        maximum number of rows of a chunk
+
+    Yields
+    ------
+    pd.DataFrame
+    """
+    if fmt == "csv":
+        if not os.path.isfile(path):
+            logging.warning(f"{path} is not a file, market is not loaded")
+            return
+        list_files = [path]
+    elif fmt == "list":
+        list_files = read_list_files(path)
+        if list_files is None:
+            return
+    else:
+        logging.warning(f"{fmt} is not an accepted format, market is not loaded")
+        return
+    for ifile in list_files:
+        with pd.read_csv(
+            ifile, sep=" ", index_col=0, parse_dates=True, chunksize=chunksize
+        ) as reader:
+            for chunk in reader:
+                yield chunk
 
 
 def read_input_analysis_config(path: str) -> list:
@@ -152,12 +278,10 @@ def read_input_order_config(path: str) -> list:
             tmp["type"] = action.attrib["type"]
             tmp["conditions"] = []
             for j, condition in enumerate(action.xpath("condition")):
-                if "function" in condition.attrib and condition.attrib["function"] in [
-                    ">",
-                    "<",
-                    "+=",
-                    "-=",
-                ]:
+                # +=N / -=N: cross up / down in the last N steps
+                if "function" in condition.attrib and re.fullmatch(
+                    r"[<>]|[+-]=\d*", condition.attrib["function"]
+                ):
                     if "value" in condition.attrib:
                         try:
                             value = float(condition.attrib["value"])
@@ -0,0 +1,141 @@
+"""module with a fixed-capacity buffer for time series"""
+
+# =================
+# Python IMPORTS
+# =================
+import numpy as np
+import pandas as pd
+
+# =================
+# Internal IMPORTS
+# =================
+
+# =================
+# Variables
+# =================
+
+
+class RingBuffer:
+    """
+    Fixed-capacity buffer of (time, value) rows backed by NumPy arrays.
+    Times are stored as int64 nanoseconds and values as float64.
+
+    Each row is written twice, at position i and i + capacity, so the last
+    rows are always contiguous in memory and can be read without a copy
+    (see times and values).
+    When the buffer is full, a new row overwrites the oldest one.
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Parameters
+        ----------
+        capacity: int
+            maximum number of rows
+        """
+        if capacity < 1:
+            raise ValueError(f"capacity should be a positive integer: {capacity}")
+        self.capacity = capacity
+        self._time = np.zeros(2 * capacity, dtype=np.int64)
+        self._value = np.zeros(2 * capacity, dtype=np.float64)
+        self._end = 0  # position of the next row, in [0, capacity)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, time: int, value: float):
+        """
+        Add one row
+
+        Parameters
+        ----------
+        time: int
+            time in nanoseconds
+        value: float
+        """
+        self._time[self._end] = self._time[self._end + self.capacity] = time
+        self._value[self._end] = self._value[self._end + self.capacity] = value
+        self._end = (self._end + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def extend(self, times: np.ndarray, values: np.ndarray):
+        """
+        Add several rows. Only the last capacity rows are kept.
+
+        Parameters
+        ----------
+        times: np.ndarray
+            times in nanoseconds
+        values: np.ndarray
+        """
+        times = np.asarray(times, dtype=np.int64)[-self.capacity :]
+        values = np.asarray(values, dtype=np.float64)[-self.capacity :]
+        if times.shape[0] == 1:
+            self.append(times[0], values[0])
+            return
+        position = (self._end + np.arange(times.shape[0])) % self.capacity
+        self._time[position] = self._time[position + self.capacity] = times
+        self._value[position] = self._value[position + self.capacity] = values
+        self._end = (self._end + times.shape[0]) % self.capacity
+        self._size = min(self._size + times.shape[0], self.capacity)
+
+    def clear(self):
+        """Remove all rows"""
+        self._end = 0
+        self._size = 0
+
+    def keep(self, nrows: int):
+        """
+        Keep only the last nrows rows
+
+        Parameters
+        ----------
+        nrows: int
+        """
+        self._size = min(self._size, max(nrows, 0))
+
+    def resize(self, capacity: int):
+        """
+        Change the capacity, the last rows are kept
+
+        Parameters
+        ----------
+        capacity: int
+            new maximum number of rows
+        """
+        times = self.times.copy()
+        values = self.values.copy()
+        self.__init__(capacity)
+        if times.shape[0] > 0:
+            self.extend(times, values)
+
+    @property
+    def times(self) -> np.ndarray:
+        """view on the times (int64 nanoseconds), from the oldest to the newest"""
+        stop = self._end + self.capacity
+        return self._time[stop - self._size : stop]
+
+    @property
+    def values(self) -> np.ndarray:
+        """view on the values, from the oldest to the newest"""
+        stop = self._end + self.capacity
+        return self._value[stop - self._size : stop]
+
+    def series(self, name: str = None) -> pd.Series:
+        """
+        Series of the rows, from the oldest to the newest.
+        Times and values are copied: the buffer is overwritten by the next rows,
+        and the index of a pd.Series should not change (O(capacity)).
+
+        Parameters
+        ----------
+        name: str
+            name of the series
+
+        Returns
+        -------
+        pd.Series
+        """
+        index = pd.DatetimeIndex(self.times.view("datetime64[ns]"), copy=True)
+        return pd.Series(data=self.values.copy(), index=index, name=name, copy=False)
@@ -0,0 +1,112 @@
+"""module with a scheduler of periodic ticks, without drift"""
+
+# =================
+# Python IMPORTS
+# =================
+import math
+import time
+
+# =================
+# Internal IMPORTS
+# =================
+
+# =================
+# Variables
+# =================
+POLICIES = ["skip", "catchup"]  # what to do with ticks missed by an overrun
+
+
+class TickScheduler:
+    """
+    Scheduler of ticks at fixed deadlines: start + n * period on a monotonic clock,
+    so that the time spent in a tick does not delay the next ones.
+    A tick ending after the next deadline is an overrun: missed ticks are skipped
+    (next tick at the next deadline in the future) or caught up (next ticks
+    without waiting until the scheduler is on time).
+
+    Usage: tick() at the start of each iteration, wait() at its end
+    (or next_delay() to wait in an other way, ex: asyncio.sleep).
+    """
+
+    def __init__(
+        self,
+        period: float,
+        policy: str = "skip",
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        """
+        Parameters
+        ----------
+        period: float
+            time between two ticks (s), ticks without waiting if 0
+        policy: str
+            overrun policy, in POLICIES
+        clock: callable
+            monotonic clock in seconds
+        sleep: callable
+            function to wait a time in seconds
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"{policy} is not a policy, possible choices: {POLICIES}")
+        self.period = period
+        self.policy = policy
+        self.clock = clock
+        self.sleep = sleep
+        self.deadline = None  # time of the current tick
+        self.ticks = 0
+        self.overruns = 0  # number of ticks ending after the next deadline
+        self.skipped = 0  # number of deadlines skipped after overruns
+        self._jitter_sum = 0.0
+        self._jitter_max = 0.0
+
+    def tick(self):
+        """Method to call at the start of a tick: the lateness is measured (jitter)"""
+        now = self.clock()
+        if self.deadline is None:
+            self.deadline = now
+        jitter = max(now - self.deadline, 0.0)
+        self.ticks += 1
+        self._jitter_sum += jitter
+        self._jitter_max = max(self._jitter_max, jitter)
+
+    def next_delay(self) -> float:
+        """
+        Method to call at the end of a tick: move to the next deadline
+
+        Returns
+        -------
+        float: time to wait before the next tick (s)
+        """
+        now = self.clock()
+        if self.deadline is None or self.period <= 0:
+            self.deadline = now
+        self.deadline += self.period
+        if now > self.deadline:
+            self.overruns += 1
+            if self.policy == "skip":
+                missed = math.floor((now - self.deadline) / self.period) + 1
+                self.skipped += missed
+                self.deadline += missed * self.period
+        return max(self.deadline - now, 0.0)
+
+    def wait(self):
+        """Method to wait the next tick"""
+        delay = self.next_delay()
+        if delay > 0:
+            self.sleep(delay)
+
+    @property
+    def metrics(self) -> dict:
+        """
+        Returns
+        -------
+        dict: ticks, overruns, skipped, jitter_mean and jitter_max (s)
+        """
+        return {
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "skipped": self.skipped,
+            "jitter_mean": self._jitter_sum / self.ticks if self.ticks > 0 else 0.0,
+            "jitter_max": self._jitter_max,
+        }